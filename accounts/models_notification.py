@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 class Notification(models.Model):
@@ -10,6 +11,10 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            models.Index(fields=['user'], condition=Q(is_read=False), name='notification_unread_idx'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message}"
@@ -98,15 +98,15 @@ def owner_dashboard(request):
         "storefront_settings_count": StorefrontSettings.objects.count(),
     }
     latest_users = User.objects.order_by("-date_joined")[:5]
-    latest_products = Product.objects.order_by("-id")[:5]
-    latest_orders = Order.objects.order_by("-created_at")[:5]
-    latest_reviews = Rating.objects.order_by("-created_at")[:5]
+    latest_products = Product.objects.select_related("seller__user").order_by("-id")[:5]
+    latest_orders = Order.objects.select_related("consumer").order_by("-created_at")[:5]
+    latest_reviews = Rating.objects.select_related("product", "user").order_by("-created_at")[:5]
 
     # Dynamic sales data (total revenue per month)
     sales_qs = (
-        LineItem.objects.annotate(month=TruncMonth("order__created_at"))
+        LineItem.objects.annotate(month=TruncMonth("created_at"))
         .values("month")
-        .annotate(total=Sum(F("quantity") * F("product__price")))
+        .annotate(total=Sum(F("quantity") * F("unit_price")))
         .order_by("month")
     )
     sales_labels = [item["month"].strftime("%b %Y") for item in sales_qs if item["month"]]
@@ -6,3 +6,26 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.base')
 app = Celery('3dprint_marketplace')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    'refresh-storefront-rails': {
+        'task': 'storefront.tasks.refresh_storefront_rails',
+        'schedule': 300.0,
+    },
+    'flush-popularity-counters': {
+        'task': 'products.tasks.flush_popularity_counters',
+        'schedule': 60.0,
+    },
+    'refresh-trending-scores': {
+        'task': 'products.tasks.refresh_trending_scores',
+        'schedule': 900.0,
+    },
+    'rebuild-copurchase-neighbors': {
+        'task': 'products.tasks.rebuild_copurchase_neighbors',
+        'schedule': 6 * 60 * 60.0,
+    },
+    'refresh-user-recommendations': {
+        'task': 'products.tasks.refresh_user_recommendations',
+        'schedule': 60 * 60.0,
+    },
+}
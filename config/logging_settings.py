@@ -34,5 +34,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'monitoring': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -56,8 +56,8 @@ INSTALLED_APPS = [
     "two_factor",
     # Project apps
     "accounts.apps.AccountsConfig",
-    "storefront",
-    "products",
+    "storefront.apps.StorefrontConfig",
+    "products.apps.ProductsConfig",
     "orders",
     "sellers",
     "payments",
@@ -65,13 +65,18 @@ INSTALLED_APPS = [
     "reviews",
     "legal",
     "messaging",
+    "monitoring.apps.MonitoringConfig",
     "django_recaptcha",
+    "rest_framework",
 ]
 
 AUTH_USER_MODEL = "accounts.User"
 
 MIDDLEWARE = [
+    "monitoring.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "monitoring.middleware.SQLInstrumentationMiddleware",
+    "monitoring.middleware.SlowQueryMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -156,6 +161,70 @@ else:
             }
         }
 
+# ------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------
+# Storefront rails, facet counts and config version stamps live here, so web
+# workers and Celery must share it: set REDIS_URL in production. Without it
+# each process gets its own in-memory cache (fine for local dev).
+REDIS_URL = os.environ.get("REDIS_URL", "").strip()
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# ------------------------------------------------------------
+# Celery
+# ------------------------------------------------------------
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", REDIS_URL) or None
+CELERY_TASK_IGNORE_RESULT = True
+
+# ------------------------------------------------------------
+# REST API (read-only catalog, products/api/)
+# ------------------------------------------------------------
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": ["rest_framework.authentication.SessionAuthentication"],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticatedOrReadOnly"],
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# ------------------------------------------------------------
+# Monitoring: SQL instrumentation, slow-query log and metrics
+# ------------------------------------------------------------
+# Per-view SQL aggregates (owner page at /monitoring/sql/) are off unless
+# SQL_INSTRUMENTATION is set. Only a random sample of requests is recorded,
+# so the overhead stays negligible under load.
+SQL_INSTRUMENTATION = env.bool("SQL_INSTRUMENTATION", default=False)
+SQL_INSTRUMENTATION_SAMPLE_RATE = env.float("SQL_INSTRUMENTATION_SAMPLE_RATE", default=0.05)
+SQL_N_PLUS_ONE_THRESHOLD = env.int("SQL_N_PLUS_ONE_THRESHOLD", default=10)
+SLOW_REQUEST_MS = env.int("SLOW_REQUEST_MS", default=1000)
+
+# Statements at or over SLOW_QUERY_MS are logged with their plan (owner page at
+# /monitoring/slow-queries/); 0 turns the log off. On PostgreSQL this fraction
+# of captured SELECTs is re-run under EXPLAIN ANALYZE.
+SLOW_QUERY_MS = env.int("SLOW_QUERY_MS", default=250)
+SLOW_QUERY_ANALYZE_SAMPLE_RATE = env.float("SLOW_QUERY_ANALYZE_SAMPLE_RATE", default=0.0)
+
+# Prometheus metrics at /metrics (monitoring/metrics.py). Under gunicorn set
+# PROMETHEUS_MULTIPROC_DIR so the workers' samples are merged. Scrapers
+# authenticate with "Authorization: Bearer $METRICS_TOKEN"; owners can open
+# the page while signed in.
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=True)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 # ------------------------------------------------------------
 # Static & Media
 # ------------------------------------------------------------
@@ -0,0 +1,164 @@
+"""
+Cached access to the singleton configuration rows.
+
+StorefrontSettings, SecuritySetting and the active featured creators and
+collections are read on almost every page but change only from the admin.
+Collections keep only product ids here: the products themselves change far
+more often, so get_featured_collections() resolves the ids against the
+database on every call and the cards come from products/cards.py.
+Each worker keeps one snapshot of them in memory (utils/process_cache.py) and
+checks the version stamp in the shared cache on every access, so a save in any
+worker is picked up by all of them on their next request. The stamp is bumped
+by the signal handlers in storefront/signals.py.
+
+Sections are loaded lazily, so a page that only needs the theme does not
+query the featured rows.
+"""
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+
+from utils import process_cache
+
+CACHE_KEY = 'site_config'
+# Random fallback picks (when nothing is featured) are redrawn at least this often
+MAX_AGE = 10 * 60
+
+DEFAULT_ALLOWED_MIME_TYPES = (
+    'application/sla', 'application/vnd.ms-pki.stl',
+    'application/octet-stream', 'image/jpeg', 'image/png',
+)
+
+
+@dataclass(frozen=True)
+class StorefrontOptions:
+    featured_products_mode: str = 'manual'
+    theme_mode: str = 'auto'
+    trending_half_life_hours: int = 48
+
+
+@dataclass(frozen=True)
+class SecurityOptions:
+    max_file_size_mb: int = 20
+    allowed_mime_types: tuple = DEFAULT_ALLOWED_MIME_TYPES
+
+
+@dataclass(frozen=True)
+class FeaturedCreatorCard:
+    seller_id: int
+    username: str
+    avatar_url: str = ''
+    note: str = ''
+
+
+@dataclass(frozen=True)
+class FeaturedCollectionCard:
+    name: str
+    description: str = ''
+    product_ids: tuple = ()
+    products: list = field(default_factory=list)  # {'id', 'version'} of the published ones, for get_cards()
+
+
+class _Snapshot:
+    @cached_property
+    def storefront(self):
+        from storefront.models import StorefrontSettings
+
+        row = StorefrontSettings.objects.order_by('pk').first()
+        if row is None:
+            return StorefrontOptions()
+        return StorefrontOptions(featured_products_mode=row.featured_products_mode, theme_mode=row.theme_mode,
+                                 trending_half_life_hours=row.trending_half_life_hours)
+
+    @cached_property
+    def security(self):
+        from moderation.models import SecuritySetting
+
+        row = SecuritySetting.objects.order_by('pk').first()
+        if row is None:
+            return SecurityOptions()
+        return SecurityOptions(max_file_size_mb=row.max_file_size_mb,
+                               allowed_mime_types=tuple(row.get_allowed_mime_types()))
+
+    @cached_property
+    def featured_creators(self):
+        from sellers.models import Seller
+        from storefront.models_featured import FeaturedCreator
+        from storefront.services import sample_sellers
+
+        featured = (
+            FeaturedCreator.objects.filter(is_active=True)
+            .select_related('seller__user__consumer_profile')
+            .order_by('position')
+        )
+        pairs = [(fc.seller, fc.note) for fc in featured]
+        if not pairs:
+            # Fallback: 3 random sellers with published products
+            sellers = sample_sellers(3, Seller.objects.select_related('user__consumer_profile'))
+            pairs = [(seller, 'Popular Creator') for seller in sellers]
+        return [
+            FeaturedCreatorCard(seller_id=seller.id, username=seller.user.username,
+                                avatar_url=seller.user.avatar_url or '', note=note)
+            for seller, note in pairs
+        ]
+
+    @cached_property
+    def featured_collections(self):
+        from django.db.models import Prefetch
+
+        from products.models import Product
+        from storefront.models_collections import FeaturedCollection
+        from storefront.services import sample_products
+
+        collections = (
+            FeaturedCollection.objects.filter(is_active=True)
+            .prefetch_related(Prefetch('products', queryset=Product.objects.only('id').order_by('id')))
+            .order_by('position', 'name')
+        )
+        cards = [
+            FeaturedCollectionCard(name=coll.name, description=coll.description,
+                                   product_ids=tuple(product.pk for product in coll.products.all()))
+            for coll in collections
+        ]
+        if not cards:
+            # Fallback: 6 random published products
+            picks = sample_products(6, Product.objects.only('id'))
+            if picks:
+                cards = [FeaturedCollectionCard(name='Editor Picks',
+                                                description='A curated set of trending models.',
+                                                product_ids=tuple(product.pk for product in picks))]
+        return cards
+
+
+def _snapshot():
+    return process_cache.get(CACHE_KEY, _Snapshot, check_interval=0, max_age=MAX_AGE)
+
+
+def get_storefront_config():
+    return _snapshot().storefront
+
+
+def get_security_config():
+    return _snapshot().security
+
+
+def get_featured_creators():
+    return _snapshot().featured_creators
+
+
+def get_featured_collections():
+    """The active collections, with the current version of each still-published product."""
+    from products.models import Product
+
+    collections = _snapshot().featured_collections
+    ids = {pk for coll in collections for pk in coll.product_ids}
+    if not ids:
+        return collections
+    versions = dict(Product.objects.filter(pk__in=ids, draft=False).values_list('id', 'version'))
+    return [
+        replace(coll, products=[{'id': pk, 'version': versions[pk]} for pk in coll.product_ids if pk in versions])
+        for coll in collections
+    ]
+
+
+def invalidate_site_config():
+    process_cache.invalidate(CACHE_KEY)
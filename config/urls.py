@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from two_factor.urls import urlpatterns as tf_urls
+from monitoring.views import metrics_view
 
 urlpatterns = [
     path('', include(tf_urls)),  # Make 2FA login the default
@@ -10,6 +11,7 @@ urlpatterns = [
     path('accounts/', include('accounts.urls', namespace='accounts')),
     path('', include('storefront.urls')),
     path('products/', include('products.urls')),
+    path('api/', include('products.api.urls')),
     path('orders/', include('orders.urls')),
     path('sellers/', include(('sellers.urls', 'sellers'), namespace='sellers')),
     path('payments/', include(('payments.urls', 'payments'), namespace='payments')),
@@ -17,6 +19,8 @@ urlpatterns = [
     path('reviews/', include('reviews.urls')),
     path('legal/', include('legal.urls')),
     path('messaging/', include('messaging.urls', namespace='messaging')),
+    path('monitoring/', include('monitoring.urls', namespace='monitoring')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
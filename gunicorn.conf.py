@@ -0,0 +1,19 @@
+# Picked up automatically by gunicorn when started from the project root.
+import os
+import shutil
+
+
+def on_starting(server):
+    # Prometheus multiprocess mode (see monitoring/metrics.py): start every
+    # deployment from an empty sample directory.
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
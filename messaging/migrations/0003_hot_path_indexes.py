@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_alter_message_id_alter_messagethread_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['thread', 'sender'], name='message_unread_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.utils import timezone
 
@@ -17,5 +18,11 @@ class Message(models.Model):
     sent_at = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Unread counts per thread, excluding the reader's own messages.
+            models.Index(fields=['thread', 'sender'], condition=Q(is_read=False), name='message_unread_idx'),
+        ]
+
     def __str__(self):
         return f"From {self.sender.username} at {self.sent_at}: {self.body[:30]}"
@@ -1,18 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Q
 from .models import MessageThread, Message
 from .forms import MessageForm
 from accounts.models_notification import Notification
 
 @login_required
 def inbox(request):
-    threads = request.user.message_threads.order_by('-updated_at')
-    thread_unread_counts = {}
-    for thread in threads:
-        thread_unread_counts[thread.id] = thread.messages.filter(is_read=False).exclude(sender=request.user).count()
+    unread = Q(messages__is_read=False) & ~Q(messages__sender=request.user)
+    threads = (
+        request.user.message_threads.order_by('-updated_at')
+        .annotate(unread_count=Count('messages', filter=unread))
+        .prefetch_related('participants')
+    )
     return render(request, 'messaging/inbox.html', {
         'threads': threads,
-        'thread_unread_counts': thread_unread_counts,
     })
 
 @login_required
@@ -0,0 +1,52 @@
+"""
+Prometheus metrics.
+
+The metrics are module-level prometheus_client objects, labelled by resolved
+URL name (``storefront_home``, ``product_list``, ...) rather than path so the
+number of series stays bounded. Gunicorn runs several worker processes: set
+PROMETHEUS_MULTIPROC_DIR to a directory shared by the workers (and by Celery
+workers on the same host) before they start. Every process then writes its
+samples to files there and the /metrics view merges them; gunicorn.conf.py
+empties the directory when the master starts. Without the variable each
+process only reports its own samples, which is fine for a single runserver.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency by URL name.', ['view', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSES = Counter('http_responses', 'Responses by URL name and status code.', ['view', 'method', 'status'])
+REQUEST_QUERIES = Histogram(
+    'http_request_queries', 'SQL queries per request by URL name.', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000),
+)
+CACHE_LOOKUPS = Counter('cache_lookups', 'Application cache lookups by cache and result.', ['cache', 'result'])
+TASK_DURATION = Histogram(
+    'celery_task_duration_seconds', 'Celery task run time by task and final state.', ['task', 'state'],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900),
+)
+
+
+def record_cache(cache, hits, misses):
+    """Count *hits* and *misses* of the named application cache (cache_lookups_total)."""
+    if hits:
+        CACHE_LOOKUPS.labels(cache, 'hit').inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, 'miss').inc(misses)
+
+
+def exposition():
+    """``(body, content type)`` of every metric, merged across processes when configured."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,170 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, slow_queries, stats
+from .sql import QueryRecorder
+
+logger = logging.getLogger('monitoring.sql')
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+LOGGED_FINGERPRINTS = 5
+LOGGED_SQL_CHARS = 500
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+def url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.url_name or match.view_name
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Feed the Prometheus request metrics in monitoring.metrics: latency,
+    responses by status and query count, labelled by URL name. Disable with
+    METRICS_ENABLED=false.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        name = url_name(request)
+        method = request.method if request.method in METHODS else 'other'
+        metrics.REQUEST_DURATION.labels(name, method).observe(duration)
+        metrics.RESPONSES.labels(name, method, str(response.status_code)).inc()
+        metrics.REQUEST_QUERIES.labels(name).observe(queries.count)
+        return response
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Record the queries of a random sample of requests (opt-in with
+    SQL_INSTRUMENTATION). Sampled requests feed the per-view aggregates in
+    monitoring.stats; those that are slow or repeat a statement more than
+    SQL_N_PLUS_ONE_THRESHOLD times are also logged as one JSON line. Requests
+    outside the sample run untouched.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        self.threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+        self.slow_seconds = settings.SLOW_REQUEST_MS / 1000
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        view = view_name(request)
+        repeated = recorder.repeated(self.threshold)
+        slow = duration >= self.slow_seconds
+        stats.record(view, recorder.count, recorder.seconds, duration, slow, repeated)
+        if slow or repeated:
+            logger.warning(json.dumps(self.summary(request, response, view, duration, recorder, repeated)))
+        return response
+
+    def summary(self, request, response, view, duration, recorder, repeated):
+        by_time = sorted(recorder.fingerprints().items(), key=lambda item: -item[1][1])
+        return {
+            'event': 'slow_request' if duration >= self.slow_seconds else 'n_plus_one',
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'queries': recorder.count,
+            'sql_ms': round(recorder.seconds * 1000, 1),
+            'n_plus_one': [
+                {'sql': shape[:LOGGED_SQL_CHARS], 'count': count, 'ms': round(seconds * 1000, 1)}
+                for shape, count, seconds in repeated[:LOGGED_FINGERPRINTS]
+            ],
+            'top_sql': [
+                {'sql': shape[:LOGGED_SQL_CHARS], 'count': count, 'ms': round(seconds * 1000, 1)}
+                for shape, (count, seconds) in by_time[:LOGGED_FINGERPRINTS]
+            ],
+        }
+
+
+class _SlowQueryWatcher:
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+        self.capturing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.capturing:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed = time.perf_counter() - started
+        if elapsed >= self.threshold:
+            self.capturing = True
+            try:
+                slow_queries.record(context['connection'], sql, None if many else params, elapsed,
+                                    view_name(self.request))
+            finally:
+                self.capturing = False
+        return result
+
+
+class SlowQueryMiddleware:
+    """
+    Capture statements slower than SLOW_QUERY_MS in monitoring.slow_queries
+    (0 turns the log off).
+    """
+
+    def __init__(self, get_response):
+        threshold = getattr(settings, 'SLOW_QUERY_MS', 0)
+        if not threshold:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = threshold / 1000
+
+    def __call__(self, request):
+        watcher = _SlowQueryWatcher(request, self.threshold)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(watcher))
+            return self.get_response(request)
@@ -0,0 +1,19 @@
+import time
+
+from celery.signals import task_postrun, task_prerun
+
+from .metrics import TASK_DURATION
+
+_started = {}  # task id -> perf_counter at start, per worker process
+
+
+@task_prerun.connect
+def _task_started(task_id=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
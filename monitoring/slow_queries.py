@@ -0,0 +1,163 @@
+"""
+Slow-query log.
+
+SlowQueryMiddleware times every statement; one that takes SLOW_QUERY_MS or
+longer is captured here with its parameters, the view that ran it, the
+innermost project frame that issued it and its plan. Entries are grouped by
+fingerprint (monitoring/sql.py) in the shared cache, so all workers feed one
+log, and at most MAX_ENTRIES fingerprints are kept: a new one evicts the
+fingerprint with the least total time.
+
+The plan is captured with EXPLAIN the first time a fingerprint is seen. For
+SELECTs, a SLOW_QUERY_ANALYZE_SAMPLE_RATE fraction of later captures run
+EXPLAIN ANALYZE instead (PostgreSQL), which executes the query once more and
+shows actual row counts and timings.
+
+Statements on SENSITIVE_TABLES (sessions, users and auth tables) are logged
+without their parameters and never explained: both would copy session keys,
+emails or password hashes into the shared cache.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import random
+import traceback
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .sql import fingerprint
+
+logger = logging.getLogger('monitoring.sql')
+
+MAX_ENTRIES = 200
+MAX_PARAMS_CHARS = 500
+# Substrings of table names; the user model's table is always included.
+SENSITIVE_TABLES = ('django_session', 'auth_', 'authtoken_', 'otp_')
+REDACTED = '<redacted>'
+
+_TIMEOUT = 7 * 24 * 3600
+_INDEX_KEY = 'slowq:index'
+_COUNT_KEY = 'slowq:%s:count'
+_TOTAL_KEY = 'slowq:%s:total_us'
+_DETAIL_KEY = 'slowq:%s:detail'
+
+_PROJECT_DIR = str(settings.BASE_DIR) + os.sep
+_SKIP_DIRS = (os.sep + 'site-packages' + os.sep, os.sep + 'monitoring' + os.sep)
+
+
+def _id(shape):
+    return hashlib.md5(shape.encode()).hexdigest()[:16]
+
+
+def origin():
+    """``path:line in function`` of the innermost project frame on the stack."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_PROJECT_DIR) and not any(part in frame.filename for part in _SKIP_DIRS):
+            return f'{os.path.relpath(frame.filename, _PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def explain(connection, sql, params, analyze=False):
+    """The plan of *sql* as text, or ``''`` when the backend cannot explain it."""
+    options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+    try:
+        prefix = connection.ops.explain_query_prefix(**options)
+        # A savepoint keeps a failing EXPLAIN from breaking the caller's transaction.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except Exception as exc:  # the plan is diagnostics only
+        return f'EXPLAIN failed: {exc}'
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def _is_select(sql):
+    return sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+
+def is_sensitive(sql):
+    from django.contrib.auth import get_user_model
+
+    lowered = sql.lower()
+    return any(table in lowered for table in (*SENSITIVE_TABLES, get_user_model()._meta.db_table))
+
+
+def record(connection, sql, params, seconds, view):
+    """Add one slow execution of *sql* to the log, explaining it when needed."""
+    shape = fingerprint(sql)
+    qid = _id(shape)
+    detail = cache.get(_DETAIL_KEY % qid)
+    sensitive = is_sensitive(sql)
+    analyze = (not sensitive and _is_select(sql) and
+               random.random() < getattr(settings, 'SLOW_QUERY_ANALYZE_SAMPLE_RATE', 0))
+    plan = None
+    if params is not None and not sensitive and (analyze or detail is None or not detail.get('plan')):
+        plan = explain(connection, sql, params, analyze=analyze)
+
+    if detail is None:
+        _add_to_index(qid)
+        detail = {'fingerprint': shape, 'plan': '', 'analyzed': False, 'max_ms': 0}
+    ms = round(seconds * 1000, 1)
+    detail.update(
+        sql=sql,
+        params=REDACTED if sensitive else repr(params)[:MAX_PARAMS_CHARS],
+        view=view,
+        origin=origin(),
+        last_ms=ms,
+        max_ms=max(ms, detail['max_ms']),
+        last_seen=datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        vendor=connection.vendor,
+    )
+    if plan is not None:
+        detail.update(plan=plan, analyzed=analyze)
+    cache.set(_DETAIL_KEY % qid, detail, _TIMEOUT)
+    for key, amount in ((_COUNT_KEY % qid, 1), (_TOTAL_KEY % qid, int(seconds * 1_000_000))):
+        if not cache.add(key, amount, _TIMEOUT):
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                cache.add(key, amount, _TIMEOUT)
+    logger.warning(json.dumps({
+        'event': 'slow_query', 'ms': ms, 'view': view, 'origin': detail['origin'], 'sql': shape[:500],
+    }))
+
+
+def _add_to_index(qid):
+    index = cache.get(_INDEX_KEY) or []
+    if qid in index:
+        return
+    index.append(qid)
+    if len(index) > MAX_ENTRIES:
+        totals = cache.get_many([_TOTAL_KEY % other for other in index[:-1]])
+        evicted = min(index[:-1], key=lambda other: totals.get(_TOTAL_KEY % other, 0))
+        index.remove(evicted)
+        cache.delete_many([_COUNT_KEY % evicted, _TOTAL_KEY % evicted, _DETAIL_KEY % evicted])
+    cache.set(_INDEX_KEY, index, _TIMEOUT)
+
+
+def entries(order='total'):
+    """Every logged fingerprint, by total time (``order='total'``) or frequency (``'count'``)."""
+    index = cache.get(_INDEX_KEY) or []
+    keys = [key % qid for qid in index for key in (_COUNT_KEY, _TOTAL_KEY, _DETAIL_KEY)]
+    values = cache.get_many(keys)
+    rows = []
+    for qid in index:
+        detail = values.get(_DETAIL_KEY % qid)
+        if detail is None:
+            continue
+        count = values.get(_COUNT_KEY % qid, 0)
+        total_ms = values.get(_TOTAL_KEY % qid, 0) / 1000
+        rows.append({**detail, 'id': qid, 'count': count, 'total_ms': total_ms,
+                     'avg_ms': total_ms / count if count else 0})
+    sort_key = 'count' if order == 'count' else 'total_ms'
+    return sorted(rows, key=lambda row: -row[sort_key])
+
+
+def clear():
+    index = cache.get(_INDEX_KEY) or []
+    keys = [key % qid for qid in index for key in (_COUNT_KEY, _TOTAL_KEY, _DETAIL_KEY)]
+    cache.delete_many(keys + [_INDEX_KEY])
@@ -0,0 +1,57 @@
+"""
+Per-request SQL recording.
+
+QueryRecorder is an execute_wrapper: it times every statement a request runs
+and groups them by fingerprint, the SQL with its literals and IN lists
+replaced by placeholders, so ``WHERE id = 1`` and ``WHERE id = 2`` count as
+the same statement. A fingerprint that runs more than the N+1 threshold in
+one request is almost always a loop issuing one query per row.
+"""
+import re
+import time
+from collections import defaultdict
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:\s*(?:\?|%s)\s*,)*\s*(?:\?|%s)\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """*sql* with its literals, IN lists and whitespace normalized."""
+    sql = _LITERALS.sub('?', sql)
+    sql = _IN_LISTS.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._shapes = defaultdict(lambda: [0, 0.0])  # raw sql -> [count, seconds]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            entry = self._shapes[sql]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def fingerprints(self):
+        """``{fingerprint: (count, seconds)}``, normalized once per distinct statement."""
+        merged = defaultdict(lambda: [0, 0.0])
+        for sql, (count, seconds) in self._shapes.items():
+            entry = merged[fingerprint(sql)]
+            entry[0] += count
+            entry[1] += seconds
+        return {shape: tuple(entry) for shape, entry in merged.items()}
+
+    def repeated(self, threshold):
+        """Fingerprints run more than *threshold* times, most frequent first."""
+        found = [(shape, count, seconds) for shape, (count, seconds) in self.fingerprints().items()
+                 if count > threshold]
+        return sorted(found, key=lambda item: -item[1])
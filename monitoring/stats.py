@@ -0,0 +1,91 @@
+"""
+Per-view SQL aggregates shared by every worker.
+
+Sampled requests add their totals to counters in the shared cache, keyed by
+UTC day and view name, so the owner page sees all workers and old days
+expire on their own. Counters are plain cache increments; the per-view list
+of N+1 fingerprints is a read-modify-write and may lose an update under
+contention, which is acceptable for sampled diagnostics.
+"""
+import datetime
+
+from django.core.cache import cache
+
+METRICS = ('requests', 'queries', 'sql_us', 'duration_us', 'slow', 'n_plus_one')
+KEEP_DAYS = 7
+MAX_PATTERNS = 5  # N+1 fingerprints kept per view and day
+
+_TIMEOUT = KEEP_DAYS * 24 * 3600
+_VIEWS_KEY = 'sqlstats:%s:views'  # day
+_METRIC_KEY = 'sqlstats:%s:%s:%s'  # day, view, metric
+_PATTERNS_KEY = 'sqlstats:%s:%s:patterns'  # day, view
+
+
+def today():
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+
+def _incr(key, amount):
+    if cache.add(key, amount, _TIMEOUT):
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.add(key, amount, _TIMEOUT)
+
+
+def record(view, queries, sql_seconds, duration_seconds, slow, repeated):
+    """Add one sampled request of *view*; *repeated* is QueryRecorder.repeated()."""
+    day = today()
+    views = cache.get(_VIEWS_KEY % day) or set()
+    if view not in views:
+        cache.set(_VIEWS_KEY % day, views | {view}, _TIMEOUT)
+    values = {
+        'requests': 1,
+        'queries': queries,
+        'sql_us': int(sql_seconds * 1_000_000),
+        'duration_us': int(duration_seconds * 1_000_000),
+        'slow': int(slow),
+        'n_plus_one': int(bool(repeated)),
+    }
+    for metric, amount in values.items():
+        if amount:
+            _incr(_METRIC_KEY % (day, view, metric), amount)
+    if repeated:
+        key = _PATTERNS_KEY % (day, view)
+        patterns = cache.get(key) or {}
+        for shape, count, _ in repeated:
+            patterns[shape] = max(count, patterns.get(shape, 0))
+        top = sorted(patterns.items(), key=lambda item: -item[1])[:MAX_PATTERNS]
+        cache.set(key, dict(top), _TIMEOUT)
+
+
+def summary(day=None):
+    """Rows for every view recorded on *day* (default today), most SQL time first."""
+    day = day or today()
+    views = sorted(cache.get(_VIEWS_KEY % day) or ())
+    keys = [_METRIC_KEY % (day, view, metric) for view in views for metric in METRICS]
+    keys += [_PATTERNS_KEY % (day, view) for view in views]
+    values = cache.get_many(keys)
+    rows = []
+    for view in views:
+        row = {metric: values.get(_METRIC_KEY % (day, view, metric), 0) for metric in METRICS}
+        requests = row['requests'] or 1
+        row.update(
+            view=view,
+            sql_ms=row['sql_us'] / 1000,
+            avg_queries=row['queries'] / requests,
+            avg_sql_ms=row['sql_us'] / 1000 / requests,
+            avg_ms=row['duration_us'] / 1000 / requests,
+            patterns=sorted((values.get(_PATTERNS_KEY % (day, view)) or {}).items(), key=lambda item: -item[1]),
+        )
+        rows.append(row)
+    return sorted(rows, key=lambda row: -row['sql_us'])
+
+
+def clear(day=None):
+    day = day or today()
+    views = cache.get(_VIEWS_KEY % day) or ()
+    keys = [_METRIC_KEY % (day, view, metric) for view in views for metric in METRICS]
+    keys += [_PATTERNS_KEY % (day, view) for view in views]
+    cache.delete_many(keys + [_VIEWS_KEY % day])
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch, reverse
+
+from orders.models import LineItem, Order
+from products.models import Product
+from sellers.models import Seller
+from utils import process_cache
+from . import slow_queries, stats
+from .middleware import SQLInstrumentationMiddleware, _SlowQueryWatcher
+from .sql import fingerprint
+
+
+@override_settings(SQL_INSTRUMENTATION=True, SQL_INSTRUMENTATION_SAMPLE_RATE=1.0,
+                   SQL_N_PLUS_ONE_THRESHOLD=3, SLOW_REQUEST_MS=60_000)
+class SQLInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='owner', password='pw', is_owner=True)
+        self.seller_user = User.objects.create_user(username='seller', password='pw', is_seller=True)
+        seller = Seller.objects.create(user=self.seller_user)
+        order = Order.objects.create(consumer=self.owner, status='Paid')
+        for i in range(5):
+            product = Product.objects.create(name=f'Prod{i}', description='desc', seller=seller, price=10)
+            LineItem.for_product(order, product, 1).save()
+
+    def test_fingerprint_ignores_literals_and_in_lists(self):
+        self.assertEqual(fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a''b'"),
+                         fingerprint("SELECT  *  FROM t WHERE id = 22 AND name = 'c'"))
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+                         'SELECT * FROM t WHERE id IN (...)')
+
+    def test_flags_n_plus_one_and_aggregates_by_view(self):
+        def view(request):
+            request.resolver_match = ResolverMatch(view, (), {}, url_name='n_plus_one', namespaces=['demo'])
+            for product in Product.objects.all():
+                LineItem.objects.filter(product=product).exists()
+            return HttpResponse()
+
+        with self.assertLogs('monitoring.sql', level='WARNING') as logs:
+            SQLInstrumentationMiddleware(view)(RequestFactory().get('/demo/'))
+        self.assertIn('"event": "n_plus_one"', logs.output[0])
+        self.assertIn('"view": "demo:n_plus_one"', logs.output[0])
+
+        row = next(row for row in stats.summary() if row['view'] == 'demo:n_plus_one')
+        self.assertEqual(row['requests'], 1)
+        self.assertEqual(row['n_plus_one'], 1)
+        self.assertGreater(row['queries'], 5)
+        self.assertTrue(row['patterns'])
+
+    @override_settings(SQL_N_PLUS_ONE_THRESHOLD=100)
+    def test_stats_page_is_owner_only(self):
+        url = reverse('monitoring:sql_stats')
+        self.client.force_login(self.seller_user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.owner)
+        self.client.get(reverse('storefront:storefront_home'))
+        response = self.client.get(url)
+        self.assertContains(response, 'storefront:storefront_home')
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        self.owner = get_user_model().objects.create_user(username='owner', password='pw', is_owner=True)
+
+    def test_metrics_are_labelled_by_url_name(self):
+        self.client.get(reverse('storefront:storefront_home'))
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{', body)
+        self.assertIn('view="storefront_home"', body)
+        self.assertIn('http_request_queries_bucket{', body)
+        self.assertIn('cache_lookups_total{cache="rails"', body)
+
+    def test_metrics_require_owner_or_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = get_user_model().objects.create_user(username='owner', password='pw', is_owner=True)
+
+    def test_captures_plan_and_ranks_by_total_time(self):
+        watcher = _SlowQueryWatcher(RequestFactory().get('/'), threshold=0)
+        with self.assertLogs('monitoring.sql', level='WARNING'), connection.execute_wrapper(watcher):
+            for price in (5, 6, 7):
+                list(Product.objects.filter(price__gte=price))
+            get_user_model().objects.filter(pk=self.owner.pk).exists()
+
+        entries = slow_queries.entries()
+        self.assertEqual(len(entries), 2)
+        products = next(entry for entry in entries if 'products_product' in entry['fingerprint'])
+        self.assertEqual(products['count'], 3)
+        self.assertIn('products_product', products['plan'])
+        self.assertEqual(slow_queries.entries('count')[0]['id'], products['id'])
+
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('monitoring:slow_queries'))
+        self.assertContains(response, 'products_product')
+
+    def test_sensitive_tables_are_logged_without_params_or_plan(self):
+        watcher = _SlowQueryWatcher(RequestFactory().get('/'), threshold=0)
+        with self.assertLogs('monitoring.sql', level='WARNING'), connection.execute_wrapper(watcher):
+            get_user_model().objects.filter(email='owner@example.com').exists()
+            self.client.force_login(self.owner)
+
+        entries = [entry for entry in slow_queries.entries() if slow_queries.is_sensitive(entry['sql'])]
+        self.assertTrue(any('django_session' in entry['fingerprint'] for entry in entries))
+        self.assertTrue(any('accounts_user' in entry['fingerprint'] for entry in entries))
+        for entry in entries:
+            self.assertEqual(entry['params'], slow_queries.REDACTED)
+            self.assertEqual(entry['plan'], '')
+            self.assertNotIn('owner@example.com', str(entry))
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('sql/', views.sql_stats, name='sql_stats'),
+    path('slow-queries/', views.slow_query_log, name='slow_queries'),
+]
@@ -0,0 +1,51 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseForbidden
+from django.shortcuts import redirect, render
+
+from accounts.permissions import owner_required
+from . import metrics, slow_queries, stats
+
+
+@login_required
+@owner_required
+def sql_stats(request):
+    day = request.GET.get('day') or stats.today()
+    if request.method == 'POST':
+        stats.clear(day)
+        return redirect('monitoring:sql_stats')
+    return render(request, 'monitoring/sql_stats.html', {
+        'rows': stats.summary(day),
+        'day': day,
+        'enabled': getattr(settings, 'SQL_INSTRUMENTATION', False),
+        'sample_rate': getattr(settings, 'SQL_INSTRUMENTATION_SAMPLE_RATE', 0),
+        'threshold': getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', 0),
+    })
+
+
+@login_required
+@owner_required
+def slow_query_log(request):
+    if request.method == 'POST':
+        slow_queries.clear()
+        return redirect('monitoring:slow_queries')
+    order = 'count' if request.GET.get('order') == 'count' else 'total'
+    return render(request, 'monitoring/slow_queries.html', {
+        'entries': slow_queries.entries(order),
+        'order': order,
+        'threshold': getattr(settings, 'SLOW_QUERY_MS', 0),
+        'max_entries': slow_queries.MAX_ENTRIES,
+    })
+
+
+def metrics_view(request):
+    """Prometheus text format, for owners or scrapers sending ``Authorization: Bearer <METRICS_TOKEN>``."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scraper = bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+    if not scraper and not (request.user.is_authenticated and getattr(request.user, 'is_owner', False)):
+        return HttpResponseForbidden('You must be an owner/admin to access this page.')
+    body, content_type = metrics.exposition()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,91 @@
+"""
+Placing an order from a session cart.
+
+place_order() does the whole checkout in one transaction: it locks the cart's
+product rows in primary-key order (so two checkouts sharing products cannot
+deadlock), takes physical stock with conditional ``inventory = inventory - n
+WHERE inventory >= n`` updates, and inserts every line with its price,
+seller and title snapshot (LineItem.for_product) in one bulk_create.
+A product that runs out raises OutOfStock and rolls everything back, so a
+cart never half-checks-out and stock never goes negative, however many
+buyers race for the last unit. Serialization failures, deadlocks and SQLite
+lock timeouts are retried a few times with jittered backoff.
+"""
+import random
+import time
+
+from django.db import OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products import counters
+from products.models import Product
+from products.versioning import catalog_changed
+from .models import LineItem, Order
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.05  # seconds; doubled on every attempt
+
+_RETRY_PGCODES = {'40001', '40P01'}  # serialization_failure, deadlock_detected
+
+
+class OutOfStock(Exception):
+    def __init__(self, product, available):
+        super().__init__(f'{product.name}: only {available} left')
+        self.product = product
+        self.available = available
+
+
+def _retryable(exc):
+    pgcode = getattr(exc.__cause__, 'pgcode', None)
+    return pgcode in _RETRY_PGCODES or 'locked' in str(exc)
+
+
+def _place(user, quantities):
+    products = list(Product.objects.select_for_update().filter(pk__in=quantities).order_by('pk'))
+    if not products:
+        raise ValueError('The cart has no purchasable products.')
+    now = timezone.now()
+    for product in products:
+        quantity = quantities[product.pk]
+        if not product.is_physical or product.inventory is None:
+            continue
+        # Stock shows on the product page and card, so bump the version too.
+        taken = Product.objects.filter(pk=product.pk, inventory__gte=quantity).update(
+            inventory=F('inventory') - quantity, version=F('version') + 1, updated_at=now,
+        )
+        if not taken:
+            available = Product.objects.filter(pk=product.pk).values_list('inventory', flat=True).first()
+            raise OutOfStock(product, available or 0)
+    if any(product.is_physical and product.inventory is not None for product in products):
+        # The conditional stock updates skip the model signals.
+        catalog_changed()
+    order = Order.objects.create(consumer=user, status='Pending')
+    LineItem.objects.bulk_create(
+        LineItem.for_product(order, product, quantities[product.pk]) for product in products
+    )
+    return order
+
+
+def place_order(user, cart):
+    """
+    Create the order for *cart* (``{product id: quantity}`` as stored in the
+    session) and return it. Raises OutOfStock when a physical product has too
+    little inventory left, and ValueError for an empty cart.
+    """
+    quantities = {int(pk): int(quantity) for pk, quantity in cart.items() if int(quantity) > 0}
+    if not quantities:
+        raise ValueError('The cart is empty.')
+    # Retrying only makes sense when this is the outermost transaction.
+    attempts = 1 if transaction.get_connection().in_atomic_block else MAX_ATTEMPTS
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                order = _place(user, quantities)
+            break
+        except OperationalError as exc:
+            if attempt == attempts - 1 or not _retryable(exc):
+                raise
+            time.sleep(RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+    transaction.on_commit(lambda: counters.record_purchase(order))
+    return order
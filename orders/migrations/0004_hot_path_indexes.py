@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_alter_download_id_alter_lineitem_id_alter_order_id'),
+        ('products', '0026_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lineitem',
+            index=models.Index(fields=['product', 'order'], name='lineitem_product_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['consumer', '-created_at'], name='order_consumer_created_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_hot_path_indexes'),
+        ('products', '0026_hot_path_indexes'),
+        ('sellers', '0004_sellerrating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lineitem',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='lineitem',
+            name='is_digital',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='lineitem',
+            name='is_physical',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='lineitem',
+            name='product_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lineitem',
+            name='seller',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='sellers.seller'),
+        ),
+        migrations.AddField(
+            model_name='lineitem',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='lineitem',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.product'),
+        ),
+        migrations.AddIndex(
+            model_name='lineitem',
+            index=models.Index(fields=['seller', 'created_at'], name='lineitem_seller_created_idx'),
+        ),
+    ]
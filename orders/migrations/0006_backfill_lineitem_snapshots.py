@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 20000
+
+
+def backfill_snapshots(apps, schema_editor):
+    # Historic prices are not recorded anywhere, so existing lines get the
+    # product's current price; every new line snapshots its own.
+    LineItem = apps.get_model('orders', 'LineItem')
+    Order = apps.get_model('orders', 'Order')
+    Product = apps.get_model('products', 'Product')
+
+    product = Product.objects.filter(pk=OuterRef('product_id'))
+    last = LineItem.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    for start in range(0, last, BATCH_SIZE):
+        LineItem.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(
+            unit_price=Subquery(product.values('price')[:1]),
+            seller_id=Subquery(product.values('seller_id')[:1]),
+            product_name=Subquery(product.values('name')[:1]),
+            is_digital=Subquery(product.values('is_digital')[:1]),
+            is_physical=Subquery(product.values('is_physical')[:1]),
+            created_at=Subquery(Order.objects.filter(pk=OuterRef('order_id')).values('created_at')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_lineitem_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,47 @@
 from django.db import models
+from django.utils import timezone
 
 class Order(models.Model):
     consumer = models.ForeignKey('accounts.User', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50)
 
+    class Meta:
+        indexes = [models.Index(fields=['consumer', '-created_at'], name='order_consumer_created_idx')]
+
 class LineItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
-    product = models.ForeignKey('products.Product', on_delete=models.CASCADE)
+    # Cleared, not cascaded, when the product is deleted: the snapshot below keeps the sale.
+    product = models.ForeignKey('products.Product', on_delete=models.SET_NULL, null=True)
     quantity = models.PositiveIntegerField(default=1)
 
+    # Snapshot of the product at purchase time, so revenue history survives
+    # price changes and deletions and seller analytics need no join.
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    seller = models.ForeignKey('sellers.Seller', on_delete=models.SET_NULL, null=True, blank=True)
+    product_name = models.CharField(max_length=255, blank=True)
+    is_digital = models.BooleanField(default=False)
+    is_physical = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Sales of a product, joined to their order for the date.
+            models.Index(fields=['product', 'order'], name='lineitem_product_order_idx'),
+            models.Index(fields=['seller', 'created_at'], name='lineitem_seller_created_idx'),
+        ]
+
+    @classmethod
+    def for_product(cls, order, product, quantity):
+        """An unsaved line for *product* with its snapshot fields filled in."""
+        return cls(order=order, product=product, quantity=quantity, unit_price=product.price,
+                   seller_id=product.seller_id, product_name=product.name, is_digital=product.is_digital,
+                   is_physical=product.is_physical, created_at=order.created_at)
+
+    @property
+    def subtotal(self):
+        return self.unit_price * self.quantity
+
 class Download(models.Model):
     line_item = models.ForeignKey(LineItem, on_delete=models.CASCADE)
     file = models.FileField(upload_to='product_files/')
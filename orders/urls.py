@@ -5,4 +5,5 @@ from .views import order_history_view
 urlpatterns = [
     path('dashboard/', views.consumer_dashboard, name='consumer_dashboard'),
     path('history/', order_history_view, name='order_history'),
+    path('downloads/<int:download_id>/', views.download_file, name='download_file'),
 ]
@@ -5,17 +5,29 @@ from .models import Order
 @login_required
 def order_history_view(request):
     from reviews.models import Rating
-    orders = Order.objects.filter(consumer=request.user).order_by('-created_at')
-    for order in orders:
-        for item in order.lineitem_set.all():
-            # Check if the user has rated this product (by this seller) in this order
-            item.seller_has_rating = Rating.objects.filter(product=item.product, user=request.user).exists()
+    orders = list(
+        Order.objects.filter(consumer=request.user).order_by('-created_at')
+        .prefetch_related(Prefetch('lineitem_set', queryset=LineItem.objects.select_related('seller__user')))
+    )
+    items = [item for order in orders for item in order.lineitem_set.all()]
+    # Products the user has rated, among the ones on this page (one query)
+    rated = set(
+        Rating.objects.filter(user=request.user, product_id__in={item.product_id for item in items})
+        .values_list('product_id', flat=True)
+    )
+    for item in items:
+        item.seller_has_rating = item.product_id in rated
     return render(request, 'orders/order_history.html', {'orders': orders})
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
+from django.db.models import Prefetch
 from django.contrib.auth.decorators import login_required
 from .models import Order, LineItem, Download
-from products.models import Product
+from products.models import Media, Product
+from products import counters
+from products.recommendations import get_recommendation_ids
+from storefront.rails import card_data
 from .forms import RefundRequestForm
 from accounts.models_notification import Notification
 from accounts.models import User
@@ -23,12 +35,19 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
 
+def _recommendation_cards(user, count=4):
+    ids = get_recommendation_ids(user)
+    products = Product.objects.filter(pk__in=ids, draft=False).prefetch_related(
+        Prefetch('media', queryset=Media.objects.order_by('id')))
+    by_id = {product.pk: product for product in products}
+    return [card_data(by_id[pk]) for pk in ids if pk in by_id][:count]
+
 @login_required
 def consumer_dashboard(request):
     user = request.user
-    orders = Order.objects.filter(consumer=user).order_by('-created_at')
+    orders = Order.objects.filter(consumer=user).order_by('-created_at').prefetch_related('lineitem_set')
     downloads = Download.objects.filter(line_item__order__consumer=user)
-    recommendations = Product.objects.order_by('?')[:4]  # Simple random recs
+    recommendations = _recommendation_cards(user)
     refund_form = None
     refund_requested = False
     # Example: Simulate order placement notification logic (replace with real order creation logic)
@@ -37,12 +56,10 @@ def consumer_dashboard(request):
         order = Order.objects.filter(consumer=user).order_by('-created_at').first()
         if order:
             # Notify all sellers for products in the order
-            for line in LineItem.objects.filter(order=order):
-                product = line.product
-                seller = getattr(product, 'seller', None)
-                seller_user = getattr(seller, 'user', None)
+            for line in LineItem.objects.filter(order=order).select_related('seller__user'):
+                seller_user = getattr(line.seller, 'user', None)
                 order_url = request.build_absolute_uri(reverse('order_history_view'))
-                notif_message = f"You have a new order for your product '{product.name}'."
+                notif_message = f"You have a new order for your product '{line.product_name}'."
                 if seller_user and seller_user != user:
                     # In-app notification
                     if getattr(seller_user, 'notify_orders_inapp', True):
@@ -53,10 +70,10 @@ def consumer_dashboard(request):
                         )
                     # Email notification
                     if getattr(seller_user, 'notify_orders_email', True) and seller_user.email:
-                        subject = f"New order for your product: {product.name}"
+                        subject = f"New order for your product: {line.product_name}"
                         message = (
                             f"Hello {seller_user.username},\n\n"
-                            f"You have received a new order for your product '{product.name}'.\n\n"
+                            f"You have received a new order for your product '{line.product_name}'.\n\n"
                             f"Order ID: {order.id}\n"
                             f"View order: {order_url}\n\n"
                             f"- The 3D Print Marketplace Team"
@@ -93,3 +110,16 @@ def consumer_dashboard(request):
         'refund_form': refund_form,
         'refund_requested': refund_requested,
     })
+
+
+@login_required
+def download_file(request, download_id):
+    download = get_object_or_404(
+        Download.objects.select_related('line_item'),
+        pk=download_id, line_item__order__consumer=request.user,
+    )
+    if not download.file:
+        raise Http404("File not available.")
+    if download.line_item.product_id:
+        counters.record('download_count', download.line_item.product_id)
+    return redirect(download.file.url)
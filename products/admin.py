@@ -1,9 +1,23 @@
 from django.contrib import admin
-from .models import Product
+from .models import Product, Tag, ProductTag
+from . import admin_review  # noqa: F401  (registers ProductReviewAdmin)
+
+
+class ProductTagInline(admin.TabularInline):
+    model = ProductTag
+    extra = 1
+    autocomplete_fields = ('tag',)
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'seller', 'price', 'featured_manual', 'view_count', 'purchase_count')
+    list_display = ('name', 'seller', 'price', 'featured_manual', 'view_count', 'purchase_count', 'rating_avg', 'rating_count')
     list_filter = ('featured_manual', 'category')
     search_fields = ('name', 'description')
     list_editable = ('featured_manual',)
+    readonly_fields = ('rating_avg', 'rating_count', 'rating_sum', 'rating_histogram')
+    inlines = [ProductTagInline]
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
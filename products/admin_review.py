@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models_review import ProductReview
+from .ratings import recompute_ratings
 
 @admin.register(ProductReview)
 class ProductReviewAdmin(admin.ModelAdmin):
@@ -10,10 +11,15 @@ class ProductReviewAdmin(admin.ModelAdmin):
 
     @admin.action(description="Approve selected reviews")
     def approve_reviews(self, request, queryset):
+        product_ids = set(queryset.values_list('product_id', flat=True))
         updated = queryset.update(is_approved=True, is_hidden=False)
+        # update() skips the review signals, so refresh the product aggregates here.
+        recompute_ratings(product_ids)
         self.message_user(request, f"{updated} review(s) approved.")
 
     @admin.action(description="Hide selected reviews")
     def hide_reviews(self, request, queryset):
+        product_ids = set(queryset.values_list('product_id', flat=True))
         updated = queryset.update(is_hidden=True)
+        recompute_ratings(product_ids)
         self.message_user(request, f"{updated} review(s) hidden.")
\ No newline at end of file
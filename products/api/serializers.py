@@ -0,0 +1,64 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from ..models import Product
+
+
+class SparseFieldsMixin:
+    """Drop every field not named in the ``fields`` context entry (from ``?fields=a,b``)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
+    seller = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'url', 'name', 'description', 'price', 'category', 'seller', 'tags', 'images',
+            'is_digital', 'is_physical', 'rating_avg', 'rating_count',
+        ]
+
+    def get_url(self, product):
+        request = self.context.get('request')
+        path = reverse('products:product_detail', args=[product.pk])
+        return request.build_absolute_uri(path) if request else path
+
+    def get_category(self, product):
+        category = product.category
+        if category is None:
+            return None
+        return {'id': category.pk, 'name': category.name, 'path': category.path}
+
+    def get_seller(self, product):
+        return {'id': product.seller_id, 'username': product.seller.user.username}
+
+    def get_tags(self, product):
+        return [tag.name for tag in product.tags.all()]
+
+    def get_images(self, product):
+        return [media.image.url for media in product.media.all() if media.image]
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.Serializer):
+    """Serializes the cached category tree nodes (products/categories.py), not model instances."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    parent_id = serializers.IntegerField(allow_null=True)
+    path = serializers.CharField()
+    depth = serializers.IntegerField()
+    position = serializers.IntegerField()
+    children = serializers.SerializerMethodField()
+
+    def get_children(self, node):
+        return [child['id'] for child in node['children']]
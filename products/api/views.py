@@ -0,0 +1,78 @@
+from django.db.models import Prefetch
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import permissions, viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from ..categories import filter_by_category, get_category_list
+from ..models import Media, Product
+from ..search import search_products
+from ..versioning import api_etag, api_last_modified, catalog_etag, catalog_last_modified
+from .serializers import CategorySerializer, ProductSerializer
+
+# Relations each serializer field needs, so sparse requests skip the rest.
+PRODUCT_SELECT = {'category': ['category'], 'seller': ['seller__user']}
+PRODUCT_PREFETCH = {
+    'tags': ['tags'],
+    'images': [Prefetch('media', queryset=Media.objects.order_by('id'))],
+}
+
+
+class ProductCursorPagination(CursorPagination):
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class SparseFieldsMixin:
+    def requested_fields(self):
+        raw = self.request.query_params.get('fields', '')
+        return [name.strip() for name in raw.split(',') if name.strip()]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields()
+        return context
+
+
+@method_decorator(condition(etag_func=api_etag, last_modified_func=api_last_modified), name='dispatch')
+class ProductViewSet(SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Published products. Filters: ``category`` (includes subcategories),
+    ``seller`` (user id) and ``q``; ``fields=id,name,...`` limits the output.
+    """
+    serializer_class = ProductSerializer
+    pagination_class = ProductCursorPagination
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        fields = set(self.requested_fields() or ProductSerializer.Meta.fields)
+        products = Product.objects.filter(draft=False)
+        for name, related in PRODUCT_SELECT.items():
+            if name in fields:
+                products = products.select_related(*related)
+        for name, related in PRODUCT_PREFETCH.items():
+            if name in fields:
+                products = products.prefetch_related(*related)
+
+        if self.action == 'list':
+            params = self.request.query_params
+            if params.get('category'):
+                products = filter_by_category(products, params['category'])
+            if params.get('seller', '').isdigit():
+                products = products.filter(seller__user_id=params['seller'])
+            if params.get('q'):
+                products = search_products(products, params['q'])
+        return products
+
+
+@method_decorator(condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified), name='dispatch')
+class CategoryViewSet(SparseFieldsMixin, viewsets.ViewSet):
+    """All categories, flattened depth-first in display order (served from the cached tree)."""
+    permission_classes = [permissions.AllowAny]
+
+    def list(self, request):
+        context = {'request': request, 'fields': self.requested_fields()}
+        return Response(CategorySerializer(get_category_list(), many=True, context=context).data)
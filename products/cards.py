@@ -0,0 +1,61 @@
+"""
+Cached product card fragments.
+
+Every listing (product_list, the home page rails and featured sections,
+collections, wishlists) renders the same card, products/includes/product_card.html.
+get_cards() returns the rendered HTML of a whole page of cards with a single
+get_many(), keyed by product id and Product.version, and renders only the
+misses (one query plus the media prefetch). Saving a product, or changing its
+media, bumps the version (see products/signals.py), so stale fragments are
+simply never read again and expire after CARD_TIMEOUT.
+
+Fragments hold nothing viewer-specific. The {% product_card %} tag layers the
+per-user bits (the wishlist heart) on top of the cached markup.
+"""
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from monitoring.metrics import record_cache
+from .models import Media, Product
+
+CARD_TEMPLATE = 'products/includes/product_card.html'
+CARD_TIMEOUT = 24 * 60 * 60
+CARD_KEY = 'card:%d:%d'  # product id, version
+
+
+def _key_parts(item):
+    """``(id, version)`` of a Product or a storefront.rails.card_data() dict."""
+    if isinstance(item, dict):
+        return item['id'], item.get('version')
+    return item.pk, item.version
+
+
+def render_card(product):
+    images = [media for media in product.media.all() if media.image]
+    return mark_safe(render_to_string(CARD_TEMPLATE, {
+        'product': product,
+        'image_url': images[0].image.url if images else '',
+    }))
+
+
+def get_cards(items):
+    """``{product id: card html}`` for Products or card dicts, from one cache round trip."""
+    versions = dict(_key_parts(item) for item in items)
+    keys = {CARD_KEY % (pk, version): pk for pk, version in versions.items() if version is not None}
+    cards = {keys[key]: mark_safe(html) for key, html in cache.get_many(list(keys)).items()}
+
+    missing = [pk for pk in versions if pk not in cards]
+    record_cache('cards', len(cards), len(missing))
+    if missing:
+        products = (
+            Product.objects.filter(pk__in=missing)
+            .select_related('seller__user')
+            .prefetch_related(Prefetch('media', queryset=Media.objects.order_by('id')))
+        )
+        rendered = {product: render_card(product) for product in products}
+        cache.set_many({CARD_KEY % (product.pk, product.version): html for product, html in rendered.items()},
+                       CARD_TIMEOUT)
+        cards.update((product.pk, html) for product, html in rendered.items())
+    return cards
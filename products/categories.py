@@ -0,0 +1,89 @@
+"""
+Cached category tree.
+
+The whole hierarchy is loaded with one query and kept per process (see
+utils/process_cache.py). products/signals.py invalidates it whenever a
+Category is saved or deleted, which covers category_add, category_edit,
+category_delete and category_reorder.
+"""
+from utils import process_cache
+
+from .models import Category
+
+CACHE_KEY = 'products:category_tree'
+
+
+def _build():
+    nodes = {}
+    roots = []
+    categories = Category.objects.order_by('depth', 'position', 'name')
+    for cat in categories:
+        node = {
+            'id': cat.id,
+            'name': cat.name,
+            'position': cat.position,
+            'image': cat.image if cat.image else None,
+            'parent_id': cat.parent_id,
+            'path': cat.path,
+            'depth': cat.depth,
+            'children': [],
+        }
+        nodes[cat.id] = node
+        parent = nodes.get(cat.parent_id)
+        (parent['children'] if parent else roots).append(node)
+    return {'roots': roots, 'nodes': nodes}
+
+
+def _tree():
+    return process_cache.get(CACHE_KEY, _build)
+
+
+def invalidate_category_tree():
+    process_cache.invalidate(CACHE_KEY)
+
+
+def get_category_tree():
+    """Nested ``[{id, name, position, image, depth, children: [...]}, ...]`` ordered by position."""
+    return _tree()['roots']
+
+
+def get_category_node(category_id):
+    try:
+        return _tree()['nodes'].get(int(category_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_category_list():
+    """All category nodes, flattened depth-first in display order."""
+    flat = []
+
+    def walk(nodes):
+        for node in nodes:
+            flat.append(node)
+            walk(node['children'])
+
+    walk(get_category_tree())
+    return flat
+
+
+def get_category_choices():
+    """Flat depth-first list of ``{'id', 'name', 'level'}`` for indented dropdowns."""
+    return [{'id': node['id'], 'name': node['name'], 'level': node['depth']} for node in get_category_list()]
+
+
+def filter_by_category(queryset, category_id, field='category'):
+    """Restrict *queryset* to items in the category or any of its descendants (one indexed prefix match)."""
+    node = get_category_node(category_id)
+    if node is None:
+        return queryset.none()
+    return queryset.filter(**{f'{field}__path__startswith': node['path']})
+
+
+def get_ancestors(category_id):
+    """Root-first list of nodes from the root down to *category_id* (inclusive)."""
+    node = get_category_node(category_id)
+    if node is None:
+        return []
+    nodes = _tree()['nodes']
+    return [nodes[int(pk)] for pk in node['path'].strip('/').split('/') if int(pk) in nodes]
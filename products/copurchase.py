@@ -0,0 +1,92 @@
+"""
+"Customers also bought" neighbors from co-purchases.
+
+rebuild_neighbors() counts, for every pair of products, the orders that
+contain both (one self-join of LineItem grouped by product pair, so only
+pairs that actually co-occur are materialized), scores each pair with cosine
+similarity
+
+    co_purchases(a, b) / sqrt(orders(a) * orders(b))
+
+and stores the TOP_K best neighbors of each product in ProductNeighbor.
+product_detail reads them with one indexed query and falls back to category
+rules for products nobody has bought together yet.
+"""
+import heapq
+import math
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from orders.models import LineItem
+
+from .models import ProductNeighbor
+
+TOP_K = 10
+MIN_CO_PURCHASES = 1
+
+
+def co_purchase_counts(min_co_purchases=MIN_CO_PURCHASES):
+    """Yield ``(product_id, other_product_id, orders containing both)`` for both orderings of each pair."""
+    table = connection.ops.quote_name(LineItem._meta.db_table)
+    sql = f"""
+        SELECT a.product_id, b.product_id, COUNT(DISTINCT a.order_id)
+        FROM {table} a
+        JOIN {table} b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+        GROUP BY a.product_id, b.product_id
+        HAVING COUNT(DISTINCT a.order_id) >= %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [min_co_purchases])
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            yield from rows
+
+
+def compute_neighbors(top_k=TOP_K, min_co_purchases=MIN_CO_PURCHASES):
+    """``{product_id: [(score, co_purchases, neighbor_id), ...]}`` best first."""
+    orders = dict(
+        LineItem.objects.values('product_id').annotate(n=Count('order_id', distinct=True))
+        .order_by().values_list('product_id', 'n')
+    )
+    candidates = {}
+    for product_id, other_id, together in co_purchase_counts(min_co_purchases):
+        score = together / math.sqrt(orders[product_id] * orders[other_id])
+        heap = candidates.setdefault(product_id, [])
+        # Ties go to the lower id so rebuilds are deterministic.
+        entry = (score, together, -other_id)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    return {
+        product_id: [(score, together, -neg_id) for score, together, neg_id in sorted(heap, reverse=True)]
+        for product_id, heap in candidates.items()
+    }
+
+
+def rebuild_neighbors(top_k=TOP_K, min_co_purchases=MIN_CO_PURCHASES):
+    """Replace every ProductNeighbor row; returns the number of products with neighbors."""
+    neighbors = compute_neighbors(top_k, min_co_purchases)
+    rows = [
+        ProductNeighbor(product_id=product_id, neighbor_id=neighbor_id, rank=rank,
+                        score=round(score, 6), co_purchases=together)
+        for product_id, ranked in neighbors.items()
+        for rank, (score, together, neighbor_id) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        ProductNeighbor.objects.all().delete()
+        ProductNeighbor.objects.bulk_create(rows, batch_size=2000)
+    return len(neighbors)
+
+
+def get_neighbors(product, limit=4):
+    """Published co-purchase neighbors of *product*, strongest first (one query)."""
+    rows = (
+        ProductNeighbor.objects.filter(product=product, neighbor__draft=False)
+        .select_related('neighbor')
+        .order_by('rank')[:limit]
+    )
+    return [row.neighbor for row in rows]
@@ -0,0 +1,161 @@
+"""
+Buffered popularity counters (views, purchases, wishlist adds, downloads).
+
+Requests never UPDATE the product row. record() increments a key in the
+shared cache for the current time bucket, and flush_counters() (a Celery beat
+task, see products/tasks.py) later applies every closed bucket with a few
+``UPDATE ... SET count = count + n`` statements, grouping products that share
+the same deltas.
+
+Each applied bucket is recorded as a CounterFlush row in the same transaction
+as the updates, so a flush that crashes or runs twice never counts a bucket
+twice. Buffered increments live in the cache, not in the worker, so restarting
+web workers loses nothing.
+"""
+import hashlib
+import time
+from collections import defaultdict
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CounterFlush, Product
+from .trending import add_activity
+
+COUNTERS = ('view_count', 'purchase_count', 'wishlist_count', 'download_count')
+BUCKET_SECONDS = 60
+# A bucket is flushed once this many newer buckets exist, so requests that
+# started just before the boundary have finished writing to it.
+SETTLE_BUCKETS = 1
+LOOKBACK_BUCKETS = 24 * 60  # how far back the first flush (or one after an outage) looks
+BUFFER_TIMEOUT = LOOKBACK_BUCKETS * BUCKET_SECONDS
+VIEW_DEDUP_SECONDS = 30 * 60
+
+_VALUE_KEY = 'counters:%d:%s:%d'  # bucket, counter, product id
+_SEQ_KEY = 'counters:%d:seq'
+_LOG_KEY = 'counters:%d:log:%d'  # bucket, sequence -> (counter, product id)
+
+
+def current_bucket(now=None):
+    return int((time.time() if now is None else now) // BUCKET_SECONDS)
+
+
+def record(counter, product_id, amount=1):
+    """Buffer *amount* increments of *counter* for *product_id*."""
+    if counter not in COUNTERS:
+        raise ValueError(f"Unknown counter {counter!r}")
+    if amount <= 0:
+        return
+    bucket = current_bucket()
+    key = _VALUE_KEY % (bucket, counter, product_id)
+    if cache.add(key, amount, BUFFER_TIMEOUT):
+        # First increment of this product in the bucket: note the key in the
+        # bucket's log so the flush knows which keys to read.
+        seq_key = _SEQ_KEY % bucket
+        cache.add(seq_key, 0, BUFFER_TIMEOUT)
+        seq = cache.incr(seq_key)
+        cache.set(_LOG_KEY % (bucket, seq), (counter, product_id), BUFFER_TIMEOUT)
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # Expired between add() and incr(); count it in a fresh entry.
+        cache.add(key, amount, BUFFER_TIMEOUT)
+
+
+def _viewer_id(request):
+    if request.session.session_key:
+        return 's:' + request.session.session_key
+    if request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    client = '%s|%s' % (request.META.get('REMOTE_ADDR', ''), request.META.get('HTTP_USER_AGENT', ''))
+    return 'a:' + hashlib.md5(client.encode()).hexdigest()
+
+
+def record_view(request, product_id):
+    """Count a product view, at most once per visitor every VIEW_DEDUP_SECONDS."""
+    key = 'counters:seen:%s:%d' % (_viewer_id(request), product_id)
+    if cache.add(key, 1, VIEW_DEDUP_SECONDS):
+        record('view_count', product_id)
+
+
+def counts_product_views(view):
+    """
+    Decorate a product page view taking ``product_id`` to count its views.
+    Applied outside @condition, so a 304 from a revalidating browser counts too:
+    the conditional answer returns before the view body runs.
+    """
+    @wraps(view)
+    def wrapper(request, product_id, *args, **kwargs):
+        response = view(request, product_id, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            record_view(request, product_id)
+        return response
+    return wrapper
+
+
+def record_purchase(order):
+    """
+    Count the order's line items. Checkout calls this once the order is placed:
+    nothing in the tree marks an order paid (the Stripe webhook is not linked
+    to orders), so a placed order counts even if it is never paid.
+    """
+    for product_id, quantity in order.lineitem_set.values_list('product_id', 'quantity'):
+        record('purchase_count', product_id, quantity)
+
+
+def _read_bucket(bucket):
+    """``{product_id: {counter: amount}}`` buffered in *bucket*, plus the cache keys holding it."""
+    seq = cache.get(_SEQ_KEY % bucket) or 0
+    entries = cache.get_many([_LOG_KEY % (bucket, i) for i in range(1, seq + 1)]).values()
+    value_keys = {_VALUE_KEY % (bucket, counter, pid): (counter, pid) for counter, pid in entries}
+    deltas = defaultdict(dict)
+    for key, amount in cache.get_many(list(value_keys)).items():
+        counter, pid = value_keys[key]
+        deltas[pid][counter] = amount
+    keys = [_SEQ_KEY % bucket, *(_LOG_KEY % (bucket, i) for i in range(1, seq + 1)), *value_keys]
+    return deltas, keys
+
+
+def _apply(bucket, deltas):
+    # One UPDATE per distinct set of deltas; most products in a bucket share one.
+    groups = defaultdict(list)
+    for pid, counts in deltas.items():
+        groups[tuple(sorted(counts.items()))].append(pid)
+    for counts, pids in groups.items():
+        Product.objects.filter(pk__in=sorted(pids)).update(
+            **{counter: F(counter) + amount for counter, amount in counts}
+        )
+    add_activity(bucket * BUCKET_SECONDS // 3600, deltas)
+
+
+def flush_counters(now=None):
+    """Apply every settled bucket to Product; returns the number of products updated."""
+    last = current_bucket(now) - 1 - SETTLE_BUCKETS
+    newest_flushed = CounterFlush.objects.order_by('-bucket').values_list('bucket', flat=True).first()
+    first = last - LOOKBACK_BUCKETS + 1
+    if newest_flushed is not None:
+        first = max(first, newest_flushed + 1)
+
+    seqs = cache.get_many([_SEQ_KEY % bucket for bucket in range(first, last + 1)])
+    updated = 0
+    for bucket in range(first, last + 1):
+        if _SEQ_KEY % bucket not in seqs:
+            continue
+        deltas, keys = _read_bucket(bucket)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    CounterFlush.objects.create(bucket=bucket)
+            except IntegrityError:
+                # Another flush applied this bucket already.
+                pass
+            else:
+                _apply(bucket, deltas)
+                updated += len(deltas)
+        cache.delete_many(keys)
+
+    CounterFlush.objects.filter(bucket__lt=first - LOOKBACK_BUCKETS).delete()
+    return updated
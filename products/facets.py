@@ -0,0 +1,176 @@
+"""
+Facet counts for catalog listings.
+
+For a filtered Product queryset this returns counts per category (rolled up
+the category tree), per seller (top sellers only), per price bucket, per
+digital/physical flag and per rating bucket. Three grouped queries cover all
+of them, and results are cached under a key built from the normalized
+filter parameters.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from monitoring.metrics import record_cache
+from .categories import get_category_node, get_category_tree
+
+FACET_CACHE_TIMEOUT = 120
+TOP_SELLERS = 20
+
+# (label, lower bound inclusive, upper bound exclusive or None)
+PRICE_BUCKETS = [
+    ('Under $10', None, 10),
+    ('$10 - $25', 10, 25),
+    ('$25 - $50', 25, 50),
+    ('$50 - $100', 50, 100),
+    ('$100 & up', 100, None),
+]
+RATING_BUCKETS = [4, 3, 2, 1]  # "N stars & up"
+
+# Query parameters that change the result set; paging and sort do not.
+FILTER_PARAMS = ['q', 'category', 'subcategory', 'price_min', 'price_max', 'min_price', 'max_price',
+                 'tags', 'tag_match', 'seller', 'min_rating', 'type']
+
+
+def filter_key(params, prefix='facets'):
+    """Stable cache key for a QueryDict/dict of filter parameters."""
+    normalized = {}
+    for name in FILTER_PARAMS:
+        value = params.get(name)
+        if value not in (None, ''):
+            normalized[name] = str(value).strip().lower()
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def _price_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def _category_rollup(direct_counts):
+    """Add each category's direct counts to all of its ancestors."""
+    totals = {}
+    for category_id, count in direct_counts.items():
+        node = get_category_node(category_id)
+        if node is None:
+            continue
+        for ancestor_id in node['path'].strip('/').split('/'):
+            totals[int(ancestor_id)] = totals.get(int(ancestor_id), 0) + count
+    return totals
+
+
+def _category_facets(totals):
+    def walk(nodes):
+        out = []
+        for node in nodes:
+            count = totals.get(node['id'], 0)
+            if count:
+                out.append({'id': node['id'], 'name': node['name'], 'image': node['image'],
+                            'count': count, 'children': walk(node['children'])})
+        return out
+    return walk(get_category_tree())
+
+
+def compute_facets(products, top_sellers=TOP_SELLERS):
+    products = products.order_by()
+
+    category_counts = dict(
+        products.values_list('category_id').annotate(n=Count('id')).values_list('category_id', 'n')
+    )
+
+    sellers = (
+        products.values('seller__user_id', 'seller__user__username')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'seller__user__username')[:top_sellers]
+    )
+
+    aggregates = {'total': Count('id'), 'digital': Count('id', filter=Q(is_digital=True)),
+                  'physical': Count('id', filter=Q(is_physical=True))}
+    for i, (_, low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f'price_{i}'] = Count('id', filter=_price_q(low, high))
+    for stars in RATING_BUCKETS:
+        aggregates[f'rating_{stars}'] = Count('id', filter=Q(rating_count__gt=0, rating_avg__gte=stars))
+    summary = products.aggregate(**aggregates)
+
+    return {
+        'total': summary['total'],
+        'categories': _category_facets(_category_rollup({k: v for k, v in category_counts.items() if k})),
+        'sellers': [
+            {'id': row['seller__user_id'], 'name': row['seller__user__username'], 'count': row['count']}
+            for row in sellers
+        ],
+        'price': [
+            {'label': label, 'min': low, 'max': high, 'count': summary[f'price_{i}']}
+            for i, (label, low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'type': {'digital': summary['digital'], 'physical': summary['physical']},
+        'rating': [{'stars': stars, 'count': summary[f'rating_{stars}']} for stars in RATING_BUCKETS],
+    }
+
+
+def get_facets(products, params, timeout=FACET_CACHE_TIMEOUT):
+    """compute_facets() cached by the normalized filter parameters of the request."""
+    key = filter_key(params)
+    facets = cache.get(key)
+    record_cache('facets', int(facets is not None), int(facets is None))
+    if facets is None:
+        facets = compute_facets(products)
+        cache.set(key, facets, timeout)
+    return facets
+
+
+def get_category_type_facets(timeout=FACET_CACHE_TIMEOUT):
+    """
+    Category trees that contain published physical / digital products, from
+    one grouped query (replaces two Category ... distinct() joins).
+    """
+    def compute():
+        from .models import Product
+
+        rows = (
+            Product.objects.filter(draft=False, category__isnull=False)
+            .values('category_id')
+            .annotate(physical=Count('id', filter=Q(is_physical=True)),
+                      digital=Count('id', filter=Q(is_digital=True)))
+            .order_by()
+        )
+        physical, digital = {}, {}
+        for row in rows:
+            if row['physical']:
+                physical[row['category_id']] = row['physical']
+            if row['digital']:
+                digital[row['category_id']] = row['digital']
+        return {
+            'material': _category_facets(_category_rollup(physical)),
+            'digital': _category_facets(_category_rollup(digital)),
+        }
+    return cache.get_or_set('facets:category_types', compute, timeout)
+
+
+def add_facet_urls(facets, params):
+    """Attach drill-down links (keeping the other filters) to price and type facets."""
+    def url(**changes):
+        query = params.copy()
+        for key in ('page', 'cursor', *changes):
+            query.pop(key, None)
+        for key, value in changes.items():
+            if value is not None:
+                query[key] = value
+        return '?' + query.urlencode()
+
+    for bucket in facets['price']:
+        # price_max is inclusive in the listing filters, bucket bounds are not
+        high = bucket['max'] - 0.01 if bucket['max'] is not None else None
+        bucket['url'] = url(price_min=bucket['min'], price_max=high)
+    facets['type_links'] = [
+        {'value': value, 'label': label, 'count': facets['type'][value], 'url': url(type=value)}
+        for value, label in (('physical', 'Physical'), ('digital', 'Digital'))
+    ]
+    return facets
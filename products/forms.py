@@ -5,7 +5,8 @@ from django.core.exceptions import ValidationError
 import os
 from .models import Product, ProductVariant, Media, Category
 from .forms_mixins import VirusScanMixin
-from moderation.models import SecuritySetting
+from .tags import parse_tags, set_product_tags
+from config.site_config import get_security_config
 
 # Product Variant Form
 class ProductVariantForm(forms.ModelForm):
@@ -29,6 +30,12 @@ class CategoryForm(forms.ModelForm):
         model = Category
         fields = ['name', 'parent', 'image']
 
+    def clean_parent(self):
+        parent = self.cleaned_data.get('parent')
+        if parent and self.instance.pk and parent.path.startswith(self.instance.path):
+            raise ValidationError('A category cannot be moved under itself or one of its subcategories.')
+        return parent
+
 class ProductForm(forms.ModelForm):
     is_digital = forms.BooleanField(required=False, label="Digital Download (3D File)")
     is_physical = forms.BooleanField(required=False, label="Physical Object")
@@ -42,7 +49,19 @@ class ProductForm(forms.ModelForm):
     tags = forms.CharField(required=False, max_length=255, label="Tags", help_text="Comma-separated tags for search and filtering.")
     class Meta:
         model = Product
-        fields = ['name', 'description', 'price', 'category', 'license', 'draft', 'inventory', 'meta_title', 'meta_description', 'tags']
+        fields = ['name', 'description', 'price', 'category', 'license', 'draft', 'inventory', 'meta_title', 'meta_description']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault('tags', ', '.join(tag.name for tag in self.instance.tags.all()))
+
+    def clean_tags(self):
+        return parse_tags(self.cleaned_data.get('tags', ''))
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        set_product_tags(self.instance, self.cleaned_data.get('tags', []))
 
     def clean_inventory(self):
         inventory = self.cleaned_data.get('inventory')
@@ -72,11 +91,9 @@ class MediaForm(VirusScanMixin, forms.ModelForm):
         file_type = cleaned_data.get('file_type')
         allowed_exts = dict(Media.FILE_TYPE_CHOICES).keys()
         # Fetch security settings from DB (admin editable)
-        sec = SecuritySetting.objects.first()
-        max_file_size_mb = sec.max_file_size_mb if sec else 20
-        allowed_mime_types = sec.get_allowed_mime_types() if sec else [
-            'application/sla', 'application/vnd.ms-pki.stl',
-            'application/octet-stream', 'image/jpeg', 'image/png']
+        sec = get_security_config()
+        max_file_size_mb = sec.max_file_size_mb
+        allowed_mime_types = sec.allowed_mime_types
         if file:
             ext = os.path.splitext(file.name)[1][1:].lower()
             if ext not in allowed_exts:
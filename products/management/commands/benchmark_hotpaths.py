@@ -0,0 +1,206 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Category, Product
+from sellers.models import Seller
+
+REGRESSION_METRICS = ('p95_ms', 'queries', 'peak_kib')
+
+
+class _QueryCounter:
+    # An execute_wrapper rather than connection.queries: request_started resets
+    # that log, and it only fills when DEBUG is on.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50_ms': cuts[49], 'p95_ms': cuts[94], 'p99_ms': cuts[98]}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the hot views through the test client against the current database (seed it with '
+        'seed_marketplace first). Reports p50/p95/p99 latency, query count and peak memory per scenario, '
+        'writes the results as a JSON baseline and, with --compare, fails on regressions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests first (fills caches).')
+        parser.add_argument('--scenario', action='append', default=[],
+                            help='Only run scenarios whose name contains this (repeatable).')
+        parser.add_argument('--skip', action='append', default=[],
+                            help='Skip scenarios whose name contains this (repeatable).')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Baseline JSON to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed relative increase of p95, queries and peak memory (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 2:
+            raise CommandError('--iterations must be at least 2 to compute percentiles.')
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        setup_test_environment()  # test client host and locmem email; nothing touches the schema
+        try:
+            scenarios = self._scenarios()
+            if options['scenario']:
+                scenarios = [s for s in scenarios if any(part in s[0] for part in options['scenario'])]
+            scenarios = [s for s in scenarios if not any(part in s[0] for part in options['skip'])]
+            results = {}
+            for name, url, user, cart in scenarios:
+                results[name] = self._run(url, user, cart, options['iterations'], options['warmup'])
+                self._report(name, results[name])
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'products': Product.objects.count(),
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, sort_keys=True))
+            self.stdout.write(f"Wrote {options['output']}")
+        if baseline is not None:
+            self._compare(baseline, report, options['threshold'])
+
+    def _scenarios(self):
+        """``[(name, url, user or None, cart dict or None)]`` built from whatever the database holds."""
+        User = get_user_model()
+        published = Product.objects.filter(draft=False)
+        product = published.order_by('-purchase_count', '-id').first()
+        if product is None:
+            raise CommandError('No published products; run seed_marketplace first.')
+        category = Category.objects.filter(parent__isnull=True).order_by('position', 'id').first()
+        consumer = (User.objects.filter(is_active=True).annotate(n=Count('order'))
+                    .order_by('-n', 'pk').first())
+        seller = Seller.objects.annotate(n=Count('product')).order_by('-n', 'pk').select_related('user').first()
+        owner = User.objects.filter(is_owner=True, is_active=True).order_by('pk').first()
+        cart = {str(pk): 1 for pk in published.order_by('-id').values_list('pk', flat=True)[:5]}
+
+        home = reverse('storefront:storefront_home')
+        products = reverse('products:product_list')
+        scenarios = [
+            ('home', home, None, None),
+            ('product_list', products, None, None),
+            ('product_list search', f'{products}?q=dragon', None, None),
+            ('product_list trending', f'{products}?sort=trending', None, None),
+            ('product_list price range', f'{products}?price_min=5&price_max=40&sort=price_asc', None, None),
+            ('product_list rating', f'{products}?min_rating=4&sort=rating', None, None),
+            ('product_detail', reverse('products:product_detail', args=[product.pk]), None, None),
+        ]
+        if consumer is not None:
+            scenarios += [
+                ('home (signed in)', home, consumer, None),
+                ('cart', reverse('storefront:cart'), consumer, cart),
+                ('checkout', reverse('storefront:checkout'), consumer, cart),
+                ('inbox', reverse('messaging:inbox'), consumer, None),
+            ]
+        if category is not None:
+            scenarios.append(('product_list category', f'{products}?category={category.pk}', None, None))
+        if seller is not None:
+            scenarios.append(('seller dashboard', reverse('sellers:dashboard'), seller.user, None))
+        if owner is not None:
+            scenarios.append(('owner dashboard', reverse('accounts:owner_dashboard'), owner, None))
+        else:
+            self.stderr.write('No owner account: skipping the owner dashboard.')
+        return scenarios
+
+    def _client(self, user, cart):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        if cart:
+            session = client.session
+            session['cart'] = cart
+            session.save()
+        return client
+
+    def _run(self, url, user, cart, iterations, warmup):
+        client = self._client(user, cart)
+        for _ in range(warmup):
+            status = client.get(url).status_code
+        # Queries and memory are measured on their own requests so they do not skew the timings.
+        queries = _QueryCounter()
+        with connection.execute_wrapper(queries):
+            status = client.get(url).status_code
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'url': url,
+            'status': status,
+            **{key: round(value, 3) for key, value in _percentiles(timings).items()},
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': queries.count,
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f"{name:<28} {result['status']:>3}  p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+            f"p99 {result['p99_ms']:8.2f} ms  {result['queries']:>4} queries  {result['peak_kib']:>9.1f} KiB"
+        )
+
+    def _compare(self, baseline, report, threshold):
+        regressions = []
+        for name, result in report['scenarios'].items():
+            before = baseline.get('scenarios', {}).get(name)
+            if before is None:
+                self.stdout.write(f'{name}: not in the baseline')
+                continue
+            for metric in REGRESSION_METRICS:
+                old, new = before.get(metric), result[metric]
+                if old is None:
+                    continue
+                change = (new - old) / old if old else (1.0 if new else 0.0)
+                line = f'{name:<28} {metric:<9} {old:>10} -> {new:<10} ({change:+.0%})'
+                if change > threshold:
+                    regressions.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                elif change < -threshold:
+                    self.stdout.write(self.style.SUCCESS(line))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) above {threshold:.0%}.')
+        self.stdout.write(self.style.SUCCESS(f'No regressions above {threshold:.0%}.'))
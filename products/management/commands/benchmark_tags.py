@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import User
+from products.models import Product, ProductTag, Tag
+from products.tags import filter_by_tags, parse_tags
+from sellers.models import Seller
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark tag filtering on a synthetic catalog: chained icontains over a '
+        'comma-separated string (the old Product.tags layout) versus the Tag/ProductTag '
+        'index. Everything is created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--vocabulary', type=int, default=500, help='Number of distinct tags.')
+        parser.add_argument('--tags-per-product', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--query', default='', help='Comma-separated tags (default: two random tags).')
+        parser.add_argument('--match', choices=['all', 'any'], default='all')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Short numbered names on purpose: "t1" is a substring of "t10", "t100", ...
+        vocabulary = [f"t{i}" for i in range(options['vocabulary'])]
+        names = parse_tags(options['query']) or rng.sample(vocabulary[:20], 2)
+
+        with transaction.atomic():
+            seller = self._build_catalog(rng, vocabulary, options)
+            catalog = Product.objects.filter(seller=seller)
+
+            def old_filter():
+                # The old layout kept tags in a CharField; the synthetic rows keep
+                # the same string in description so the comparison is like for like.
+                if options['match'] == 'any':
+                    condition = Q()
+                    for name in names:
+                        condition |= Q(description__icontains=name)
+                    return catalog.filter(condition)
+                qs = catalog
+                for name in names:
+                    qs = qs.filter(description__icontains=name)
+                return qs
+
+            def new_filter():
+                return filter_by_tags(catalog, names, match=options['match'])
+
+            old_ids, old_times = self._time(old_filter, options['repeat'])
+            new_ids, new_times = self._time(new_filter, options['repeat'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Query: {', '.join(names)} (match {options['match']})")
+        self._report('icontains on string', old_ids, old_times)
+        self._report('Tag/ProductTag index', new_ids, new_times)
+        self.stdout.write(f"False positives from icontains: {len(old_ids - new_ids)}")
+        if statistics.median(new_times):
+            speedup = statistics.median(old_times) / statistics.median(new_times)
+            self.stdout.write(self.style.SUCCESS(f"Speedup (median): {speedup:.1f}x"))
+
+    def _build_catalog(self, rng, vocabulary, options):
+        user = User.objects.create(username=f"benchmark-tags-{rng.getrandbits(32)}", is_seller=True, is_consumer=False)
+        seller = Seller.objects.create(user=user)
+        Tag.objects.bulk_create([Tag(name=name) for name in vocabulary], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=vocabulary).values_list('name', 'id'))
+
+        per_product = min(options['tags_per_product'], len(vocabulary))
+        assignments = [rng.sample(vocabulary, per_product) for _ in range(options['products'])]
+        products = Product.objects.bulk_create(
+            [
+                Product(name=f"Benchmark product {i}", description=', '.join(tags), seller=seller, price=1)
+                for i, tags in enumerate(assignments)
+            ],
+            batch_size=1000,
+        )
+        ProductTag.objects.bulk_create(
+            [
+                ProductTag(product_id=product.pk, tag_id=tag_ids[name])
+                for product, tags in zip(products, assignments)
+                for name in tags
+            ],
+            batch_size=2000,
+        )
+        self.stdout.write(f"Built {len(products)} products with {per_product} tags each.")
+        return seller
+
+    def _time(self, build_queryset, repeat):
+        timings = []
+        ids = set()
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            ids = set(build_queryset().values_list('pk', flat=True))
+            timings.append((time.perf_counter() - start) * 1000)
+        return ids, timings
+
+    def _report(self, label, ids, timings):
+        self.stdout.write(
+            f"{label:<24} {len(ids):>7} matches  median {statistics.median(timings):8.2f} ms  "
+            f"min {min(timings):8.2f} ms"
+        )
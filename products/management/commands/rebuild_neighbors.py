@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.copurchase import MIN_CO_PURCHASES, TOP_K, rebuild_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the "customers also bought" neighbors from order line items.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Neighbors kept per product.')
+        parser.add_argument('--min-co-purchases', type=int, default=MIN_CO_PURCHASES,
+                            help='Orders two products must share to be neighbors.')
+
+    def handle(self, *args, **options):
+        products = rebuild_neighbors(options['top_k'], options['min_co_purchases'])
+        self.stdout.write(self.style.SUCCESS(f'Stored neighbors for {products} products.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all products.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = rebuild_index(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} products.'))
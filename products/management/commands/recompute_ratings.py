@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute Product rating aggregates from approved, visible reviews (drift repair).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int, help='Limit to these products (default: all).')
+
+    def handle(self, *args, **options):
+        updated = recompute_ratings(options['product_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Updated rating aggregates on {updated} products.'))
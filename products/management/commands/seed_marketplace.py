@@ -0,0 +1,319 @@
+import contextlib
+import itertools
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import ConsumerProfile, SellerProfile, User
+from accounts.models_notification import Notification
+from messaging.models import Message, MessageThread
+from orders.models import LineItem, Order
+from products.categories import invalidate_category_tree
+from products.models import Category, Media, Product, ProductReview, ProductTag, ProductVariant, Tag
+from products.models_wishlist import Wishlist
+from products.ratings import recompute_ratings
+from products.search import rebuild_index
+from products.versioning import bump_catalog_version
+from reviews.models import Rating
+from sellers.models import Seller
+
+ADJECTIVES = ['Articulated', 'Low-poly', 'Modular', 'Hollow', 'Twisted', 'Geometric', 'Miniature',
+              'Stackable', 'Parametric', 'Voronoi', 'Hexagonal', 'Gothic', 'Minimal', 'Organic', 'Retro']
+NOUNS = ['Dragon', 'Vase', 'Planter', 'Lamp', 'Headphone Stand', 'Chess Set', 'Gear', 'Skull', 'Box',
+         'Keychain', 'Cable Clip', 'Figurine', 'Coaster', 'Bracket', 'Spaceship', 'Castle', 'Octopus']
+MATERIALS = ['PLA', 'PETG', 'ABS', 'Resin', 'TPU']
+SIZES = ['Small', 'Medium', 'Large']
+STATUSES = ['Pending', 'Paid', 'Paid', 'Paid', 'Shipped', 'Completed', 'Completed', 'Refunded']
+PASSWORD = 'marketplace'
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+@contextlib.contextmanager
+def _explicit_timestamps(*models):
+    """Let bulk_create keep the generated created_at/updated_at instead of stamping now()."""
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible synthetic marketplace (users, sellers, nested categories, products with '
+        'media, variants and tags, orders, reviews, wishlists, messages, notifications) for benchmarks. '
+        'Rows are bulk-inserted in chunks, so model signals do not fire; search documents, rating '
+        'aggregates and purchase counts are rebuilt once at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--sellers', type=int, default=250, help='How many of the users sell.')
+        parser.add_argument('--categories', type=int, default=12, help='Top-level categories (each gets subcategories).')
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--orders', type=int, default=40000)
+        parser.add_argument('--line-items', type=int, default=100000)
+        parser.add_argument('--reviews', type=int, default=30000)
+        parser.add_argument('--threads', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=365, help='Spread activity over this many days.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help='Username prefix; must not be in use yet.')
+
+    def handle(self, *args, **options):
+        if options['sellers'] > options['users']:
+            raise CommandError('--sellers cannot exceed --users.')
+        if options['orders'] > options['line_items']:
+            raise CommandError('Every order needs a line item: --orders cannot exceed --line-items.')
+        if User.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users named {options['prefix']}-* already exist; pass another --prefix.")
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.chunk_size = options['chunk_size']
+        self.now = timezone.now().replace(microsecond=0)
+        started = time.perf_counter()
+
+        with _explicit_timestamps(User, Order, ProductReview, Rating, MessageThread, Notification, Wishlist):
+            users, sellers = self._step('users and sellers', self._users)
+            leaves = self._step('categories', self._categories)
+            tag_ids = self._step('tags', self._tags)
+            products = self._step('products', self._products, sellers, leaves)
+            self._step('media, variants and tags', self._product_relations, products, tag_ids)
+            self._step('orders and line items', self._orders, users, products)
+            self._step('reviews and ratings', self._reviews, users, products)
+            self._step('wishlists', self._wishlists, users, products)
+            self._step('messages and notifications', self._messages, users, sellers)
+        self._step('derived data', self._derived, products)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded the marketplace in {time.perf_counter() - started:.1f}s. '
+            'Run rebuild_neighbors and the trending/recommendation tasks to fill the precomputed tables.'
+        ))
+
+    def _step(self, label, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f'{label:<28} {time.perf_counter() - started:8.1f}s')
+        return result
+
+    def _insert(self, model, rows):
+        """bulk_create *rows* (any iterable) chunk by chunk; returns the new primary keys."""
+        pks = []
+        for chunk in _chunks(rows, self.chunk_size):
+            with transaction.atomic():
+                pks.extend(obj.pk for obj in model.objects.bulk_create(chunk, batch_size=self.chunk_size))
+        return pks
+
+    def _moment(self):
+        """A random time in the last --days, weighted towards the present."""
+        days = self.options['days'] * (1 - self.rng.random() ** 0.5)
+        return self.now - timedelta(days=days, seconds=self.rng.randrange(86400))
+
+    def _users(self):
+        prefix, rng = self.options['prefix'], self.rng
+        password = make_password(PASSWORD)
+        n_sellers = self.options['sellers']
+        users = self._insert(User, (
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password,
+                 is_seller=i < n_sellers, date_joined=self._moment(),
+                 last_login=self.now - timedelta(days=rng.expovariate(1 / 20)))
+            for i in range(self.options['users'])
+        ))
+        self._insert(ConsumerProfile, (ConsumerProfile(user_id=pk) for pk in users))
+        self._insert(SellerProfile, (SellerProfile(user_id=pk, display_name=f'{prefix} studio {i}')
+                                     for i, pk in enumerate(users[:n_sellers])))
+        seller_ids = self._insert(Seller, (Seller(user_id=pk) for pk in users[:n_sellers]))
+        return users, list(zip(seller_ids, users[:n_sellers]))
+
+    def _categories(self):
+        # Few rows, so save() builds the materialized paths.
+        leaves = []
+        for i in range(self.options['categories']):
+            top = Category.objects.create(name=f'{self.rng.choice(NOUNS)}s {i}', position=i)
+            for j in range(self.rng.randint(2, 5)):
+                sub = Category.objects.create(name=f'{top.name} / {self.rng.choice(ADJECTIVES)} {j}', parent=top, position=j)
+                if self.rng.random() < 0.3:
+                    leaves.extend(
+                        Category.objects.create(name=f'{sub.name} / {material}', parent=sub, position=k).pk
+                        for k, material in enumerate(self.rng.sample(MATERIALS, 2))
+                    )
+                else:
+                    leaves.append(sub.pk)
+        return leaves
+
+    def _tags(self):
+        names = [f'{adjective}-{noun}'.lower().replace(' ', '-') for adjective in ADJECTIVES for noun in NOUNS]
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        return list(Tag.objects.filter(name__in=names).values_list('pk', flat=True))
+
+    def _products(self, sellers, leaves):
+        rng = self.rng
+        # A few sellers list most of the catalog.
+        seller_weights = list(itertools.accumulate(rng.paretovariate(1.2) for _ in sellers))
+
+        def product(i):
+            is_digital = rng.random() < 0.6
+            is_physical = not is_digital or rng.random() < 0.2
+            name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+            return Product(
+                name=f'{name} #{i}',
+                description=f'A {name.lower()} designed for {rng.choice(MATERIALS)}. ' * rng.randint(1, 4),
+                seller_id=rng.choices(sellers, cum_weights=seller_weights)[0][0],
+                price=Decimal(rng.randint(99, 9999)) / 100,
+                category_id=rng.choice(leaves),
+                is_digital=is_digital,
+                is_physical=is_physical,
+                inventory=rng.randint(0, 50) if is_physical else None,
+                draft=rng.random() < 0.03,
+                featured_manual=rng.random() < 0.02,
+                view_count=int(rng.paretovariate(1.1) * 10),
+            )
+        return self._insert(Product, (product(i) for i in range(self.options['products'])))
+
+    def _product_relations(self, products, tag_ids):
+        rng = self.rng
+        media_rows = []
+
+        def media():
+            for product_id in products:
+                media_rows.append(product_id)
+                yield Media(image='product_images/seed.png', file_type='png')
+                for _ in range(rng.randint(0, 2)):
+                    media_rows.append(product_id)
+                    yield Media(file='product_files/seed.stl', file_type=rng.choice(['stl', '3mf', 'obj']))
+        media_ids = self._insert(Media, media())
+        through = Product.media.through
+        self._insert(through, (through(product_id=product_id, media_id=media_id)
+                               for product_id, media_id in zip(media_rows, media_ids)))
+
+        physical = Product.objects.filter(pk__range=(products[0], products[-1]), is_physical=True)
+        self._insert(ProductVariant, (
+            ProductVariant(product_id=product_id, name='Size', value=size,
+                           price=Decimal(rng.randint(99, 9999)) / 100, inventory=rng.randint(0, 20))
+            for product_id in list(physical.values_list('pk', flat=True))
+            for size in SIZES[:rng.randint(0, 3)]
+        ))
+        self._insert(ProductTag, (
+            ProductTag(product_id=product_id, tag_id=tag_id)
+            for product_id in products
+            for tag_id in rng.sample(tag_ids, rng.randint(1, 5))
+        ))
+
+    def _orders(self, users, products):
+        rng = self.rng
+        n_orders, n_items = self.options['orders'], self.options['line_items']
+        moments = [self._moment() for _ in range(n_orders)]
+        order_ids = self._insert(Order, (
+            Order(consumer_id=rng.choice(users), status=rng.choice(STATUSES), created_at=created)
+            for created in moments
+        ))
+        # One line item per order, the rest spread at random; popular products sell more.
+        sizes = [1] * n_orders
+        for _ in range(n_items - n_orders):
+            sizes[rng.randrange(n_orders)] += 1
+        weights = list(itertools.accumulate(rng.paretovariate(1.0) for _ in products))
+
+        snapshots = {
+            pk: row for pk, *row in
+            Product.objects.filter(pk__range=(products[0], products[-1]))
+            .values_list('pk', 'price', 'seller_id', 'name', 'is_digital', 'is_physical').iterator()
+        }
+
+        def line_items():
+            for order_id, created, size in zip(order_ids, moments, sizes):
+                picked = set(rng.choices(products, cum_weights=weights, k=size))
+                for product_id in picked:
+                    price, seller_id, name, is_digital, is_physical = snapshots[product_id]
+                    yield LineItem(order_id=order_id, product_id=product_id, quantity=rng.choice((1, 1, 1, 2, 3)),
+                                   unit_price=price, seller_id=seller_id, product_name=name,
+                                   is_digital=is_digital, is_physical=is_physical, created_at=created)
+        self._insert(LineItem, line_items())
+
+    def _reviews(self, users, products):
+        rng = self.rng
+        pairs = set()
+        target = min(self.options['reviews'], len(users) * len(products))
+        while len(pairs) < target:
+            pairs.add((rng.choice(products), rng.choice(users)))
+
+        def review(product_id, user_id):
+            created = self._moment()
+            return ProductReview(
+                product_id=product_id, user_id=user_id,
+                rating=Decimal(rng.choice([2, 4, 6, 7, 8, 8, 9, 10, 10, 10])) / 2,
+                title='Printed great', body='Clean surfaces and no supports needed.',
+                created_at=created, updated_at=created,
+                is_approved=rng.random() < 0.9, is_hidden=rng.random() < 0.02,
+            )
+        pairs = sorted(pairs)
+        self._insert(ProductReview, (review(*pair) for pair in pairs))
+        self._insert(Rating, (
+            Rating(product_id=product_id, user_id=user_id, score=rng.randint(1, 5), created_at=self._moment())
+            for product_id, user_id in pairs[::3]
+        ))
+
+    def _wishlists(self, users, products):
+        rng = self.rng
+        owners = rng.sample(users, len(users) // 3)
+        wishlist_ids = self._insert(Wishlist, (Wishlist(user_id=user_id, created_at=self._moment()) for user_id in owners))
+        through = Wishlist.products.through
+        self._insert(through, (
+            through(wishlist_id=wishlist_id, product_id=product_id)
+            for wishlist_id in wishlist_ids
+            for product_id in rng.sample(products, min(len(products), rng.randint(1, 8)))
+        ))
+
+    def _messages(self, users, sellers):
+        rng = self.rng
+        threads = [(rng.choice(users), rng.choice(sellers)[1]) for _ in range(self.options['threads'])]
+        stamps = [self._moment() for _ in threads]
+        thread_ids = self._insert(MessageThread, (MessageThread(created_at=stamp, updated_at=stamp) for stamp in stamps))
+        through = MessageThread.participants.through
+        self._insert(through, (
+            through(messagethread_id=thread_id, user_id=user_id)
+            for thread_id, pair in zip(thread_ids, threads)
+            for user_id in set(pair)
+        ))
+        self._insert(Message, (
+            Message(thread_id=thread_id, sender_id=pair[k % 2], body='Is this printable without supports?',
+                    sent_at=stamp + timedelta(minutes=k * 7), is_read=rng.random() < 0.7)
+            for thread_id, pair, stamp in zip(thread_ids, threads, stamps)
+            for k in range(rng.randint(1, 6))
+        ))
+        self._insert(Notification, (
+            Notification(user_id=user_id, message='Your order has shipped', url='/orders/history/',
+                         is_read=rng.random() < 0.6, created_at=self._moment())
+            for user_id in users
+            for _ in range(rng.randint(0, 3))
+        ))
+
+    def _derived(self, products):
+        # What the skipped signals and counters would have maintained row by row.
+        sold = (LineItem.objects.filter(product=OuterRef('pk')).values('product')
+                .annotate(total=Sum('quantity')).values('total'))
+        Product.objects.filter(pk__range=(products[0], products[-1])).update(
+            purchase_count=Coalesce(Subquery(sold, output_field=IntegerField()), 0))
+        recompute_ratings()
+        with transaction.atomic():  # one commit instead of one per document on SQLite
+            rebuild_index(chunk_size=self.chunk_size)
+        invalidate_category_tree()
+        bump_catalog_version()
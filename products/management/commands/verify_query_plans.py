@@ -0,0 +1,106 @@
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models_notification import Notification
+from messaging.models import Message
+from orders.models import LineItem, Order
+from products.models import Product
+from reviews.models import Rating
+
+_SQLITE_SCAN = re.compile(r'\bSCAN (\S+)(.*)$')
+
+
+def _sqlite_seq_scans(plan):
+    scans = []
+    for line in plan.splitlines():
+        match = _SQLITE_SCAN.search(line)
+        if match and 'USING' not in match.group(2) and match.group(1) != 'CONSTANT':
+            scans.append(match.group(1))
+    return scans
+
+
+def _postgres_seq_scans(plan):
+    scans = []
+    nodes = [entry['Plan'] for entry in json.loads(plan)]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            scans.append(node.get('Relation Name', '?'))
+        nodes.extend(node.get('Plans', ()))
+    return scans
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the canonical hot queries (catalog sorts, seller listings, notifications, unread messages, '
+        'order history, product and seller sales, ratings) against the current database and fail if any of them falls '
+        'back to a sequential scan. Run it on a seeded dataset (seed_marketplace): on near-empty tables the '
+        'planner rightly prefers scans.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run ANALYZE first so the planner has fresh statistics.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'postgresql':
+            explain, seq_scans = (lambda qs: qs.explain(format='json')), _postgres_seq_scans
+        elif connection.vendor == 'sqlite':
+            explain, seq_scans = (lambda qs: qs.explain()), _sqlite_seq_scans
+        else:
+            raise CommandError(f'Plan checks are not implemented for {connection.vendor}.')
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        failures = 0
+        for name, queryset in self.hot_queries():
+            plan = explain(queryset)
+            scans = seq_scans(plan)
+            if scans:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FAIL {name}: sequential scan on {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok   {name}'))
+            if scans or options['verbosity'] > 1:
+                self.stdout.write('     ' + plan.replace('\n', '\n     '))
+        if failures:
+            raise CommandError(f'{failures} hot quer{"y" if failures == 1 else "ies"} use a sequential scan.')
+
+    def hot_queries(self):
+        """``[(name, queryset)]``, parameterized with rows from the current database."""
+        product = Product.objects.filter(draft=False).order_by('-purchase_count', '-id').first()
+        order = Order.objects.order_by('-id').first()
+        notification = Notification.objects.order_by('-id').first()
+        message = Message.objects.order_by('-id').first()
+        rating = Rating.objects.order_by('-id').first()
+        if None in (product, order, notification, message, rating):
+            raise CommandError('Products, orders, notifications, messages and ratings are needed; '
+                               'run seed_marketplace first.')
+
+        published = Product.objects.filter(draft=False)
+        since = timezone.now() - timedelta(days=30)
+        return [
+            ('product_list newest', published.order_by('-id')[:10]),
+            ('product_list price', published.order_by('price', 'id')[:10]),
+            ('product_list most viewed', published.order_by('-view_count', '-id')[:10]),
+            ('product_list most purchased', published.order_by('-purchase_count', '-id')[:10]),
+            ('product_list trending', published.order_by('-trending_score', '-id')[:10]),
+            ('product_list rating', published.filter(rating_count__gt=0, rating_avg__gte=4)
+             .order_by('-rating_avg', '-rating_count', '-id')[:10]),
+            ('seller products', Product.objects.filter(seller_id=product.seller_id).order_by('-id')[:10]),
+            ('unread notifications', Notification.objects.filter(user_id=notification.user_id, is_read=False)),
+            ('notification list', Notification.objects.filter(user_id=notification.user_id)
+             .order_by('-created_at')[:20]),
+            ('unread thread messages', Message.objects.filter(thread_id=message.thread_id, is_read=False)
+             .exclude(sender_id=message.sender_id)),
+            ('order history', Order.objects.filter(consumer_id=order.consumer_id).order_by('-created_at')[:20]),
+            ('product sales', LineItem.objects.filter(product_id=product.pk, order__created_at__gte=since)),
+            ('seller sales', LineItem.objects.filter(seller_id=product.seller_id).order_by('-created_at')[:5]),
+            ('rating by product and user', Rating.objects.filter(product_id=rating.product_id, user_id=rating.user_id)),
+        ]
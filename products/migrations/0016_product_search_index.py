@@ -0,0 +1,62 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS products_productsearch ("
+            " product_id bigint PRIMARY KEY REFERENCES products_product (id)"
+            " ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,"
+            " document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS products_productsearch_document_gin"
+            " ON products_productsearch USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO products_productsearch (product_id, document)"
+            " SELECT p.id,"
+            " setweight(to_tsvector('english', coalesce(p.name, '')), 'A') ||"
+            " setweight(to_tsvector('english', coalesce(p.tags, '')), 'B') ||"
+            " setweight(to_tsvector('english', coalesce(c.name, '')), 'C') ||"
+            " setweight(to_tsvector('english', coalesce(p.description, '')), 'D')"
+            " FROM products_product p LEFT JOIN products_category c ON c.id = p.category_id"
+            " ON CONFLICT (product_id) DO NOTHING"
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            options = {row[0] for row in cursor.fetchall()}
+        if 'ENABLE_FTS5' not in options:
+            # products.search falls back to icontains when the table is missing.
+            return
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products_productfts USING fts5("
+            "name, tags, category, description, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO products_productfts (rowid, name, tags, category, description)"
+            " SELECT p.id, coalesce(p.name, ''), coalesce(p.tags, ''), coalesce(c.name, ''),"
+            " coalesce(p.description, '')"
+            " FROM products_product p LEFT JOIN products_category c ON c.id = p.category_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS products_productsearch")
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS products_productfts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_product_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+def split_tags(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Tag = apps.get_model('products', 'Tag')
+    ProductTag = apps.get_model('products', 'ProductTag')
+
+    pairs = set()
+    for product_id, raw in Product.objects.exclude(tags='').values_list('id', 'tags').iterator():
+        for name in (raw or '').split(','):
+            name = ' '.join(name.split()).lower()[:50]
+            if name:
+                pairs.add((product_id, name))
+    if not pairs:
+        return
+
+    names = {name for _, name in pairs}
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    ProductTag.objects.bulk_create(
+        [ProductTag(product_id=product_id, tag_id=tag_ids[name]) for product_id, name in pairs],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def join_tags(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductTag = apps.get_model('products', 'ProductTag')
+
+    names = {}
+    for product_id, name in ProductTag.objects.values_list('product_id', 'tag__name').order_by('tag__name'):
+        names.setdefault(product_id, []).append(name)
+    for product_id, product_names in names.items():
+        Product.objects.filter(pk=product_id).update(tags=', '.join(product_names)[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_tag_producttag'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_tags, join_tags),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_split_product_tags'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='product',
+            name='tags',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='products', through='products.ProductTag', to='products.tag'),
+        ),
+    ]
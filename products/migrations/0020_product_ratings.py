@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_product_tags_m2m'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, help_text='Average of approved, visible reviews', max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_histogram',
+            field=models.JSONField(blank=True, default=dict, help_text='Review count per rating value, e.g. {"4.5": 3}'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='ProductReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.DecimalField(choices=[(Decimal('1.0'), '1.0'), (Decimal('1.5'), '1.5'), (Decimal('2.0'), '2.0'), (Decimal('2.5'), '2.5'), (Decimal('3.0'), '3.0'), (Decimal('3.5'), '3.5'), (Decimal('4.0'), '4.0'), (Decimal('4.5'), '4.5'), (Decimal('5.0'), '5.0')], decimal_places=1, max_digits=2)),
+                ('title', models.CharField(max_length=100)),
+                ('body', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_approved', models.BooleanField(default=False, help_text='Approved by admin')),
+                ('is_hidden', models.BooleanField(default=False, help_text='Hidden from public view')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='products.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('product', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_for(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents.get(pk)
+            if parent_id is None or parent_id in seen:
+                paths[pk] = f"{pk}/"
+            else:
+                paths[pk] = path_for(parent_id, seen + (pk,)) + f"{pk}/"
+        return paths[pk]
+
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.path = path_for(category.pk)
+        category.depth = category.path.count('/') - 1
+    Category.objects.bulk_update(categories, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_product_ratings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterFlush',
+            fields=[
+                ('bucket', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('flushed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, help_text='Auto-incremented on file download'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0, help_text='Auto-incremented on wishlist add'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0022_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, help_text='Time-decayed views and purchases, maintained by products/trending.py'),
+        ),
+        migrations.CreateModel(
+            name='ProductActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveIntegerField(help_text='Hours since the Unix epoch (UTC)')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('purchases', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='product_activity_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'hour'), name='unique_product_activity_hour')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0023_trending_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 = strongest')),
+                ('score', models.FloatField(help_text="Cosine similarity of the two products' buyer orders")),
+                ('co_purchases', models.PositiveIntegerField(help_text='Orders containing both products')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='products.product')),
+            ],
+            options={
+                'ordering': ['product', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'rank'), name='unique_product_neighbor_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_product_neighbors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0025_product_version'),
+        ('sellers', '0004_sellerrating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('draft', False)), fields=['-id'], name='product_pub_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('draft', False)), fields=['price', 'id'], name='product_pub_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('draft', False)), fields=['-view_count', '-id'], name='product_pub_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('draft', False)), fields=['-purchase_count', '-id'], name='product_pub_purchases_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('draft', False)), fields=['-trending_score', '-id'], name='product_pub_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('draft', False)), fields=['-rating_avg', '-rating_count', '-id'], name='product_pub_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['seller', '-id'], name='product_seller_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:44
+
+import django.db.models.deletion
+import products.models_search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0026_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFTS',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='fts_document', serialize=False, to='products.product')),
+                ('document', products.models_search.SearchDocumentField(db_column='products_productfts')),
+            ],
+            options={
+                'db_table': 'products_productfts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSearch',
+            fields=[
+                ('product', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='products.product')),
+                ('document', products.models_search.SearchDocumentField()),
+            ],
+            options={
+                'db_table': 'products_productsearch',
+                'managed': False,
+            },
+        ),
+    ]
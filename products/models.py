@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
 from .models_wishlist import Wishlist
+from .models_tag import Tag, ProductTag
 
 class ProductVariant(models.Model):
     product = models.ForeignKey('Product', related_name='variants', on_delete=models.CASCADE)
@@ -27,24 +31,123 @@ class Product(models.Model):
     draft = models.BooleanField(default=False, help_text="If checked, product is a draft and not visible to buyers.")
     inventory = models.IntegerField(null=True, blank=True, help_text="Stock for physical products. Leave blank for digital products.")
     # Tag support for advanced search
-    tags = models.CharField(max_length=255, blank=True, help_text="Comma-separated tags for search and filtering.")
+    tags = models.ManyToManyField('Tag', through='ProductTag', related_name='products', blank=True)
 
     # Featured product logic
     featured_manual = models.BooleanField(default=False, help_text="Show as featured if checked")
     view_count = models.PositiveIntegerField(default=0, help_text="Auto-incremented on product view")
     purchase_count = models.PositiveIntegerField(default=0, help_text="Auto-incremented on purchase")
+    wishlist_count = models.PositiveIntegerField(default=0, help_text="Auto-incremented on wishlist add")
+    download_count = models.PositiveIntegerField(default=0, help_text="Auto-incremented on file download")
+    trending_score = models.FloatField(default=0, db_index=True, help_text="Time-decayed views and purchases, maintained by products/trending.py")
     meta_title = models.CharField(max_length=70, blank=True, null=True, help_text="SEO meta title (max 70 chars)")
     meta_description = models.CharField(max_length=160, blank=True, null=True, help_text="SEO meta description (max 160 chars)")
 
+    # Denormalized review aggregates, maintained by products/ratings.py
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, db_index=True, help_text="Average of approved, visible reviews")
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    rating_histogram = models.JSONField(default=dict, blank=True, help_text="Review count per rating value, e.g. {\"4.5\": 3}")
+
+    # Bumped by every save that changes what the detail page shows, and by
+    # touch() for media, variant, tag and review changes (see products/signals.py).
+    version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    # Saves limited to these fields do not change the page version.
+    UNVERSIONED_FIELDS = {'view_count', 'purchase_count', 'wishlist_count', 'download_count', 'trending_score'}
+
+    class Meta:
+        # Catalog sorts over published products only (see PRODUCT_LIST_ORDERINGS
+        # and storefront/rails.py); each ends with the keyset tiebreaker.
+        indexes = [
+            models.Index(fields=['-id'], condition=Q(draft=False), name='product_pub_newest_idx'),
+            models.Index(fields=['price', 'id'], condition=Q(draft=False), name='product_pub_price_idx'),
+            models.Index(fields=['-view_count', '-id'], condition=Q(draft=False), name='product_pub_views_idx'),
+            models.Index(fields=['-purchase_count', '-id'], condition=Q(draft=False),
+                         name='product_pub_purchases_idx'),
+            models.Index(fields=['-trending_score', '-id'], condition=Q(draft=False),
+                         name='product_pub_trending_idx'),
+            models.Index(fields=['-rating_avg', '-rating_count', '-id'], condition=Q(draft=False),
+                         name='product_pub_rating_idx'),
+            models.Index(fields=['seller', '-id'], name='product_seller_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not set(update_fields) <= self.UNVERSIONED_FIELDS:
+            if self.pk is not None:
+                self.version += 1
+            self.updated_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'updated_at'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def touch(cls, product_ids):
+        """
+        Bump the version of products whose related rows (media, variants, tags,
+        reviews) or bulk-updated columns changed, and with it the catalog version.
+        """
+        from .versioning import catalog_changed
+
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        now = timezone.now()
+        for start in range(0, len(product_ids), 500):
+            cls.objects.filter(pk__in=product_ids[start:start + 500]).update(version=F('version') + 1, updated_at=now)
+        catalog_changed()
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     position = models.PositiveIntegerField(default=0, help_text="Order for display")
     parent = models.ForeignKey('self', null=True, blank=True, related_name='subcategories', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='category_images/', blank=True, null=True, help_text="Optional category image.")
+    # Materialized path of ancestor ids including this one, e.g. "1/5/12/".
+    # Descendants of X are Category.objects.filter(path__startswith=X.path).
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['position', 'name']
 
+    def __str__(self):
+        return self.name
+
+    def _build_path(self, old_path=''):
+        if not self.parent_id:
+            return f"{self.pk}/", 0
+        parent = Category.objects.only('path', 'depth').get(pk=self.parent_id)
+        if old_path and parent.path.startswith(old_path):
+            raise ValueError("A category cannot be moved under itself or one of its descendants.")
+        return f"{parent.path}{self.pk}/", parent.depth + 1
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if not self.pk:
+                # The path includes our own id, so insert first and fill it in after.
+                super().save(*args, **kwargs)
+                self.path, self.depth = self._build_path()
+                Category.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+                return
+            old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first() or ''
+            self.path, self.depth = self._build_path(old_path)
+            if kwargs.get('update_fields') is not None and self.path != old_path:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'path', 'depth'}
+            super().save(*args, **kwargs)
+            if old_path and old_path != self.path:
+                # Re-root the whole subtree in one statement.
+                old_depth = old_path.count('/') - 1
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (self.depth - old_depth),
+                )
+
+    def descendants(self, include_self=True):
+        qs = Category.objects.filter(path__startswith=self.path)
+        return qs if include_self else qs.exclude(pk=self.pk)
+
 
 class Media(models.Model):
     FILE_TYPE_CHOICES = [
@@ -66,3 +169,9 @@ class Media(models.Model):
 class License(models.Model):
     name = models.CharField(max_length=100)
     terms = models.TextField()
+
+# Imported last: models_review imports Product from this module.
+from .models_review import ProductReview  # noqa: E402
+from .models_counters import CounterFlush, ProductActivity  # noqa: E402
+from .models_neighbors import ProductNeighbor  # noqa: E402
+from .models_search import ProductFTS, ProductSearch  # noqa: E402
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class CounterFlush(models.Model):
+    """A popularity-counter bucket already applied to Product (see products/counters.py)."""
+    bucket = models.BigIntegerField(primary_key=True)
+    flushed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-bucket']
+
+    def __str__(self):
+        return f"Counter bucket {self.bucket}"
+
+
+class ProductActivity(models.Model):
+    """Views and purchases of one product during one hour, kept for products/trending.py."""
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='activity')
+    hour = models.PositiveIntegerField(help_text="Hours since the Unix epoch (UTC)")
+    views = models.PositiveIntegerField(default=0)
+    purchases = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'hour'], name='unique_product_activity_hour'),
+        ]
+        indexes = [models.Index(fields=['hour'], name='product_activity_hour_idx')]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.hour}: {self.views} views, {self.purchases} purchases"
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class ProductNeighbor(models.Model):
+    """A "customers also bought" product, rebuilt by products/copurchase.py."""
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 = strongest")
+    score = models.FloatField(help_text="Cosine similarity of the two products' buyer orders")
+    co_purchases = models.PositiveIntegerField(help_text="Orders containing both products")
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_product_neighbor_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.neighbor_id} ({self.score:.3f})"
@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class SearchDocumentField(models.TextField):
+    """The indexed search document; products/search.py registers its match lookups."""
+
+
+class ProductFTS(models.Model):
+    """
+    Unmanaged view of the SQLite FTS5 table created in migration 0016.
+
+    Declared so products/search.py can join the table once and rank with
+    bm25() in the same query that matches.
+    """
+    product = models.OneToOneField('products.Product', primary_key=True, db_column='rowid',
+                                   on_delete=models.DO_NOTHING, db_constraint=False, related_name='fts_document')
+    # FTS5 exposes a hidden column named after the table for MATCH and bm25()
+    document = SearchDocumentField(db_column='products_productfts')
+
+    class Meta:
+        managed = False
+        db_table = 'products_productfts'
+
+
+class ProductSearch(models.Model):
+    """Unmanaged view of the Postgres tsvector table created in migration 0016."""
+    product = models.OneToOneField('products.Product', primary_key=True, on_delete=models.DO_NOTHING,
+                                   db_constraint=False, related_name='search_document')
+    document = SearchDocumentField()
+
+    class Meta:
+        managed = False
+        db_table = 'products_productsearch'
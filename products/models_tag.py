@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True, help_text="Lowercase tag name.")
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class ProductTag(models.Model):
+    """Through table for Product.tags; the (tag, product) index is the inverted index."""
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='product_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='product_tags')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'product'], name='products_producttag_tag_product_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'tag'], name='products_pt_product_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}:{self.tag.name}"
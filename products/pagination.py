@@ -0,0 +1,194 @@
+"""
+Keyset (cursor) pagination for catalog listings.
+
+Instead of COUNT(*) + OFFSET, each page is fetched with a WHERE clause on the
+sort key of the last row seen, so page 5,000 costs the same as page 2.
+Cursors are opaque and signed; numbered links are only offered for the first
+MAX_NUMBERED_PAGES pages (small OFFSETs are cheap), and totals come from a
+cached count. A cursor that does not verify or belongs to another sort order
+is ignored, so the request gets the first page.
+
+Orderings on a computed float (search relevance) cannot be keyset-paginated
+safely: the rank is recomputed per query, and a float that does not survive
+the round trip through the cursor exactly skips or repeats rows. Those use
+``keyset=False``, whose cursors carry the page number and read with OFFSET;
+search result sets are bounded by their matches.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404
+
+CURSOR_SALT = 'products.pagination.cursor'
+MAX_NUMBERED_PAGES = 5
+COUNT_CACHE_TIMEOUT = 300
+
+
+def _to_json(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _field_name(spec):
+    return spec.lstrip('-')
+
+
+def _keyset_filter(ordering, values, forward=True):
+    """
+    WHERE clause selecting rows strictly after *values* in *ordering*
+    (or strictly before them when ``forward`` is False):
+    (a > va) OR (a = va AND b > vb) OR ...
+    """
+    condition = Q()
+    equal = Q()
+    for spec, value in zip(ordering, values):
+        field = _field_name(spec)
+        descending = spec.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _reverse(ordering):
+    return [spec[1:] if spec.startswith('-') else f'-{spec}' for spec in ordering]
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """COUNT(*) for *queryset*, cached by its SQL so repeated page views do not recount."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'count:' + hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    return cache.get_or_set(key, queryset.order_by().count, timeout)
+
+
+class CursorPage:
+    def __init__(self, object_list, number, has_next, has_previous, next_url, previous_url,
+                 page_links, total):
+        self.object_list = object_list
+        self.number = number
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_url = next_url
+        self.previous_url = previous_url
+        self.page_links = page_links
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate *queryset* by *ordering*, a list of order_by() specs whose last
+    entry must be unique (use 'id' / '-id' as the tiebreaker).
+    """
+
+    def __init__(self, queryset, ordering, per_page, max_numbered_pages=MAX_NUMBERED_PAGES,
+                 count=True, keyset=True):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.max_numbered_pages = max_numbered_pages
+        self.count = count
+        self.keyset = keyset
+        self._signature = ','.join(self.ordering) + ('' if keyset else '@offset')
+
+    def _encode(self, obj, number, forward):
+        data = {'o': self._signature, 'n': number, 'f': forward}
+        if self.keyset:
+            data['v'] = [_to_json(getattr(obj, _field_name(spec))) for spec in self.ordering]
+        return signing.dumps(data, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        """The cursor's data, or None when it is forged, damaged or from another sort order."""
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(data, dict) or data.get('o') != self._signature:
+            return None
+        if not isinstance(data.get('n'), int) or data['n'] < 1 or not isinstance(data.get('f'), bool):
+            return None
+        if self.keyset and (not isinstance(data.get('v'), list) or len(data['v']) != len(self.ordering)):
+            return None
+        return data
+
+    def _offset_rows(self, ordered, number):
+        offset = (number - 1) * self.per_page
+        rows = list(ordered[offset:offset + self.per_page + 1])
+        return rows[:self.per_page], len(rows) > self.per_page
+
+    def _url(self, request, **params):
+        query = request.GET.copy()
+        for key in ('page', 'cursor'):
+            query.pop(key, None)
+        for key, value in params.items():
+            query[key] = value
+        return '?' + query.urlencode()
+
+    def page(self, request):
+        cursor = request.GET.get('cursor')
+        data = self._decode(cursor) if cursor else None
+        ordered = self.queryset.order_by(*self.ordering)
+        if data is not None:
+            number = data['n']
+            if not self.keyset:
+                rows, has_next = self._offset_rows(ordered, number)
+                has_previous = number > 1
+            elif data['f']:
+                rows = list(ordered.filter(_keyset_filter(self.ordering, data['v']))[:self.per_page + 1])
+                has_next = len(rows) > self.per_page
+                rows = rows[:self.per_page]
+                has_previous = True
+            else:
+                backwards = self.queryset.order_by(*_reverse(self.ordering))
+                rows = list(backwards.filter(_keyset_filter(self.ordering, data['v'], forward=False))[:self.per_page + 1])
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                has_next = True
+        else:
+            cursor = None
+            try:
+                number = max(int(request.GET.get('page', 1)), 1)
+            except (TypeError, ValueError):
+                number = 1
+            if number > self.max_numbered_pages:
+                # Deep OFFSET scans are what cursors are for.
+                raise Http404('Use the next/previous links to browse further.')
+            rows, has_next = self._offset_rows(ordered, number)
+            has_previous = number > 1
+
+        next_url = previous_url = None
+        if has_next and rows:
+            if number < self.max_numbered_pages and not cursor:
+                next_url = self._url(request, page=number + 1)
+            else:
+                next_url = self._url(request, cursor=self._encode(rows[-1], number + 1, True))
+        if has_previous:
+            if number - 1 <= self.max_numbered_pages:
+                previous_url = self._url(request, page=number - 1)
+            elif rows:
+                previous_url = self._url(request, cursor=self._encode(rows[0], number - 1, False))
+
+        total = cached_count(self.queryset) if self.count else None
+        if total is not None:
+            last_numbered = min(self.max_numbered_pages, max((total - 1) // self.per_page + 1, 1))
+        else:
+            last_numbered = min(self.max_numbered_pages, number + (1 if has_next else 0))
+        page_links = [
+            {'number': n, 'url': self._url(request, page=n), 'current': n == number}
+            for n in range(1, last_numbered + 1)
+        ] if (has_next or has_previous) else []
+
+        return CursorPage(rows, number, has_next, has_previous, next_url, previous_url,
+                          page_links, total)
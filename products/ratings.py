@@ -0,0 +1,103 @@
+"""
+Denormalized rating aggregates on Product.
+
+Only approved, non-hidden reviews count. Review saves and deletes apply a
+constant-time delta to the product row (see products/signals.py); bulk
+updates that bypass signals (admin actions, ``queryset.update``) must call
+``recompute_ratings`` for the affected products.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Product, ProductReview
+
+RATING_FIELDS = ['rating_avg', 'rating_count', 'rating_sum', 'rating_histogram']
+
+
+def is_counted(review):
+    return bool(review.is_approved and not review.is_hidden)
+
+
+def _key(rating):
+    return str(Decimal(rating).quantize(Decimal('0.1')))
+
+
+def _set_average(product):
+    if product.rating_count:
+        product.rating_avg = (Decimal(product.rating_sum) / product.rating_count).quantize(Decimal('0.01'))
+    else:
+        product.rating_sum = Decimal('0')
+        product.rating_avg = Decimal('0')
+
+
+def apply_rating_delta(product_id, removed=None, added=None):
+    """
+    Move one review's contribution on the product: subtract the *removed*
+    rating and/or add the *added* rating (either may be None).
+    """
+    if removed is None and added is None:
+        return
+    with transaction.atomic():
+        product = (
+            Product.objects.select_for_update()
+            .only('pk', 'version', *RATING_FIELDS)
+            .filter(pk=product_id)
+            .first()
+        )
+        if product is None:
+            # Product is being deleted along with its reviews.
+            return
+        histogram = dict(product.rating_histogram or {})
+        if removed is not None:
+            key = _key(removed)
+            product.rating_count = max(product.rating_count - 1, 0)
+            product.rating_sum = Decimal(product.rating_sum) - Decimal(removed)
+            if histogram.get(key, 0) > 1:
+                histogram[key] -= 1
+            else:
+                histogram.pop(key, None)
+        if added is not None:
+            key = _key(added)
+            product.rating_count += 1
+            product.rating_sum = Decimal(product.rating_sum) + Decimal(added)
+            histogram[key] = histogram.get(key, 0) + 1
+        product.rating_histogram = histogram
+        _set_average(product)
+        product.save(update_fields=RATING_FIELDS)
+
+
+def recompute_ratings(product_ids=None):
+    """
+    Rebuild the aggregates from ProductReview with one grouped query.
+    Pass product ids to limit the repair; returns the number of products updated.
+    """
+    reviews = ProductReview.objects.filter(is_approved=True, is_hidden=False)
+    products = Product.objects.only('pk', *RATING_FIELDS).order_by('pk')
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        reviews = reviews.filter(product_id__in=product_ids)
+        products = products.filter(pk__in=product_ids)
+
+    stats = {}
+    rows = reviews.values('product_id', 'rating').annotate(n=Count('id'), total=Sum('rating'))
+    for row in rows.order_by():
+        entry = stats.setdefault(row['product_id'], {'count': 0, 'sum': Decimal('0'), 'histogram': {}})
+        entry['count'] += row['n']
+        entry['sum'] += Decimal(row['total'])
+        entry['histogram'][_key(row['rating'])] = row['n']
+
+    changed = []
+    for product in products.iterator(chunk_size=2000):
+        entry = stats.get(product.pk, {'count': 0, 'sum': Decimal('0'), 'histogram': {}})
+        before = [getattr(product, field) for field in RATING_FIELDS]
+        product.rating_count = entry['count']
+        product.rating_sum = entry['sum']
+        product.rating_histogram = entry['histogram']
+        _set_average(product)
+        if [getattr(product, field) for field in RATING_FIELDS] != before:
+            changed.append(product)
+    Product.objects.bulk_update(changed, RATING_FIELDS, batch_size=1000)
+    Product.touch(product.pk for product in changed)
+    return len(changed)
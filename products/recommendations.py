@@ -0,0 +1,176 @@
+"""
+Precomputed personalized recommendations.
+
+refresh_recommendations() scores candidate products for recently active users
+in batches of BATCH_SIZE:
+
+* co-purchase neighbors (products/copurchase.py) of products they bought or
+  wishlisted, weighted by neighbor similarity;
+* the trending products of their ConsumerProfile.favorite_categories and of
+  the categories they have bought from (including subcategories).
+
+Products they already bought or wishlisted, drafts and their own listings
+are skipped. The best RECOMMENDATION_COUNT ids per user are cached for
+CACHE_TIMEOUT, and get_recommendation_ids() falls back to the globally
+popular list for anyone without one (new users, or inactive ones whose entry
+expired).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from monitoring.metrics import record_cache
+from orders.models import LineItem
+
+from .categories import get_category_node
+from .models import Product, ProductNeighbor
+from .models_wishlist import Wishlist
+
+RECOMMENDATION_COUNT = 8
+BATCH_SIZE = 500
+ACTIVE_DAYS = 30
+CATEGORY_TOP_N = 10
+CACHE_TIMEOUT = 3 * 60 * 60  # the beat task refreshes hourly
+POPULAR_TIMEOUT = 10 * 60
+USER_KEY = 'recs:user:%d'
+POPULAR_KEY = 'recs:popular'
+
+# Weights of each signal
+BOUGHT_NEIGHBOR = 3.0
+WISHLIST_NEIGHBOR = 2.0
+FAVORITE_CATEGORY = 1.0
+BOUGHT_CATEGORY = 0.5
+
+
+def _with_descendants(category_ids):
+    expanded = set()
+    stack = [get_category_node(pk) for pk in category_ids]
+    while stack:
+        node = stack.pop()
+        if node is not None and node['id'] not in expanded:
+            expanded.add(node['id'])
+            stack.extend(node['children'])
+    return expanded
+
+
+def _category_top_products(category_ids, top_n=CATEGORY_TOP_N):
+    """``{category_id: [product_id, ...]}``, each list the category's top *top_n* by trending score."""
+    if not category_ids:
+        return {}
+    ranked = (
+        Product.objects.filter(draft=False, category_id__in=category_ids)
+        .annotate(position=Window(
+            RowNumber(), partition_by=F('category_id'),
+            order_by=[F('trending_score').desc(), F('purchase_count').desc(), F('id').desc()],
+        ))
+        .filter(position__lte=top_n)
+        .order_by('category_id', 'position')
+        .values_list('category_id', 'id')
+    )
+    top = defaultdict(list)
+    for category_id, product_id in ranked:
+        top[category_id].append(product_id)
+    return top
+
+
+def compute_recommendations(user_ids, count=RECOMMENDATION_COUNT):
+    """``{user_id: [product_id, ...]}`` best first, for a batch of users."""
+    from accounts.models import ConsumerProfile
+
+    user_ids = list(user_ids)
+    bought = defaultdict(set)
+    purchases = LineItem.objects.filter(order__consumer_id__in=user_ids, product__isnull=False)
+    for user_id, product_id, category_id in purchases.values_list(
+            'order__consumer_id', 'product_id', 'product__category_id'):
+        bought[user_id].add((product_id, category_id))
+    wished = defaultdict(set)
+    wishlisted = Wishlist.products.through.objects.filter(wishlist__user_id__in=user_ids)
+    for user_id, product_id in wishlisted.values_list('wishlist__user_id', 'product_id'):
+        wished[user_id].add(product_id)
+    favorites = defaultdict(set)
+    for user_id, category_id in ConsumerProfile.favorite_categories.through.objects.filter(
+            consumerprofile__user_id__in=user_ids).values_list('consumerprofile__user_id', 'category_id'):
+        favorites[user_id].add(category_id)
+
+    seeds = ({pid for items in bought.values() for pid, _ in items}
+             | {pid for items in wished.values() for pid in items})
+    neighbors = defaultdict(list)
+    for product_id, neighbor_id, score in ProductNeighbor.objects.filter(product_id__in=seeds).values_list(
+            'product_id', 'neighbor_id', 'score'):
+        neighbors[product_id].append((neighbor_id, score))
+
+    user_categories = {}
+    for user_id in user_ids:
+        user_categories[user_id] = (
+            _with_descendants(favorites[user_id]),
+            _with_descendants({category_id for _, category_id in bought[user_id] if category_id}),
+        )
+    all_categories = set().union(*(fav | purchased for fav, purchased in user_categories.values()))
+    category_top = _category_top_products(all_categories)
+
+    scores = {}
+    for user_id in user_ids:
+        score = defaultdict(float)
+        for product_id, _ in bought[user_id]:
+            for neighbor_id, similarity in neighbors[product_id]:
+                score[neighbor_id] += BOUGHT_NEIGHBOR * similarity
+        for product_id in wished[user_id]:
+            for neighbor_id, similarity in neighbors[product_id]:
+                score[neighbor_id] += WISHLIST_NEIGHBOR * similarity
+        fav, purchased = user_categories[user_id]
+        for weight, categories in ((FAVORITE_CATEGORY, fav), (BOUGHT_CATEGORY, purchased)):
+            for category_id in categories:
+                ranked = category_top.get(category_id, [])
+                for position, product_id in enumerate(ranked):
+                    score[product_id] += weight * (1 - position / len(ranked))
+        for product_id in {pid for pid, _ in bought[user_id]} | wished[user_id]:
+            score.pop(product_id, None)
+        scores[user_id] = score
+
+    candidates = set().union(*scores.values()) if scores else set()
+    published = dict(Product.objects.filter(pk__in=candidates, draft=False).values_list('pk', 'seller__user_id'))
+    return {
+        user_id: sorted(
+            (pid for pid in score if pid in published and published[pid] != user_id),
+            key=lambda pid: (-score[pid], -pid),
+        )[:count]
+        for user_id, score in scores.items()
+    }
+
+
+def refresh_recommendations(active_days=ACTIVE_DAYS, batch_size=BATCH_SIZE):
+    """Recompute and cache recommendations for users active in the last *active_days*; returns users cached."""
+    since = timezone.now() - timedelta(days=active_days)
+    user_ids = list(
+        get_user_model().objects.filter(is_active=True, last_login__gte=since)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    cached = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = compute_recommendations(user_ids[start:start + batch_size])
+        cache.set_many({USER_KEY % user_id: ids for user_id, ids in batch.items() if ids}, CACHE_TIMEOUT)
+        cached += sum(1 for ids in batch.values() if ids)
+    return cached
+
+
+def popular_ids(count=RECOMMENDATION_COUNT):
+    def compute():
+        return list(
+            Product.objects.filter(draft=False)
+            .order_by('-trending_score', '-purchase_count', '-id')
+            .values_list('pk', flat=True)[:count]
+        )
+    return cache.get_or_set(POPULAR_KEY, compute, POPULAR_TIMEOUT)
+
+
+def get_recommendation_ids(user, count=RECOMMENDATION_COUNT):
+    """The user's precomputed list, or the popular fallback (no scoring at request time)."""
+    ids = cache.get(USER_KEY % user.pk) if user.is_authenticated else None
+    if user.is_authenticated:
+        record_cache('recommendations', int(bool(ids)), int(not ids))
+    return (ids or popular_ids())[:count]
@@ -0,0 +1,211 @@
+"""
+Full-text search over the product catalog.
+
+Each product gets one search document built from its name, tags, category name
+and description (weighted in that order). The document lives in a side table
+that is kept in sync by products/signals.py:
+
+- Postgres: ``products_productsearch`` holds a weighted ``tsvector`` with a GIN index.
+- SQLite: ``products_productfts`` is an FTS5 virtual table keyed by the product id.
+
+Both tables are mapped by unmanaged models (products/models_search.py), so a
+search joins its side table once and ranks the matched rows in the same pass.
+Other backends (or SQLite builds without FTS5) fall back to ``icontains`` filters.
+"""
+import math
+import time
+
+from django.db import connection
+from django.db.models import FloatField, Func, Lookup, Q, Value
+
+from .models_search import SearchDocumentField
+from .models_tag import ProductTag
+
+POSTGRES_TABLE = 'products_productsearch'
+SQLITE_TABLE = 'products_productfts'
+POSTGRES_CONFIG = 'english'
+
+# bm25() column weights for the FTS5 table: name, tags, category, description
+SQLITE_WEIGHTS = '10.0, 5.0, 3.0, 1.0'
+
+# How long a missing FTS table is trusted before it is looked up again
+FALLBACK_RECHECK_SECONDS = 300
+
+_backend_cache = {}
+
+
+class _SearchMatch(Lookup):
+    template = None
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return self.template % (lhs, rhs), (*lhs_params, *rhs_params)
+
+
+@SearchDocumentField.register_lookup
+class FTS5Match(_SearchMatch):
+    lookup_name = 'fts5_match'
+    template = '%s MATCH %s'
+
+
+@SearchDocumentField.register_lookup
+class TSQueryMatch(_SearchMatch):
+    lookup_name = 'tsquery_match'
+    template = f"%s @@ websearch_to_tsquery('{POSTGRES_CONFIG}', %s)"
+
+
+def _backend():
+    """Return 'postgres', 'sqlite' or 'fallback' for the default connection."""
+    alias = connection.alias
+    cached = _backend_cache.get(alias)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    expires = math.inf
+    if connection.vendor == 'postgresql':
+        backend = 'postgres'
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        if SQLITE_TABLE in tables:
+            backend = 'sqlite'
+        else:
+            # The table may appear once migrations have run (see reset_backend()).
+            backend = 'fallback'
+            expires = time.monotonic() + FALLBACK_RECHECK_SECONDS
+    else:
+        backend = 'fallback'
+    _backend_cache[alias] = (backend, expires)
+    return backend
+
+
+def reset_backend():
+    """Forget the detected backends; called after migrations and before rebuilds."""
+    _backend_cache.clear()
+
+
+def build_document(product):
+    """Return the (name, tags, category, description) texts indexed for *product*."""
+    category = product.category.name if product.category_id else ''
+    tags = ' '.join(tag.name for tag in product.tags.all())
+    return (
+        product.name or '',
+        tags,
+        category,
+        product.description or '',
+    )
+
+
+def _fts5_query(query):
+    # Quote every term so user input can never be parsed as FTS5 syntax, and
+    # allow prefix matches ("drag" finds "dragon").
+    terms = [t.replace('"', '""') for t in query.split() if t.strip('"')]
+    return ' '.join('"%s"*' % t for t in terms)
+
+
+def search_products(queryset, query):
+    """
+    Restrict a Product queryset to matches for *query*.
+
+    The result is annotated with ``search_rank`` (higher is more relevant);
+    callers decide whether to order by it.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    backend = _backend()
+    if backend == 'postgres':
+        tsquery = Func(Value(query), template=f"websearch_to_tsquery('{POSTGRES_CONFIG}', %(expressions)s)")
+        return queryset.filter(search_document__document__tsquery_match=query).annotate(
+            search_rank=Func('search_document__document', tsquery, function='ts_rank',
+                             output_field=FloatField())
+        )
+    elif backend == 'sqlite':
+        fts_query = _fts5_query(query)
+        if not fts_query:
+            return queryset.none()
+        # bm25() is only valid on the joined row that MATCH produced, so the
+        # filter and the rank share the single join to the FTS table.
+        return queryset.filter(fts_document__document__fts5_match=fts_query).annotate(
+            search_rank=Func('fts_document__document', template=f'-bm25(%(expressions)s, {SQLITE_WEIGHTS})',
+                             output_field=FloatField())
+        )
+    else:
+        return queryset.filter(
+            Q(name__icontains=query)
+            | Q(description__icontains=query)
+            | Q(pk__in=ProductTag.objects.filter(tag__name__icontains=query).values('product_id'))
+            | Q(category__name__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_products(products):
+    """Insert or refresh the search documents for an iterable of products."""
+    backend = _backend()
+    if backend == 'fallback':
+        return
+    rows = [(p.pk, *build_document(p)) for p in products]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if backend == 'postgres':
+            cursor.executemany(
+                f"INSERT INTO {POSTGRES_TABLE} (product_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'B') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'C') || "
+                f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'D')) "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+        else:
+            cursor.executemany(
+                f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_TABLE} (rowid, name, tags, category, description) "
+                f"VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+
+def index_product(product):
+    index_products([product])
+
+
+def unindex_product(product_id):
+    backend = _backend()
+    if backend == 'fallback':
+        return
+    with connection.cursor() as cursor:
+        if backend == 'postgres':
+            cursor.execute(f"DELETE FROM {POSTGRES_TABLE} WHERE product_id = %s", [product_id])
+        else:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index(chunk_size=2000):
+    """Rebuild every search document from scratch. Returns the number of products indexed."""
+    from .models import Product
+
+    reset_backend()
+    backend = _backend()
+    if backend == 'fallback':
+        return 0
+    with connection.cursor() as cursor:
+        if backend == 'postgres':
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+        else:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+    total = 0
+    batch = []
+    products = Product.objects.select_related('category').prefetch_related('tags').order_by('pk')
+    for product in products.iterator(chunk_size=chunk_size):
+        batch.append(product)
+        if len(batch) >= chunk_size:
+            index_products(batch)
+            total += len(batch)
+            batch = []
+    index_products(batch)
+    return total + len(batch)
@@ -0,0 +1,199 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from products.models import Category, Media, Product, ProductReview, ProductTag, ProductVariant
+from products import ratings, search
+from products.categories import invalidate_category_tree
+from products.tags import invalidate_tag_cloud
+from products.versioning import catalog_changed
+
+
+SEARCH_FIELDS = {'name', 'description', 'category', 'category_id'}
+
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    search.index_product(instance)
+
+
+@receiver(post_migrate)
+def reset_search_backend(sender, **kwargs):
+    # migrate may have just created (or dropped) the search table
+    search.reset_backend()
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(m2m_changed, sender=Product.media.through)
+def remember_cleared_products(sender, instance, action, reverse, **kwargs):
+    # post_clear carries no pk_set: note the products a reverse clear()
+    # (tag.products.clear(), media.product_set.clear()) is about to detach.
+    if action == 'pre_clear' and reverse:
+        field = 'tags' if sender is Product.tags.through else 'media'
+        instance._cleared_product_ids = set(
+            Product.objects.filter(**{field: instance}).values_list('pk', flat=True)
+        )
+
+
+def _reverse_product_ids(instance, action, pk_set):
+    if action == 'post_clear':
+        return getattr(instance, '_cleared_product_ids', set())
+    return pk_set or ()
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def reindex_product_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # tag.products.add(...) / remove(...) / clear(): reindex the affected products
+        products = Product.objects.filter(pk__in=_reverse_product_ids(instance, action, pk_set))
+        search.index_products(products.select_related('category').prefetch_related('tags'))
+    else:
+        search.index_product(instance)
+
+
+@receiver(post_save, sender=ProductTag)
+@receiver(post_delete, sender=ProductTag)
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_tag_cloud_on_change(sender, raw=False, action=None, **kwargs):
+    if raw or action in ('pre_add', 'pre_remove', 'pre_clear'):
+        return
+    invalidate_tag_cloud()
+    transaction.on_commit(invalidate_tag_cloud)
+
+
+@receiver(post_save, sender=ProductTag)
+@receiver(post_delete, sender=ProductTag)
+def reindex_product_on_product_tag_change(sender, instance, raw=False, **kwargs):
+    # Direct ProductTag saves/deletes (admin inline, cascades) bypass m2m_changed.
+    if raw:
+        return
+    products = Product.objects.filter(pk=instance.product_id).select_related('category')
+    transaction.on_commit(lambda: search.index_products(products.prefetch_related('tags')))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product_on_delete(sender, instance, **kwargs):
+    search.unindex_product(instance.pk)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_name(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_name = (
+            Category.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Category)
+def reindex_products_on_category_rename(sender, instance, created, raw=False, **kwargs):
+    if raw or created or getattr(instance, '_previous_name', instance.name) == instance.name:
+        return
+    products = Product.objects.filter(category=instance).select_related('category').prefetch_related('tags')
+    transaction.on_commit(lambda: search.index_products(products.iterator()))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree_on_change(sender, **kwargs):
+    # Drop it now for this request, and again after commit so other processes
+    # cannot rebuild from pre-commit data and keep it.
+    invalidate_category_tree()
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(pre_delete, sender=Category)
+def reindex_products_on_category_delete(sender, instance, **kwargs):
+    # Products keep their row (category is SET_NULL) but lose the category text.
+    product_ids = list(Product.objects.filter(category=instance).values_list('pk', flat=True))
+    if product_ids:
+        products = Product.objects.filter(pk__in=product_ids).select_related('category').prefetch_related('tags')
+        transaction.on_commit(lambda: search.index_products(products.iterator()))
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_state(sender, instance, raw=False, **kwargs):
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        previous = (
+            ProductReview.objects.filter(pk=instance.pk)
+            .values('product_id', 'rating', 'is_approved', 'is_hidden')
+            .first()
+        )
+        if previous and previous['is_approved'] and not previous['is_hidden']:
+            instance._previous_rating = (previous['product_id'], previous['rating'])
+
+
+@receiver(post_save, sender=ProductReview)
+def update_ratings_on_review_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    added = instance.rating if ratings.is_counted(instance) else None
+    if previous and previous[0] != instance.product_id:
+        ratings.apply_rating_delta(previous[0], removed=previous[1])
+        previous = None
+    ratings.apply_rating_delta(instance.product_id, removed=previous[1] if previous else None, added=added)
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_ratings_on_review_delete(sender, instance, **kwargs):
+    if ratings.is_counted(instance):
+        ratings.apply_rating_delta(instance.product_id, removed=instance.rating)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductTag)
+@receiver(post_delete, sender=ProductTag)
+@receiver(post_save, sender=Media)
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(m2m_changed, sender=Product.media.through)
+def bump_catalog_version_on_change(sender, raw=False, **kwargs):
+    if raw:
+        return
+    catalog_changed()
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+@receiver(post_save, sender=ProductTag)
+@receiver(post_delete, sender=ProductTag)
+def touch_product_on_related_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Product.touch([instance.product_id])
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(m2m_changed, sender=Product.media.through)
+def touch_products_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # media.product_set.add(...) / tag.products.add(...)
+        Product.touch(_reverse_product_ids(instance, action, pk_set))
+    else:
+        Product.touch([instance.pk])
+
+
+@receiver(post_save, sender=Media)
+def touch_products_on_media_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    Product.touch(Product.objects.filter(media=instance).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Media)
+def touch_products_on_media_delete(sender, instance, **kwargs):
+    # The through rows go with the cascade, without an m2m_changed signal.
+    Product.touch(Product.objects.filter(media=instance).values_list('pk', flat=True))
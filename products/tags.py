@@ -0,0 +1,98 @@
+"""
+Helpers around the normalized Tag / ProductTag tables.
+
+Tag filtering goes through the (tag, product) index on ProductTag rather than
+substring matches, so "pla" no longer matches "plate". The catalog-wide tag
+cloud is cached next to the facets and dropped by products/signals.py
+whenever product tags change.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from monitoring.metrics import record_cache
+from .facets import FACET_CACHE_TIMEOUT
+from .models_tag import ProductTag, Tag
+
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+TAG_CLOUD_KEY = 'facets:tag_cloud'
+
+
+def normalize_tag(name):
+    return ' '.join(name.split()).lower()[:TAG_MAX_LENGTH]
+
+
+def parse_tags(value):
+    """Split a comma-separated string (or an iterable of names) into unique normalized names."""
+    if isinstance(value, str):
+        value = value.split(',')
+    names = []
+    for name in value or ():
+        name = normalize_tag(name)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(names):
+    names = parse_tags(names)
+    if not names:
+        return []
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    return list(Tag.objects.filter(name__in=names))
+
+
+def set_product_tags(product, names):
+    """Replace the tags of *product* with *names*."""
+    product.tags.set(get_or_create_tags(names))
+
+
+def filter_by_tags(queryset, names, match='all'):
+    """
+    Restrict a Product queryset to products carrying the given tags.
+
+    ``match='all'`` keeps products that have every tag (intersection),
+    ``match='any'`` keeps products with at least one of them (union). Both
+    are a single indexed subquery on ProductTag.
+    """
+    names = parse_tags(names)
+    if not names:
+        return queryset
+    matches = ProductTag.objects.filter(tag__name__in=names)
+    if match == 'all' and len(names) > 1:
+        matches = (
+            matches.values('product_id')
+            .annotate(matched=Count('tag_id'))
+            .filter(matched=len(names))
+        )
+    return queryset.filter(pk__in=matches.values('product_id'))
+
+
+def tag_cloud(products=None, limit=30):
+    """
+    Return ``[{'name': ..., 'count': ...}]`` for the most used tags, in one GROUP BY.
+
+    When *products* is given, only tags on those products are counted.
+    """
+    rows = ProductTag.objects.all()
+    if products is not None:
+        rows = rows.filter(product__in=products.order_by().values('pk'))
+    rows = (
+        rows.values('tag__name')
+        .annotate(count=Count('product_id'))
+        .order_by('-count', 'tag__name')[:limit]
+    )
+    return [{'name': row['tag__name'], 'count': row['count']} for row in rows]
+
+
+def get_tag_cloud(timeout=FACET_CACHE_TIMEOUT):
+    """tag_cloud() for the whole catalog, cached until tags change."""
+    cloud = cache.get(TAG_CLOUD_KEY)
+    record_cache('facets', int(cloud is not None), int(cloud is None))
+    if cloud is None:
+        cloud = tag_cloud()
+        cache.set(TAG_CLOUD_KEY, cloud, timeout)
+    return cloud
+
+
+def invalidate_tag_cloud():
+    cache.delete(TAG_CLOUD_KEY)
@@ -0,0 +1,27 @@
+from celery import shared_task
+
+from .copurchase import rebuild_neighbors
+from .counters import flush_counters
+from .recommendations import refresh_recommendations
+from .trending import prune_activity, update_trending_scores
+
+
+@shared_task
+def flush_popularity_counters():
+    return flush_counters()
+
+
+@shared_task
+def refresh_trending_scores():
+    prune_activity()
+    return update_trending_scores()
+
+
+@shared_task
+def rebuild_copurchase_neighbors():
+    return rebuild_neighbors()
+
+
+@shared_task
+def refresh_user_recommendations():
+    return refresh_recommendations()
@@ -0,0 +1,29 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from products.cards import get_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def product_card(context, product):
+    """The cached card from the view's ``cards`` (see products/cards.py) plus the viewer's wishlist heart."""
+    product_id = product['id'] if isinstance(product, dict) else product.pk
+    cards = context.get('cards') or {}
+    html = cards.get(product_id) or get_cards([product]).get(product_id, '')
+
+    wishlist_ids = context.get('wishlist_product_ids')
+    user = context.get('user')
+    if wishlist_ids is None or not (user and user.is_authenticated):
+        return html
+    if product_id in wishlist_ids:
+        url, style, title, icon = 'products:remove_from_wishlist', 'text-danger', 'Remove from wishlist', '\u2764'
+    else:
+        url, style, title, icon = 'products:add_to_wishlist', 'text-muted', 'Add to wishlist', '\u2661'
+    heart = format_html(
+        '<a href="{}" class="position-absolute top-0 end-0 m-2 fs-4 text-decoration-none {}" title="{}">{}</a>',
+        reverse(url, args=[product_id]), style, title, icon,
+    )
+    return format_html('<div class="position-relative h-100">{}{}</div>', html, heart)
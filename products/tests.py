@@ -0,0 +1,522 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from orders.models import LineItem, Order
+from sellers.models import Seller
+from utils import process_cache
+from . import counters, search
+from .copurchase import compute_neighbors, get_neighbors, rebuild_neighbors
+from .facets import TOP_SELLERS, _price_q, compute_facets, filter_key, get_facets
+from .models import Category, CounterFlush, Product, ProductFTS, ProductNeighbor, ProductReview, Tag
+from .pagination import KeysetPaginator
+from .search import search_products
+from .tags import filter_by_tags, get_tag_cloud, set_product_tags
+from .views.views import PRODUCT_LIST_ORDERINGS
+from .ratings import RATING_FIELDS, recompute_ratings
+from .recommendations import USER_KEY, compute_recommendations, get_recommendation_ids
+
+
+def _aggregates(product):
+    product.refresh_from_db()
+    return {field: getattr(product, field) for field in RATING_FIELDS}
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        self.owner = User.objects.create_superuser(username='owner', password='pw', is_owner=True)
+        self.buyers = [User.objects.create_user(username=f'buyer{i}') for i in range(3)]
+        seller = Seller.objects.create(user=User.objects.create_user(username='seller'))
+        self.product = Product.objects.create(name='Vase', description='desc', seller=seller, price=10)
+
+    def review(self, user, rating, approved=True):
+        return ProductReview.objects.create(product=self.product, user=user, rating=Decimal(rating),
+                                            title='t', body='b', is_approved=approved)
+
+    def test_deltas_follow_approve_hide_edit_and_delete(self):
+        first = self.review(self.buyers[0], '4.0')
+        pending = self.review(self.buyers[1], '2.0', approved=False)
+        self.assertEqual(_aggregates(self.product)['rating_count'], 1)
+
+        pending.is_approved = True
+        pending.save()
+        aggregates = _aggregates(self.product)
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_avg']), (2, Decimal('3.00')))
+        self.assertEqual(aggregates['rating_histogram'], {'4.0': 1, '2.0': 1})
+
+        first.rating = Decimal('5.0')
+        first.save()
+        aggregates = _aggregates(self.product)
+        self.assertEqual((aggregates['rating_avg'], aggregates['rating_histogram']),
+                         (Decimal('3.50'), {'5.0': 1, '2.0': 1}))
+
+        pending.is_hidden = True
+        pending.save()
+        aggregates = _aggregates(self.product)
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_avg']), (1, Decimal('5.00')))
+
+        first.delete()
+        aggregates = _aggregates(self.product)
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_avg'], aggregates['rating_histogram']),
+                         (0, Decimal('0'), {}))
+
+    def test_admin_actions_recompute_aggregates(self):
+        reviews = [self.review(buyer, rating, approved=False) for buyer, rating in zip(self.buyers, ('3.0', '4.0', '5.0'))]
+        self.client.force_login(self.owner)
+        url = reverse('admin:products_productreview_changelist')
+        self.client.post(url, {'action': 'approve_reviews', '_selected_action': [r.pk for r in reviews]})
+        aggregates = _aggregates(self.product)
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_avg']), (3, Decimal('4.00')))
+
+        self.client.post(url, {'action': 'hide_reviews', '_selected_action': [reviews[2].pk]})
+        aggregates = _aggregates(self.product)
+        self.assertEqual((aggregates['rating_count'], aggregates['rating_avg']), (2, Decimal('3.50')))
+
+    def test_recompute_matches_incremental_updates(self):
+        reviews = [self.review(buyer, rating) for buyer, rating in zip(self.buyers, ('1.5', '4.5', '4.5'))]
+        reviews[0].rating = Decimal('3.0')
+        reviews[0].save()
+        reviews[1].is_hidden = True
+        reviews[1].save()
+        reviews[2].delete()
+        incremental = _aggregates(self.product)
+
+        Product.objects.filter(pk=self.product.pk).update(
+            rating_avg=0, rating_count=0, rating_sum=0, rating_histogram={})
+        self.assertEqual(recompute_ratings([self.product.pk]), 1)
+        self.assertEqual(_aggregates(self.product), incremental)
+        self.assertEqual(recompute_ratings(), 0)
+
+    def test_product_list_ignores_invalid_min_rating(self):
+        self.review(self.buyers[0], '2.0')
+        url = reverse('products:product_list')
+        for value in ('NaN', 'Infinity', '-1', '7', 'abc'):
+            response = self.client.get(url, {'min_rating': value})
+            self.assertEqual(response.status_code, 200, value)
+            self.assertContains(response, 'Vase')
+        self.assertNotContains(self.client.get(url, {'min_rating': '3'}), 'Vase')
+
+
+class CatalogApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        self.buyer = User.objects.create_user(username='buyer')
+        seller = Seller.objects.create(user=User.objects.create_user(username='seller'))
+        self.product = Product.objects.create(name='Vase', description='desc', seller=seller, price=10,
+                                              is_physical=True, inventory=5)
+        self.list_url = reverse('api:product-list')
+        self.detail_url = reverse('api:product-detail', args=[self.product.pk])
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_ACCEPT': 'application/json'}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(url, **headers)
+
+    def test_list_and_detail_payloads(self):
+        results = self.get(self.list_url).json()['results']
+        self.assertEqual([row['id'] for row in results], [self.product.pk])
+        self.assertEqual(results[0]['seller'], {'id': self.product.seller_id, 'username': 'seller'})
+        detail = self.get(self.detail_url).json()
+        self.assertEqual((detail['name'], detail['price'], detail['rating_count']), ('Vase', '10.00', 0))
+        self.assertEqual(self.get(self.list_url + '?fields=id,name').json()['results'],
+                         [{'id': self.product.pk, 'name': 'Vase'}])
+
+    def test_conditional_get_revalidates_until_ratings_change(self):
+        review = ProductReview.objects.create(product=self.product, user=self.buyer, rating=Decimal('4.0'),
+                                              title='t', body='b')
+        etags = {url: self.get(url)['ETag'] for url in (self.list_url, self.detail_url)}
+        for url, etag in etags.items():
+            self.assertTrue(etag)
+            self.assertEqual(self.get(url, etag).status_code, 304)
+
+        # Admin approval goes through queryset.update() and recompute_ratings.
+        ProductReview.objects.filter(pk=review.pk).update(is_approved=True)
+        recompute_ratings([self.product.pk])
+        for url, etag in etags.items():
+            response = self.get(url, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.get(self.detail_url).json()['rating_count'], 1)
+
+    def test_etag_follows_viewer_and_stock_updates(self):
+        from orders.checkout import place_order
+
+        etag = self.get(self.list_url)['ETag']
+        self.client.force_login(self.buyer)
+        self.assertNotEqual(self.get(self.list_url)['ETag'], etag)
+        etag = self.get(self.list_url)['ETag']
+        place_order(self.buyer, {str(self.product.pk): 2})
+        self.assertEqual(self.get(self.list_url, etag).status_code, 200)
+
+
+def _at(bucket):
+    """Pin the counter buffer's clock to *bucket*."""
+    return mock.patch('products.counters.current_bucket', lambda now=None: bucket)
+
+
+class PopularityCounterTests(TestCase):
+    BUCKET = 30_000_000
+
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        self.viewers = [User.objects.create_user(username=f'viewer{i}') for i in range(2)]
+        seller = Seller.objects.create(user=User.objects.create_user(username='seller'))
+        self.product = Product.objects.create(name='Vase', description='desc', seller=seller, price=10)
+
+    def flush(self, bucket):
+        with _at(bucket):
+            return counters.flush_counters()
+
+    def views(self):
+        self.product.refresh_from_db()
+        return self.product.view_count
+
+    def test_repeat_views_in_a_session_count_once(self):
+        url = reverse('products:product_detail', args=[self.product.pk])
+        with _at(self.BUCKET):
+            self.client.force_login(self.viewers[0])
+            self.client.get(url)
+            self.client.get(url)
+            other = self.client_class()
+            other.force_login(self.viewers[1])
+            other.get(url)
+        self.flush(self.BUCKET + 2)
+        self.assertEqual(self.views(), 2)
+
+    def test_detail_page_revalidates_and_counts_views_on_304(self):
+        url = reverse('products:product_detail', args=[self.product.pk])
+        self.client.force_login(self.viewers[0])
+        with mock.patch.object(counters, 'record_view', wraps=counters.record_view) as record_view:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(record_view.call_count, 2)
+
+            self.product.name = 'Renamed'
+            self.product.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertContains(response, 'Renamed')
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertEqual(record_view.call_count, 3)
+
+    def test_rerunning_a_flush_never_counts_a_bucket_twice(self):
+        with _at(self.BUCKET):
+            counters.record('view_count', self.product.pk, 3)
+        # The first flush commits but dies before clearing the buffer.
+        with mock.patch.object(counters.cache, 'delete_many'):
+            self.assertEqual(self.flush(self.BUCKET + 2), 1)
+        self.assertEqual(CounterFlush.objects.get().bucket, self.BUCKET)
+        self.assertEqual(self.flush(self.BUCKET + 2), 0)
+        # A concurrent flush that read the log before the first one committed
+        # reaches the bucket anyway and is stopped by its CounterFlush row.
+        with mock.patch.object(CounterFlush.objects, 'order_by') as order_by:
+            order_by.return_value.values_list.return_value.first.return_value = None
+            self.assertEqual(self.flush(self.BUCKET + 2), 0)
+        self.assertEqual(self.views(), 3)
+
+    def test_counts_buffered_during_a_flush_are_kept(self):
+        with _at(self.BUCKET):
+            counters.record('view_count', self.product.pk)
+        apply = counters._apply
+
+        def apply_while_viewing(bucket, deltas):
+            counters.record('view_count', self.product.pk)  # lands in the current, unsettled bucket
+            apply(bucket, deltas)
+
+        with mock.patch.object(counters, '_apply', apply_while_viewing):
+            self.flush(self.BUCKET + 2)
+        self.assertEqual(self.views(), 1)
+        self.flush(self.BUCKET + 4)
+        self.assertEqual(self.views(), 2)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        seller = Seller.objects.create(user=get_user_model().objects.create_user(username='seller'))
+        # Every sort key repeats, so pages must split ties on the id tiebreaker.
+        for i in range(11):
+            Product.objects.create(
+                name=('Vase', 'Vase', 'Bowl')[i % 3], description='printed vase', seller=seller,
+                price=(5, 5, 7)[i % 3], view_count=i % 2, purchase_count=i % 2, trending_score=i % 3,
+                rating_avg=(4, 4, 3)[i % 3], rating_count=i % 2 + 1,
+            )
+        self.published = Product.objects.filter(draft=False)
+
+    def walk(self, queryset, ordering, keyset=True):
+        """Ids per page walking forward from page 1, then back from the last page."""
+        factory = RequestFactory()
+        paginator = KeysetPaginator(queryset, ordering, 3, max_numbered_pages=1, keyset=keyset)
+        forward = [paginator.page(factory.get('/'))]
+        while forward[-1].next_url:
+            forward.append(paginator.page(factory.get('/' + forward[-1].next_url)))
+        backward = [forward[-1]]
+        while backward[-1].previous_url:
+            backward.append(paginator.page(factory.get('/' + backward[-1].previous_url)))
+        return [[p.pk for p in page] for page in forward], [[p.pk for p in page] for page in reversed(backward)]
+
+    def test_cursors_round_trip_on_every_ordering(self):
+        for sort, ordering in PRODUCT_LIST_ORDERINGS.items():
+            with self.subTest(sort=sort):
+                keyset = sort != 'relevance'
+                queryset = search_products(self.published, 'vase') if sort == 'relevance' else self.published
+                forward, backward = self.walk(queryset, ordering, keyset=keyset)
+                expected = list(queryset.order_by(*ordering).values_list('pk', flat=True))
+                self.assertEqual(len(forward), 4)
+                self.assertEqual([pk for page in forward for pk in page], expected)
+                self.assertEqual(backward, forward)
+
+    def test_bad_cursors_fall_back_to_the_first_page(self):
+        url = reverse('products:product_list')
+        first = [p.pk for p in self.client.get(url, {'sort': 'name'}).context['products']]
+        factory = RequestFactory()
+        page = KeysetPaginator(self.published, PRODUCT_LIST_ORDERINGS['price_asc'], 3,
+                               max_numbered_pages=1).page(factory.get('/'))
+        foreign = QueryDict(page.next_url[1:])['cursor']
+        for cursor in ('garbage', foreign, foreign[:-3] + 'abc'):
+            response = self.client.get(url, {'sort': 'name', 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([p.pk for p in response.context['products']], first)
+
+    def test_deep_numbered_pages_are_not_served(self):
+        url = reverse('products:product_list')
+        self.assertEqual(self.client.get(url, {'page': 5}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'page': 6}).status_code, 404)
+
+
+class ProductTagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        seller = Seller.objects.create(user=get_user_model().objects.create_user(username='seller'))
+        self.vase = Product.objects.create(name='Vase', description='desc', seller=seller, price=10)
+        self.bowl = Product.objects.create(name='Bowl', description='desc', seller=seller, price=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            set_product_tags(self.vase, 'garden, pla')
+            set_product_tags(self.bowl, 'pla, kitchen')
+
+    def names(self, queryset):
+        return sorted(queryset.values_list('name', flat=True))
+
+    def test_filter_by_tags_all_and_any(self):
+        products = Product.objects.all()
+        self.assertEqual(self.names(filter_by_tags(products, 'pla')), ['Bowl', 'Vase'])
+        self.assertEqual(self.names(filter_by_tags(products, 'pla, garden')), ['Vase'])
+        self.assertEqual(self.names(filter_by_tags(products, 'garden, kitchen')), [])
+        self.assertEqual(self.names(filter_by_tags(products, 'garden, kitchen', match='any')), ['Bowl', 'Vase'])
+        self.assertEqual(self.names(filter_by_tags(products, 'gard')), [])
+
+    def test_tag_changes_reindex_search(self):
+        def found():
+            return self.names(search_products(Product.objects.all(), 'pla'))
+
+        self.assertEqual(found(), ['Bowl', 'Vase'])
+        pla = Tag.objects.get(name='pla')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vase.tags.remove(pla)
+        self.assertEqual(found(), ['Bowl'])
+        with self.captureOnCommitCallbacks(execute=True):
+            pla.products.add(self.vase)
+        self.assertEqual(found(), ['Bowl', 'Vase'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bowl.tags.clear()
+        self.assertEqual(found(), ['Vase'])
+        with self.captureOnCommitCallbacks(execute=True):
+            pla.products.clear()
+        self.assertEqual(found(), [])
+
+    def test_tag_cloud_is_cached_until_tags_change(self):
+        self.assertEqual(get_tag_cloud()[0], {'name': 'pla', 'count': 2})
+        with self.assertNumQueries(0):
+            get_tag_cloud()
+        with self.captureOnCommitCallbacks(execute=True):
+            set_product_tags(self.bowl, 'kitchen')
+        self.assertEqual({row['name']: row['count'] for row in get_tag_cloud()},
+                         {'kitchen': 1, 'pla': 1, 'garden': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.get(name='kitchen').products.clear()
+        self.assertNotIn('kitchen', [row['name'] for row in get_tag_cloud()])
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        seller = Seller.objects.create(user=get_user_model().objects.create_user(username='seller'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vase = Product.objects.create(name='Dragon vase', description='tall', seller=seller, price=10)
+            self.bowl = Product.objects.create(name='Bowl', description='a vase-like bowl', seller=seller, price=10)
+
+    def found(self, query):
+        results = search_products(Product.objects.all(), query).order_by('-search_rank', '-id')
+        return [p.name for p in results]
+
+    def test_matches_are_ranked_by_weighted_field(self):
+        self.assertEqual(self.found('vase'), ['Dragon vase', 'Bowl'])
+        self.assertEqual(self.found('drag'), ['Dragon vase'])
+        self.assertEqual(self.found('"unbalanced'), [])
+
+    def test_index_follows_create_update_and_delete(self):
+        self.assertEqual(self.found('tall'), ['Dragon vase'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vase.description = 'short'
+            self.vase.save()
+        self.assertEqual(self.found('tall'), [])
+        self.assertEqual(self.found('short'), ['Dragon vase'])
+        pk = self.vase.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vase.delete()
+        self.assertFalse(ProductFTS.objects.filter(product_id=pk).exists())
+        self.assertEqual(self.found('vase'), ['Bowl'])
+
+    def test_missing_fts_table_is_not_looked_up_on_every_call(self):
+        search.reset_backend()
+        with mock.patch.object(search, 'SQLITE_TABLE', 'missing_fts'):
+            with self.assertNumQueries(1):
+                self.assertEqual(search._backend(), 'fallback')
+                self.assertEqual(search._backend(), 'fallback')
+            search.reset_backend()
+        self.assertEqual(search._backend(), 'sqlite')
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        self.parent = Category.objects.create(name='Home')
+        self.child = Category.objects.create(name='Vases', parent=self.parent)
+        self.sellers = [Seller.objects.create(user=User.objects.create_user(username=f'seller{i:02}'))
+                        for i in range(22)]
+        for i, seller in enumerate(self.sellers):
+            for j in range(3 if i < 2 else 1):
+                Product.objects.create(
+                    name=f'P{i}-{j}', description='desc', seller=seller, price=(5, 15, 30, 75, 150)[(i + j) % 5],
+                    category=(self.parent, self.child, None)[(i + j) % 3], is_physical=i % 2 == 0,
+                    is_digital=i % 2 == 1, rating_avg=(i + j) % 5, rating_count=(i + j) % 3,
+                )
+
+    def test_counts_match_the_filtered_queryset(self):
+        products = Product.objects.filter(draft=False, price__lt=100)
+        facets = compute_facets(products)
+        self.assertEqual(facets['total'], products.count())
+        categories = {node['id']: node for node in facets['categories']}
+        self.assertEqual(categories[self.parent.pk]['count'],
+                         products.filter(category__in=[self.parent, self.child]).count())
+        self.assertEqual(categories[self.parent.pk]['children'][0]['count'],
+                         products.filter(category=self.child).count())
+        for row in facets['sellers']:
+            self.assertEqual(row['count'], products.filter(seller__user_id=row['id']).count())
+        for bucket in facets['price']:
+            self.assertEqual(bucket['count'], products.filter(_price_q(bucket['min'], bucket['max'])).count())
+        self.assertEqual(facets['type'], {'digital': products.filter(is_digital=True).count(),
+                                          'physical': products.filter(is_physical=True).count()})
+        for bucket in facets['rating']:
+            self.assertEqual(bucket['count'],
+                             products.filter(rating_count__gt=0, rating_avg__gte=bucket['stars']).count())
+
+    def test_seller_facet_keeps_the_top_sellers(self):
+        sellers = compute_facets(Product.objects.all())['sellers']
+        self.assertEqual(len(sellers), TOP_SELLERS)
+        self.assertEqual([row['name'] for row in sellers[:3]], ['seller00', 'seller01', 'seller02'])
+        self.assertEqual([row['count'] for row in sellers[:3]], [3, 3, 1])
+
+    def test_cache_key_separates_filter_combinations(self):
+        self.assertNotEqual(filter_key({'q': 'vase', 'tags': 'pla'}), filter_key({'q': 'pla', 'tags': 'vase'}))
+        self.assertNotEqual(filter_key({'type': 'digital'}), filter_key({'type': 'physical'}))
+        self.assertEqual(filter_key({'q': ' Vase', 'page': '2', 'sort': 'price_asc'}), filter_key({'q': 'vase'}))
+
+        products = Product.objects.all()
+        digital = get_facets(products.filter(is_digital=True), {'type': 'digital'})
+        physical = get_facets(products.filter(is_physical=True), {'type': 'physical'})
+        self.assertNotEqual(digital['sellers'], physical['sellers'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facets(products, {'type': 'digital', 'page': '3'}), digital)
+
+
+class CoPurchaseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        seller = Seller.objects.create(user=User.objects.create_user(username='seller'))
+        self.buyer = User.objects.create_user(username='buyer')
+        self.category = Category.objects.create(name='Home')
+        self.a, self.b, self.c, self.d = [
+            Product.objects.create(name=name, description='desc', seller=seller, price=10, category=self.category,
+                                   purchase_count=count)
+            for name, count in (('A', 0), ('B', 0), ('C', 0), ('D', 5))
+        ]
+        for products in ([self.a, self.b], [self.a, self.b], [self.a, self.c], [self.b]):
+            order = Order.objects.create(consumer=self.buyer, status='Paid')
+            for product in products:
+                LineItem.objects.create(order=order, product=product)
+
+    def test_neighbors_are_scored_by_cosine_similarity(self):
+        neighbors = compute_neighbors()
+        self.assertEqual([(round(score, 4), together, pk) for score, together, pk in neighbors[self.a.pk]],
+                         [(0.6667, 2, self.b.pk), (0.5774, 1, self.c.pk)])
+        self.assertEqual([pk for _, _, pk in neighbors[self.c.pk]], [self.a.pk])
+        self.assertNotIn(self.d.pk, neighbors)
+
+        self.assertEqual(rebuild_neighbors(), 3)
+        self.assertEqual(get_neighbors(self.a), [self.b, self.c])
+        self.b.draft = True
+        self.b.save()
+        self.assertEqual(get_neighbors(self.a), [self.c])
+
+    def test_detail_page_falls_back_to_category_rules(self):
+        rebuild_neighbors()
+        url = reverse('products:product_detail', args=[self.a.pk])
+        self.assertEqual(self.client.get(url).context['related_products'], [self.b, self.c])
+        # D was never bought with anything: the storefront's category rule
+        # (manual picks by default) fills in instead
+        Product.objects.filter(pk__in=[self.b.pk, self.d.pk]).update(featured_manual=True)
+        url = reverse('products:product_detail', args=[self.d.pk])
+        self.assertEqual(self.client.get(url).context['related_products'], [self.b])
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        seller = Seller.objects.create(user=User.objects.create_user(username='seller'))
+        self.buyer = User.objects.create_user(username='buyer')
+        self.bought, self.other, self.neighbor, self.draft = [
+            Product.objects.create(name=name, description='desc', seller=seller, price=10, trending_score=score,
+                                   draft=name == 'Draft')
+            for name, score in (('Bought', 1), ('Other', 2), ('Neighbor', 3), ('Draft', 4))
+        ]
+        order = Order.objects.create(consumer=self.buyer, status='Paid')
+        for product in (self.bought, self.other):
+            LineItem.objects.create(order=order, product=product)
+        for rank, product in enumerate((self.draft, self.other, self.neighbor), start=1):
+            ProductNeighbor.objects.create(product=self.bought, neighbor=product, rank=rank, score=1 / rank,
+                                           co_purchases=1)
+
+    def test_skips_bought_and_draft_products(self):
+        self.assertEqual(compute_recommendations([self.buyer.pk]), {self.buyer.pk: [self.neighbor.pk]})
+
+    def test_users_without_a_list_get_popular_products(self):
+        popular = [self.neighbor.pk, self.other.pk, self.bought.pk]
+        newcomer = get_user_model().objects.create_user(username='newcomer')
+        self.assertEqual(get_recommendation_ids(newcomer), popular)
+        self.assertEqual(get_recommendation_ids(AnonymousUser()), popular)
+
+        cache.set(USER_KEY % newcomer.pk, [self.bought.pk])
+        self.assertEqual(get_recommendation_ids(newcomer), [self.bought.pk])
@@ -0,0 +1,89 @@
+"""
+Time-decayed trending scores.
+
+Every flushed counter bucket (products/counters.py) is also added to hourly
+ProductActivity rows, which are kept for RETENTION_DAYS. The trending score is
+
+    sum((views + PURCHASE_WEIGHT * purchases) * 0.5 ** (age_hours / half_life))
+
+computed for all products by one grouped query over the retained window and
+stored in the indexed Product.trending_score column. The half-life is set by
+owners in StorefrontSettings.
+"""
+import time
+
+from django.db.models import ExpressionWrapper, F, FloatField, Sum, Value
+from django.db.models.functions import Power
+
+from config.site_config import get_storefront_config
+
+from .models import Product, ProductActivity
+
+PURCHASE_WEIGHT = 5
+RETENTION_DAYS = 30
+
+
+def current_hour(now=None):
+    return int((time.time() if now is None else now) // 3600)
+
+
+def add_activity(hour, deltas):
+    """Add a counter bucket (``{product_id: {counter: amount}}``) to the rows for *hour*."""
+    counts = {
+        pid: (c.get('view_count', 0), c.get('purchase_count', 0))
+        for pid, c in deltas.items() if c.get('view_count') or c.get('purchase_count')
+    }
+    # Deleted products may still have buffered increments.
+    pids = set(Product.objects.filter(pk__in=counts).values_list('pk', flat=True))
+    if not pids:
+        return
+    existing = {
+        row.product_id: row
+        for row in ProductActivity.objects.select_for_update().filter(hour=hour, product_id__in=pids)
+    }
+    new = []
+    for pid in sorted(pids):
+        views, purchases = counts[pid]
+        row = existing.get(pid)
+        if row is None:
+            new.append(ProductActivity(product_id=pid, hour=hour, views=views, purchases=purchases))
+        else:
+            row.views += views
+            row.purchases += purchases
+    ProductActivity.objects.bulk_update(list(existing.values()), ['views', 'purchases'], batch_size=1000)
+    ProductActivity.objects.bulk_create(new, batch_size=1000)
+
+
+def prune_activity(now=None, days=RETENTION_DAYS):
+    return ProductActivity.objects.filter(hour__lte=current_hour(now) - days * 24).delete()[0]
+
+
+def compute_scores(half_life_hours, now=None):
+    """``{product_id: score}`` for products with activity in the retained window."""
+    now_hour = current_hour(now)
+    age = ExpressionWrapper(Value(float(now_hour)) - F('hour'), output_field=FloatField())
+    decay = Power(Value(0.5), age / Value(float(half_life_hours)))
+    weight = ExpressionWrapper(F('views') + PURCHASE_WEIGHT * F('purchases'), output_field=FloatField())
+    rows = (
+        ProductActivity.objects.filter(hour__gt=now_hour - RETENTION_DAYS * 24)
+        .values('product_id')
+        .annotate(score=Sum(weight * decay, output_field=FloatField()))
+        .order_by()
+        .values_list('product_id', 'score')
+    )
+    return dict(rows)
+
+
+def update_trending_scores(half_life_hours=None, now=None):
+    """Recompute Product.trending_score for every product; returns the number changed."""
+    if half_life_hours is None:
+        half_life_hours = get_storefront_config().trending_half_life_hours
+    scores = compute_scores(half_life_hours, now)
+    changed = []
+    for product in Product.objects.only('pk', 'trending_score').order_by('pk').iterator(chunk_size=2000):
+        score = round(scores.get(product.pk, 0.0), 4)
+        if score != product.trending_score:
+            product.trending_score = score
+            changed.append(product)
+    Product.objects.bulk_update(changed, ['trending_score'], batch_size=1000)
+    return len(changed)
@@ -0,0 +1,111 @@
+"""
+Version stamps for HTTP conditional requests.
+
+The catalog version is a random token plus the time it changed, kept in the
+shared cache. products/signals.py bumps it whenever a product, its tags or
+media, or a category changes, and so do the writes that skip model signals
+(Product.touch, recompute_ratings, checkout stock updates), so read-only
+endpoints can answer
+If-None-Match / If-Modified-Since with 304 before touching the database.
+
+Single products carry their own Product.version / updated_at, so detail
+pages and the API detail endpoint revalidate with one small query and skip
+rendering when nothing changed. Related-product picks on the detail page are
+allowed to lag until the product itself changes.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+CATALOG_KEY = 'versioning:catalog'
+
+
+def _new_version():
+    # Whole seconds: Last-Modified has no finer resolution.
+    return uuid.uuid4().hex, timezone.now().replace(microsecond=0)
+
+
+def get_catalog_version():
+    """``(token, changed_at)`` for the catalog as a whole."""
+    return cache.get_or_set(CATALOG_KEY, _new_version, None)
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_KEY, _new_version(), None)
+
+
+def catalog_changed():
+    """
+    Bump the catalog version now and again after commit, so a response built
+    from pre-commit rows in another worker cannot be cached under the new version.
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def _viewer(request):
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else 'anon'
+
+
+def catalog_etag(request, *args, **kwargs):
+    """
+    ETag of a catalog response: the version plus everything in the request
+    that shapes the body, including the viewer (the browsable API shows them).
+    """
+    token, _ = get_catalog_version()
+    key = f"{token}|{_viewer(request)}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    return uuid.uuid5(uuid.NAMESPACE_URL, key).hex
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return get_catalog_version()[1]
+
+
+def _product_version(request, product_id):
+    """``(version, updated_at)`` of a product, memoized on the request (None if missing)."""
+    versions = request.__dict__.setdefault('_product_versions', {})
+    if product_id not in versions:
+        from .models import Product
+
+        versions[product_id] = (
+            Product.objects.filter(pk=product_id).values_list('version', 'updated_at').first()
+        )
+    return versions[product_id]
+
+
+def product_etag(request, product_id=None, pk=None, **kwargs):
+    """
+    Strong ETag of a product page: the product version plus what else varies
+    the response (viewer, cart size, site settings, URL and Accept).
+    """
+    from config.site_config import get_storefront_config
+
+    product_id = product_id or pk
+    version = _product_version(request, product_id)
+    if version is None:
+        return None
+    viewer = _viewer(request)
+    cart = len(request.session.get('cart', {})) if hasattr(request, 'session') else 0
+    config = get_storefront_config()
+    key = (f"{product_id}|{version[0]}|{version[1].isoformat()}|{viewer}|{cart}|"
+           f"{config.featured_products_mode}|{config.theme_mode}|"
+           f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}")
+    return uuid.uuid5(uuid.NAMESPACE_URL, key).hex
+
+
+def product_last_modified(request, product_id=None, pk=None, **kwargs):
+    version = _product_version(request, product_id or pk)
+    return version[1] if version else None
+
+
+def api_etag(request, *args, pk=None, **kwargs):
+    """Product detail responses follow the product's version, lists the catalog's."""
+    return product_etag(request, pk=pk) if pk else catalog_etag(request)
+
+
+def api_last_modified(request, *args, pk=None, **kwargs):
+    return product_last_modified(request, pk=pk) if pk else catalog_last_modified(request)
+
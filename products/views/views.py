@@ -1,16 +1,30 @@
 # Wishlist views
 
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
 from django.contrib.auth.decorators import login_required, user_passes_test
 from accounts.permissions import owner_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from ..models_wishlist import Wishlist
-from ..models import Product, Category
+from .. import counters
+from ..models import Product, Category, Media
 from ..forms import CategoryForm
+from ..search import search_products
+from ..tags import filter_by_tags, get_tag_cloud
+from ..categories import filter_by_category, get_category_choices, get_category_tree
+from ..pagination import KeysetPaginator
+from ..facets import add_facet_urls, get_facets
+from ..copurchase import get_neighbors
+from ..cards import get_cards
+from ..versioning import product_etag, product_last_modified
 from accounts.models import User
 from accounts.models_notification import Notification
+from config.site_config import get_storefront_config
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.views.decorators.http import condition
 
 # Helper for admin check
 def is_owner(user):
@@ -19,63 +33,75 @@ def is_owner(user):
 @login_required
 def wishlist_view(request):
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
-    return render(request, 'products/wishlist.html', {'wishlist': wishlist})
+    products = list(wishlist.products.filter(draft=False).only('id', 'version').order_by('-id'))
+    return render(request, 'products/wishlist.html', {
+        'wishlist': wishlist,
+        'wishlist_products': products,
+        'wishlist_product_ids': {product.pk for product in products},
+        'cards': get_cards(products),
+    })
 
 @login_required
 def add_to_wishlist(request, product_id):
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
     product = Product.objects.get(id=product_id)
-    wishlist.products.add(product)
-    return redirect('wishlist')
+    if not wishlist.products.filter(pk=product.pk).exists():
+        wishlist.products.add(product)
+        counters.record('wishlist_count', product.pk)
+    return redirect('products:wishlist')
 
 @login_required
 def remove_from_wishlist(request, product_id):
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
     product = Product.objects.get(id=product_id)
     wishlist.products.remove(product)
-    return redirect('wishlist')
+    return redirect('products:wishlist')
 
 from django.shortcuts import render, get_object_or_404
 from ..models import Product
 from django.contrib import messages
 
+PRODUCT_LIST_ORDERINGS = {
+    'newest': ['-id'],
+    'price_asc': ['price', 'id'],
+    'price_desc': ['-price', '-id'],
+    'name': ['name', 'id'],
+    'rating': ['-rating_avg', '-rating_count', '-id'],
+    'trending': ['-trending_score', '-id'],
+    'most_viewed': ['-view_count', '-id'],
+    'most_purchased': ['-purchase_count', '-id'],
+    'relevance': ['-search_rank', '-id'],
+}
+
 def product_list(request):
     # Search and filtering
-    from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
     products = Product.objects.filter(draft=False)
-    categories = Category.objects.all()
-    sellers = User.objects.filter(is_seller=True)
+    categories = get_category_choices()
     query = request.GET.get('q', '').strip()
     category_id = request.GET.get('category', '')
     price_min = request.GET.get('price_min', '')
     price_max = request.GET.get('price_max', '')
     tags = request.GET.get('tags', '').strip()
+    tag_match = 'any' if request.GET.get('tag_match') == 'any' else 'all'
     seller_id = request.GET.get('seller', '')
     min_rating = request.GET.get('min_rating', '')
-    sort = request.GET.get('sort', 'newest')
-    page = request.GET.get('page', 1)
+    product_type = request.GET.get('type', '')
+    sort = request.GET.get('sort', 'relevance' if query else 'newest')
     per_page = 9
 
     if query:
-        products = products.filter(name__icontains=query)
+        products = search_products(products, query)
     if tags:
-        for tag in tags.split(','):
-            tag = tag.strip()
-            if tag:
-                products = products.filter(tags__icontains=tag)
+        products = filter_by_tags(products, tags, match=tag_match)
     if seller_id:
         products = products.filter(seller__user__id=seller_id)
-        # Build nested category list for dropdown
-        def get_category_tree(categories, parent=None, level=0):
-            tree = []
-            for cat in categories.filter(parent=parent).order_by('position', 'name'):
-                tree.append({'id': cat.id, 'name': cat.name, 'level': level})
-                tree += get_category_tree(categories, parent=cat, level=level+1)
-            return tree
-
-        all_categories = Category.objects.all()
-        category_tree = get_category_tree(all_categories)
-        products = products.filter(category_id=category_id)
+    if category_id:
+        # Category and all of its descendants, at any depth
+        products = filter_by_category(products, category_id)
+    if product_type == 'digital':
+        products = products.filter(is_digital=True)
+    elif product_type == 'physical':
+        products = products.filter(is_physical=True)
     if price_min:
         try:
             products = products.filter(price__gte=float(price_min))
@@ -87,36 +113,25 @@ def product_list(request):
         except ValueError:
             pass
 
-    # Sorting
-    if sort == 'price_asc':
-        products = products.order_by('price')
-    elif sort == 'price_desc':
-        products = products.order_by('-price')
-    elif sort == 'name':
-        products = products.order_by('name')
-    else:  # newest
-        products = products.order_by('-id')
+    # Sorting: every ordering ends with a unique tiebreaker for keyset pagination
+    if sort == 'relevance' and not query:
+        sort = 'newest'
+    ordering = PRODUCT_LIST_ORDERINGS.get(sort, PRODUCT_LIST_ORDERINGS['newest'])
 
-    # Filter by min_rating (aggregate)
-    from ..models_review import ProductReview
-    from django.db.models import Avg
+    # Filter by min_rating (denormalized, indexed)
     if min_rating:
         try:
-            min_rating_val = float(min_rating)
-            product_ids = [p.pk for p in products]
-            ratings = ProductReview.objects.filter(product_id__in=product_ids).values('product').annotate(avg=Avg('rating'))
-            ids = [r['product'] for r in ratings if r['avg'] and r['avg'] >= min_rating_val]
-            products = products.filter(id__in=ids)
-        except Exception:
+            threshold = Decimal(min_rating)
+            if threshold.is_finite() and 0 <= threshold <= 5:
+                products = products.filter(rating_count__gt=0, rating_avg__gte=threshold)
+        except (InvalidOperation, ValidationError):
             pass
 
-    paginator = Paginator(products, per_page)
-    try:
-        products_page = paginator.page(page)
-    except PageNotAnInteger:
-        products_page = paginator.page(1)
-    except EmptyPage:
-        products_page = paginator.page(paginator.num_pages)
+    # Counts per category/seller/price/type/rating for the current filters
+    facets = add_facet_urls(get_facets(products, request.GET), request.GET)
+
+    # Relevance is a recomputed float: page it by offset (see products/pagination.py)
+    products_page = KeysetPaginator(products, ordering, per_page, keyset=sort != 'relevance').page(request)
 
     # Wishlist product IDs for current user
     wishlist_product_ids = set()
@@ -124,30 +139,32 @@ def product_list(request):
         wishlist, _ = Wishlist.objects.get_or_create(user=request.user)
         wishlist_product_ids = set(wishlist.products.values_list('id', flat=True))
 
+    cards = get_cards(products_page)
+
     # Average ratings for products on this page
-    from ..models_review import ProductReview
-    from django.db.models import Avg
-    avg_ratings = {}
-    for prod in products_page:
-        avg = ProductReview.objects.filter(product=prod).aggregate(Avg('rating'))['rating__avg']
-        avg_ratings[prod.id] = avg
+    avg_ratings = {prod.id: prod.rating_avg if prod.rating_count else None for prod in products_page}
 
     return render(request, 'products/product_list.html', {
         'products': products_page,
         'categories': categories,
-        'sellers': sellers,
+        'category_tree': get_category_tree(),
+        'sellers': facets['sellers'],
+        'facets': facets,
+        'product_type': product_type,
         'query': query,
         'category_id': category_id,
         'price_min': price_min,
         'price_max': price_max,
         'tags': tags,
+        'tag_match': tag_match,
+        'tag_cloud': get_tag_cloud(),
         'seller_id': seller_id,
         'min_rating': min_rating,
         'sort': sort,
-        'paginator': paginator,
         'page_obj': products_page,
-        'is_paginated': paginator.num_pages > 1,
+        'is_paginated': products_page.has_other_pages(),
         'wishlist_product_ids': wishlist_product_ids,
+        'cards': cards,
         'avg_ratings': avg_ratings,
     })
 
@@ -264,29 +281,30 @@ def category_reorder(request, category_id, direction):
     return redirect('category_list')
 
 # Product detail view
+@counters.counts_product_views
+@condition(etag_func=product_etag, last_modified_func=product_last_modified)
 def product_detail(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
+    product = get_object_or_404(Product.objects.select_related('category', 'seller__user'), id=product_id)
     from ..models_review import ProductReview
-    from django.db import models as djmodels
     reviews = ProductReview.objects.filter(product=product).select_related('user').all()
-    avg_rating = reviews.aggregate(djmodels.Avg('rating'))['rating__avg']
+    avg_rating = product.rating_avg if product.rating_count else None
     user_review = None
     if request.user.is_authenticated:
         user_review = reviews.filter(user=request.user).first()
 
-    # Related products: use StorefrontSettings to determine filter mode
-    from storefront.models import StorefrontSettings
-    mode = 'most_purchased'
-    settings_obj = StorefrontSettings.objects.first()
-    if settings_obj:
-        mode = settings_obj.featured_products_mode
-    related_qs = Product.objects.filter(category=product.category).exclude(pk=product.pk)
-    if mode == 'most_viewed':
-        related_products = related_qs.order_by('-view_count')[:4]
-    elif mode == 'manual':
-        related_products = related_qs.filter(featured_manual=True)[:4]
-    else:  # most_purchased (default)
-        related_products = related_qs.order_by('-purchase_count', '-view_count')[:4]
+    # Related products: customers also bought, else StorefrontSettings category rules
+    related_products = get_neighbors(product, limit=4)
+    if not related_products:
+        mode = get_storefront_config().featured_products_mode
+        related_qs = Product.objects.filter(category=product.category, draft=False).exclude(pk=product.pk)
+        if mode == 'most_viewed':
+            related_products = related_qs.order_by('-view_count')[:4]
+        elif mode == 'manual':
+            related_products = related_qs.filter(featured_manual=True)[:4]
+        else:  # most_purchased (default)
+            related_products = related_qs.order_by('-purchase_count', '-view_count')[:4]
+    related_products = list(related_products)
+    prefetch_related_objects(related_products, 'category', Prefetch('media', queryset=Media.objects.order_by('id')))
 
     return render(request, 'products/product_detail.html', {
         'product': product,
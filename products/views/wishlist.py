@@ -2,22 +2,32 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from products.models import Product
 from products.models_wishlist import Wishlist
+from products import counters
+from products.cards import get_cards
 
 @login_required
 def wishlist_view(request):
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
-    return render(request, 'products/wishlist.html', {'wishlist': wishlist})
+    products = list(wishlist.products.filter(draft=False).only('id', 'version').order_by('-id'))
+    return render(request, 'products/wishlist.html', {
+        'wishlist': wishlist,
+        'wishlist_products': products,
+        'wishlist_product_ids': {product.pk for product in products},
+        'cards': get_cards(products),
+    })
 
 @login_required
 def add_to_wishlist(request, product_id):
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
     product = Product.objects.get(id=product_id)
-    wishlist.products.add(product)
-    return redirect('wishlist')
+    if not wishlist.products.filter(pk=product.pk).exists():
+        wishlist.products.add(product)
+        counters.record('wishlist_count', product.pk)
+    return redirect('products:wishlist')
 
 @login_required
 def remove_from_wishlist(request, product_id):
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
     product = Product.objects.get(id=product_id)
     wishlist.products.remove(product)
-    return redirect('wishlist')
+    return redirect('products:wishlist')
@@ -2,6 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from .models_collection import Collection
 from products.models import Product
+from products.cards import get_cards
 from accounts.models import User
 from django.http import HttpResponseForbidden
 
@@ -37,8 +38,14 @@ def collection_remove_product(request, collection_id, product_id):
 @login_required
 def collection_detail(request, collection_id):
     collection = get_object_or_404(Collection, id=collection_id, owner=request.user)
-    return render(request, 'products/collection_detail.html', {'collection': collection})
+    products = list(collection.products.only('id', 'version').order_by('id'))
+    return render(request, 'products/collection_detail.html', {
+        'collection': collection, 'products': products, 'cards': get_cards(products),
+    })
 
 def collection_share(request, share_uuid):
     collection = get_object_or_404(Collection, share_uuid=share_uuid, is_public=True)
-    return render(request, 'products/collection_share.html', {'collection': collection})
+    products = list(collection.products.filter(draft=False).only('id', 'version').order_by('id'))
+    return render(request, 'products/collection_share.html', {
+        'collection': collection, 'products': products, 'cards': get_cards(products),
+    })
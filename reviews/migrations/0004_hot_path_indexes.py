@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0026_hot_path_indexes'),
+        ('reviews', '0003_alter_feedback_id_alter_rating_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['product', 'user'], name='rating_product_user_idx'),
+        ),
+    ]
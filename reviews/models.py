@@ -7,6 +7,9 @@ class Rating(models.Model):
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['product', 'user'], name='rating_product_user_idx')]
+
 class Feedback(models.Model):
     rating = models.ForeignKey(Rating, on_delete=models.CASCADE)
     text = models.TextField()
@@ -30,30 +30,35 @@ def dashboard(request):
 
     seller = request.user.seller
     products = Product.objects.filter(seller=seller)
-    orders = LineItem.objects.filter(product__seller=seller)
-    total_sales = sum([item.product.price * item.quantity for item in orders])
-    digital_sales = sum([
-        item.product.price * item.quantity for item in orders if item.product.is_digital
-    ])
-    material_sales = sum([
-        item.product.price * item.quantity for item in orders if item.product.is_physical
-    ])
+    # Line items carry their own price/seller/title/type snapshot, so sales are
+    # summed without joining products (which may have changed or been deleted since).
+    from django.db.models import Avg, Count, F, Q, Sum
+    from django.db.models.functions import TruncMonth
+    orders = LineItem.objects.filter(seller=seller).order_by('-created_at')
+    revenue = Sum(F('unit_price') * F('quantity'))
+    sales = orders.aggregate(
+        total=revenue,
+        digital=Sum(F('unit_price') * F('quantity'), filter=Q(is_digital=True)),
+        material=Sum(F('unit_price') * F('quantity'), filter=Q(is_physical=True)),
+    )
+    total_sales = sales['total'] or 0
+    digital_sales = sales['digital'] or 0
+    material_sales = sales['material'] or 0
     # Top products by sales
-    from collections import Counter
-    product_sales = Counter()
-    for item in orders:
-        product_sales[item.product.id] += item.quantity
-    top_products = Product.objects.filter(id__in=[pid for pid, _ in product_sales.most_common(5)])
+    top_ids = (
+        orders.filter(product__isnull=False).values('product_id')
+        .annotate(sold=Sum('quantity')).order_by('-sold').values_list('product_id', flat=True)[:5]
+    )
+    top_products = Product.objects.filter(id__in=list(top_ids))
     # Recent reviews (using Rating model)
     from reviews.models import Rating
     recent_reviews = Rating.objects.filter(product__seller=seller).order_by('-created_at')[:5]
+    seller_rating = Rating.objects.filter(product__seller=seller).aggregate(average=Avg('score'), count=Count('id'))
     # Sales trend (monthly)
-    from django.db.models.functions import TruncMonth
-    from django.db.models import Sum
     sales_trend = (
-        orders.annotate(month=TruncMonth('order__created_at'))
+        orders.annotate(month=TruncMonth('created_at'))
         .values('month')
-        .annotate(total=Sum('product__price'))
+        .annotate(total=revenue)
         .order_by('month')
     )
     sales_trend_labels = [item['month'].strftime('%b %Y') for item in sales_trend]
@@ -82,6 +87,7 @@ def dashboard(request):
         'material_sales': material_sales,
         'top_products': top_products,
         'recent_reviews': recent_reviews,
+        'seller_rating': seller_rating,
         'sales_trend_labels': sales_trend_labels,
         'sales_trend_data': sales_trend_data,
         'stripe_connected': stripe_connected,
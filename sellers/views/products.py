@@ -62,6 +62,7 @@ def edit_product(request, product_id):
             product.meta_title = form.cleaned_data.get('meta_title')
             product.meta_description = form.cleaned_data.get('meta_description')
             product.save()
+            form.save_m2m()
             # Add new media if present (multiple files/images)
             files = request.FILES.getlist('file')
             images = request.FILES.getlist('image')
@@ -73,7 +74,7 @@ def edit_product(request, product_id):
                 media = Media.objects.create(image=image, file_type=file_type)
                 product.media.add(media)
             variant_formset.save()
-            return redirect('manage_products')
+            return redirect('sellers:manage_products')
     else:
         form = ProductForm(instance=product)
         media_form = MediaForm()
@@ -94,7 +95,7 @@ def delete_product(request, product_id):
     product = get_object_or_404(Product, id=product_id, seller=seller)
     if request.method == 'POST':
         product.delete()
-        return redirect('manage_products')
+        return redirect('sellers:manage_products')
     return render(request, 'sellers/delete_product.html', {'product': product})
 
 from django.db import transaction
@@ -126,9 +127,10 @@ def duplicate_product(request, product_id):
         for media in product.media.all():
             # Only link existing media, do not copy files
             new_product.media.add(media)
+        new_product.tags.set(product.tags.all())
     from django.contrib import messages
     messages.success(request, f"Product '{product.name}' duplicated.")
-    return redirect('manage_products')
+    return redirect('sellers:manage_products')
 
 @login_required
 @seller_required
@@ -146,15 +148,14 @@ def manage_products(request):
                 products_qs.delete()
                 from django.contrib import messages
                 messages.success(request, f"Deleted {len(selected_ids)} products.")
-            elif action == 'feature':
-                products_qs.update(featured_manual=True)
+            elif action in ('feature', 'unfeature'):
+                ids = list(products_qs.values_list('pk', flat=True))
+                products_qs.update(featured_manual=action == 'feature')
+                # update() skips Product.save(): bump the card and catalog versions.
+                Product.touch(ids)
                 from django.contrib import messages
-                messages.success(request, f"Featured {len(selected_ids)} products.")
-            elif action == 'unfeature':
-                products_qs.update(featured_manual=False)
-                from django.contrib import messages
-                messages.success(request, f"Unfeatured {len(selected_ids)} products.")
-            return redirect('manage_products')
+                messages.success(request, f"{action.capitalize()}d {len(selected_ids)} products.")
+            return redirect('sellers:manage_products')
         # Single product upload
         form = ProductForm(request.POST)
         media_form = MediaForm(request.POST, request.FILES)
@@ -171,6 +172,7 @@ def manage_products(request):
             product.meta_title = form.cleaned_data.get('meta_title')
             product.meta_description = form.cleaned_data.get('meta_description')
             product.save()
+            form.save_m2m()
             files = request.FILES.getlist('file')
             images = request.FILES.getlist('image')
             file_type = media_form.cleaned_data.get('file_type')
@@ -180,7 +182,7 @@ def manage_products(request):
             for image in images:
                 media = Media.objects.create(image=image, file_type=file_type)
                 product.media.add(media)
-            return redirect('manage_products')
+            return redirect('sellers:manage_products')
     else:
         form = ProductForm()
         media_form = MediaForm()
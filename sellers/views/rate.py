@@ -10,7 +10,7 @@ def rate_seller(request, seller_id, order_id):
     seller = get_object_or_404(Seller, pk=seller_id)
     order = get_object_or_404(Order, pk=order_id, consumer=request.user)
     # Only allow rating if user purchased from this seller in this order
-    if not LineItem.objects.filter(order=order, product__seller=seller).exists():
+    if not LineItem.objects.filter(order=order, seller=seller).exists():
         return redirect('order_history')
     # Only one rating per seller per order per user
     if SellerRating.objects.filter(seller=seller, user=request.user, order=order).exists():
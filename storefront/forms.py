@@ -28,8 +28,9 @@ class AdvancedSearchForm(forms.Form):
 class StorefrontSettingsForm(forms.ModelForm):
     class Meta:
         model = StorefrontSettings
-        fields = ['featured_products_mode', 'theme_mode']
+        fields = ['featured_products_mode', 'theme_mode', 'trending_half_life_hours']
         widgets = {
             'featured_products_mode': forms.Select(attrs={'class': 'form-select'}),
-            'theme_mode': forms.Select(attrs={'class': 'form-select'})
+            'theme_mode': forms.Select(attrs={'class': 'form-select'}),
+            'trending_half_life_hours': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
         }
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:38
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storefront', '0004_featuredcollection_featuredcreator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storefrontsettings',
+            name='trending_half_life_hours',
+            field=models.PositiveIntegerField(default=48, help_text='Hours after which a view or purchase counts half as much toward the trending score.', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 
 class StorefrontSettings(models.Model):
@@ -23,6 +24,11 @@ class StorefrontSettings(models.Model):
         default="auto",
         help_text="Site theme: light, dark, or auto."
     )
+    trending_half_life_hours = models.PositiveIntegerField(
+        default=48,
+        validators=[MinValueValidator(1)],
+        help_text="Hours after which a view or purchase counts half as much toward the trending score."
+    )
     class Meta:
         verbose_name = "Storefront Setting"
         verbose_name_plural = "Storefront Settings"
@@ -0,0 +1,71 @@
+"""
+Precomputed storefront rails (trending, new, recommended).
+
+storefront.tasks.refresh_storefront_rails rebuilds every rail on a Celery beat
+schedule (see config/celery.py) and stores each one in the cache as the
+product ids plus small card dicts. home() reads all rails with one get_many()
+and only builds the missing ones when the cache is cold; the dicts' id and
+version then pick the cached card fragments (products/cards.py).
+"""
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils.text import Truncator
+
+from monitoring.metrics import record_cache
+from products.models import Media, Product
+
+RAIL_SIZE = 8
+RAIL_TIMEOUT = 15 * 60  # beat refreshes every 5 minutes; this only covers a stalled worker
+CACHE_KEY = 'storefront:rail:%s'
+
+RAILS = {
+    'trending': ['-trending_score', '-view_count', '-id'],
+    'new': ['-id'],
+    'recommended': ['-purchase_count', '-view_count', '-id'],
+}
+
+
+def card_data(product):
+    images = [media for media in product.media.all() if media.image]
+    return {
+        'id': product.id,
+        'version': product.version,
+        'name': product.name,
+        'price': str(product.price),
+        'image_url': images[0].image.url if images else '',
+        'description': Truncator(product.description or '').words(12),
+        'view_count': product.view_count,
+        'purchase_count': product.purchase_count,
+        'is_digital': product.is_digital,
+        'is_physical': product.is_physical,
+    }
+
+
+def build_rail(name, size=RAIL_SIZE):
+    products = (
+        Product.objects.filter(draft=False)
+        .order_by(*RAILS[name])
+        .only('id', 'version', 'name', 'price', 'description', 'view_count', 'purchase_count',
+              'is_digital', 'is_physical')
+        .prefetch_related(Prefetch('media', queryset=Media.objects.order_by('id')))[:size]
+    )
+    cards = [card_data(product) for product in products]
+    return {'ids': [card['id'] for card in cards], 'cards': cards}
+
+
+def build_rails(names=None):
+    """Compute the given rails (all by default) and store them in the cache."""
+    rails = {name: build_rail(name) for name in (names or RAILS)}
+    cache.set_many({CACHE_KEY % name: rail for name, rail in rails.items()}, RAIL_TIMEOUT)
+    return rails
+
+
+def get_rails():
+    """``{rail name: [card, ...]}`` for every rail, from a single cache round trip."""
+    cached = cache.get_many([CACHE_KEY % name for name in RAILS])
+    rails = {name: cached.get(CACHE_KEY % name) for name in RAILS}
+    missing = [name for name, rail in rails.items() if rail is None]
+    record_cache('rails', len(rails) - len(missing), len(missing))
+    if missing:
+        rails.update(build_rails(missing))
+    return {name: rail['cards'] for name, rail in rails.items()}
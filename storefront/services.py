@@ -1 +1,93 @@
-# Placeholder for ranking and featured logic
+"""
+Random sampling for storefront fallbacks (featured creators and collections).
+
+sample() picks K random rows of any queryset without ORDER BY RANDOM() and
+without loading the table: it draws random primary keys from the queryset's
+id range and fetches the ones that exist in a single ``pk IN (...)`` query,
+repeating a few times if too few hit. The id range and row count are cached,
+so a warm call costs one or two indexed lookups however large the catalog is.
+"""
+import hashlib
+import math
+import random
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, Min, OuterRef
+
+BOUNDS_TIMEOUT = 10 * 60
+MAX_PROBES = 900  # stays under SQLite's bound-parameter limit
+MAX_ROUNDS = 4
+
+
+def _bounds(queryset):
+    """``(min pk, max pk, row count)`` of *queryset*, cached by its SQL."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'sampling:bounds:' + hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+
+    def compute():
+        stats = queryset.order_by().aggregate(lo=Min('pk'), hi=Max('pk'), n=Count('pk'))
+        return stats['lo'], stats['hi'], stats['n']
+    return cache.get_or_set(key, compute, BOUNDS_TIMEOUT)
+
+
+def sample_ids(queryset, k):
+    """Up to *k* distinct random primary keys of *queryset* (integer pks)."""
+    lo, hi, total = _bounds(queryset)
+    if not total or k <= 0:
+        return []
+    if total <= k:
+        ids = list(queryset.order_by().values_list('pk', flat=True))
+        random.shuffle(ids)
+        return ids[:k]
+
+    span = hi - lo + 1
+    picked = []
+    for _ in range(MAX_ROUNDS):
+        need = k - len(picked)
+        if need <= 0:
+            break
+        # Enough probes to expect ~1.5x the needed hits at the table's id density.
+        draws = min(span, MAX_PROBES, max(2 * need, math.ceil(1.5 * need * span / total)))
+        probes = random.sample(range(lo, hi + 1), draws)
+        hits = list(queryset.order_by().filter(pk__in=probes).exclude(pk__in=picked).values_list('pk', flat=True))
+        random.shuffle(hits)
+        picked.extend(hits[:need])
+
+    # Very sparse ids (mass deletes): take the next row after a random point, one
+    # indexed step per pick. Rows that follow big id gaps come up more often.
+    for _ in range(k - len(picked)):
+        remaining = queryset.exclude(pk__in=picked).order_by('pk').values_list('pk', flat=True)
+        pk = remaining.filter(pk__gte=random.randint(lo, hi)).first() or remaining.first()
+        if pk is None:
+            break
+        picked.append(pk)
+    return picked
+
+
+def sample(queryset, k):
+    """*k* random objects of *queryset* (fewer if it is smaller), in random order."""
+    ids = sample_ids(queryset, k)
+    if not ids:
+        return []
+    by_pk = {obj.pk: obj for obj in queryset.filter(pk__in=ids)}
+    return [by_pk[pk] for pk in ids if pk in by_pk]
+
+
+def sample_products(k, queryset=None):
+    """*k* random published products."""
+    from products.models import Product
+
+    if queryset is None:
+        queryset = Product.objects.all()
+    return sample(queryset.filter(draft=False), k)
+
+
+def sample_sellers(k, queryset=None):
+    """*k* random sellers with at least one published product."""
+    from products.models import Product
+    from sellers.models import Seller
+
+    if queryset is None:
+        queryset = Seller.objects.all()
+    has_products = Exists(Product.objects.filter(seller=OuterRef('pk'), draft=False))
+    return sample(queryset.filter(has_products), k)
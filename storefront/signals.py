@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from config.site_config import invalidate_site_config
+from moderation.models import SecuritySetting
+
+from .models import StorefrontSettings
+from .models_collections import FeaturedCollection
+from .models_featured import FeaturedCreator
+
+
+@receiver(post_save, sender=StorefrontSettings)
+@receiver(post_delete, sender=StorefrontSettings)
+@receiver(post_save, sender=SecuritySetting)
+@receiver(post_delete, sender=SecuritySetting)
+@receiver(post_save, sender=FeaturedCreator)
+@receiver(post_delete, sender=FeaturedCreator)
+@receiver(post_save, sender=FeaturedCollection)
+@receiver(post_delete, sender=FeaturedCollection)
+@receiver(m2m_changed, sender=FeaturedCollection.products.through)
+def invalidate_site_config_on_change(sender, **kwargs):
+    # Same as the category tree: now for this request, and after commit so
+    # other workers cannot reload pre-commit rows.
+    invalidate_site_config()
+    transaction.on_commit(invalidate_site_config)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .rails import build_rails
+
+
+@shared_task
+def refresh_storefront_rails():
+    rails = build_rails()
+    return {name: rail['ids'] for name, rail in rails.items()}
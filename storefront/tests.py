@@ -1,11 +1,24 @@
-from django.test import TestCase, Client
+import threading
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from products.models import Category, Product
 from sellers.models import Seller
 from django.contrib.auth import get_user_model
+from config.site_config import get_storefront_config
+from storefront.models import StorefrontSettings
+from storefront.models_featured import FeaturedCreator
+from storefront.services import MAX_ROUNDS, sample_ids, sample_products
+from orders.checkout import OutOfStock, place_order
+from orders.models import LineItem, Order
+from utils import process_cache
 
 class StorefrontCategoryFilterTests(TestCase):
     def setUp(self):
+        cache.clear()
+        process_cache.clear()
         self.client = Client()
         User = get_user_model()
         self.user = User.objects.create_user(username='testuser', password='testpass')
@@ -18,22 +31,203 @@ class StorefrontCategoryFilterTests(TestCase):
         self.prod3 = Product.objects.create(name='Prod3', description='desc', seller=self.seller, price=30, category=self.other_cat, is_physical=True, featured_manual=True)
 
     def test_filter_by_parent_category(self):
-        url = reverse('storefront_home') + f'?category={self.parent_cat.id}'
+        url = reverse('storefront:storefront_home') + f'?category={self.parent_cat.id}'
         response = self.client.get(url)
         self.assertContains(response, 'Prod1')
         self.assertContains(response, 'Prod2')
         self.assertNotContains(response, 'Prod3')
 
     def test_filter_by_subcategory(self):
-        url = reverse('storefront_home') + f'?subcategory={self.sub_cat.id}'
+        url = reverse('storefront:storefront_home') + f'?subcategory={self.sub_cat.id}'
         response = self.client.get(url)
         self.assertNotContains(response, 'Prod1')
         self.assertContains(response, 'Prod2')
         self.assertNotContains(response, 'Prod3')
 
     def test_no_filter_shows_all(self):
-        url = reverse('storefront_home')
+        url = reverse('storefront:storefront_home')
         response = self.client.get(url)
         self.assertContains(response, 'Prod1')
         self.assertContains(response, 'Prod2')
         self.assertContains(response, 'Prod3')
+
+    def test_filter_by_parent_category_includes_grandchildren(self):
+        grandchild = Category.objects.create(name='GrandchildCat', parent=self.sub_cat, position=4)
+        Product.objects.create(name='Prod4', description='desc', seller=self.seller, price=40, category=grandchild, is_physical=True, featured_manual=True)
+        url = reverse('storefront:storefront_home') + f'?category={self.parent_cat.id}'
+        response = self.client.get(url)
+        self.assertContains(response, 'Prod1')
+        self.assertContains(response, 'Prod4')
+        self.assertNotContains(response, 'Prod3')
+
+    def test_rails_built_on_cold_cache_then_read_from_cache(self):
+        from storefront.rails import CACHE_KEY, RAILS
+        response = self.client.get(reverse('storefront:storefront_home'))
+        self.assertEqual([card['id'] for card in response.context['new_products']],
+                         [self.prod3.id, self.prod2.id, self.prod1.id])
+        self.assertEqual(set(cache.get_many([CACHE_KEY % name for name in RAILS])),
+                         {CACHE_KEY % name for name in RAILS})
+        Product.objects.create(name='Prod5', description='desc', seller=self.seller, price=50, category=self.other_cat)
+        response = self.client.get(reverse('storefront:storefront_home'))
+        self.assertEqual(len(response.context['new_products']), 3)
+
+    def test_site_config_cached_until_saved(self):
+        self.assertEqual(get_storefront_config().theme_mode, 'auto')
+        with self.assertNumQueries(0):
+            get_storefront_config()
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_obj = StorefrontSettings.objects.create(theme_mode='dark')
+        self.assertEqual(get_storefront_config().theme_mode, 'dark')
+        settings_obj.theme_mode = 'light'
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_obj.save()
+        self.assertEqual(get_storefront_config().theme_mode, 'light')
+
+    def test_home_shows_featured_creators(self):
+        FeaturedCreator.objects.create(seller=self.seller, note='Maker of things')
+        response = self.client.get(reverse('storefront:storefront_home'))
+        self.assertContains(response, 'Maker of things')
+
+    def test_product_cards_cached_until_product_changes(self):
+        from products.cards import get_cards
+        get_cards([self.prod1])
+        with self.assertNumQueries(0):
+            self.assertIn('Prod1', get_cards([self.prod1])[self.prod1.id])
+        self.prod1.name = 'Renamed'
+        self.prod1.save()
+        self.assertIn('Renamed', get_cards([self.prod1])[self.prod1.id])
+
+    def test_featured_collections_follow_product_changes(self):
+        from storefront.models_collections import FeaturedCollection
+        collection = FeaturedCollection.objects.create(name='Desk toys')
+        collection.products.add(self.prod1, self.prod2)
+        response = self.client.get(reverse('storefront:storefront_home'))
+        self.assertEqual([p['id'] for p in response.context['featured_collections'][0].products],
+                         [self.prod1.id, self.prod2.id])
+
+        # Product edits do not touch the collection, so the snapshot stays; the cards must not.
+        self.prod1.name = 'Renamed'
+        self.prod1.save()
+        self.prod2.draft = True
+        self.prod2.save()
+        response = self.client.get(reverse('storefront:storefront_home'))
+        self.assertEqual([p['id'] for p in response.context['featured_collections'][0].products], [self.prod1.id])
+        self.assertContains(response, 'Renamed')
+
+    def test_bulk_feature_refreshes_cached_cards(self):
+        from products.cards import get_cards
+        get_cards([self.prod1])
+        self.user.is_seller = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.client.post(reverse('sellers:manage_products'),
+                         {'bulk_action': 'unfeature', 'selected_products': [self.prod1.id]})
+        self.prod1.refresh_from_db()
+        self.assertNotIn('title="Featured"', get_cards([self.prod1])[self.prod1.id])
+
+
+class CheckoutTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.seller = Seller.objects.create(user=User.objects.create_user(username='seller'))
+        self.buyers = [User.objects.create_user(username=f'buyer{i}') for i in range(8)]
+        self.printed = Product.objects.create(name='Printed', description='desc', seller=self.seller, price=10,
+                                              is_physical=True, inventory=3)
+        self.digital = Product.objects.create(name='Digital', description='desc', seller=self.seller, price=5,
+                                              is_digital=True)
+
+    def test_checkout_takes_stock_and_creates_all_lines(self):
+        self.client.force_login(self.buyers[0])
+        session = self.client.session
+        session['cart'] = {str(self.printed.pk): 2, str(self.digital.pk): 1}
+        session.save()
+        response = self.client.post(reverse('storefront:checkout'))
+        order = Order.objects.get(consumer=self.buyers[0])
+        self.assertRedirects(response, reverse('storefront:order_confirmation', args=[order.pk]))
+        self.assertEqual(sorted(order.lineitem_set.values_list('product__name', 'quantity')),
+                         [('Digital', 1), ('Printed', 2)])
+        self.printed.refresh_from_db()
+        self.assertEqual(self.printed.inventory, 1)
+
+        with self.assertRaises(OutOfStock):
+            place_order(self.buyers[1], {str(self.printed.pk): 2, str(self.digital.pk): 1})
+        self.assertEqual(Order.objects.count(), 1)  # nothing of the failed cart was kept
+
+    def test_lines_keep_their_snapshot_when_the_product_changes(self):
+        order = place_order(self.buyers[0], {str(self.printed.pk): 2})
+        Product.objects.filter(pk=self.printed.pk).update(price=99, name='Renamed')
+        line = order.lineitem_set.get()
+        self.assertEqual((line.unit_price, line.seller, line.product_name, line.subtotal),
+                         (10, self.seller, 'Printed', 20))
+        self.assertEqual(line.created_at, order.created_at)
+
+        self.printed.delete()
+        line.refresh_from_db()
+        self.assertIsNone(line.product_id)
+        self.assertEqual(line.product_name, 'Printed')
+
+    def test_dashboard_split_survives_deleted_products(self):
+        place_order(self.buyers[0], {str(self.printed.pk): 2, str(self.digital.pk): 1})
+        self.printed.delete()
+        self.seller.user.is_seller = True
+        self.seller.user.save()
+        self.client.force_login(self.seller.user)
+        context = self.client.get(reverse('sellers:dashboard')).context
+        self.assertEqual((context['total_sales'], context['digital_sales'], context['material_sales']), (25, 5, 20))
+
+    def test_parallel_checkouts_never_oversell(self):
+        barrier = threading.Barrier(len(self.buyers))
+        outcomes = []
+
+        def buy(user):
+            try:
+                barrier.wait()
+                place_order(user, {str(self.printed.pk): 1})
+                outcomes.append('ordered')
+            except OutOfStock:
+                outcomes.append('out of stock')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in self.buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.printed.refresh_from_db()
+        self.assertEqual(self.printed.inventory, 0)
+        self.assertEqual(outcomes.count('ordered'), 3)
+        self.assertEqual(outcomes.count('out of stock'), len(self.buyers) - 3)
+        self.assertEqual(sum(LineItem.objects.values_list('quantity', flat=True)), 3)
+
+
+class SamplingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        seller = Seller.objects.create(user=get_user_model().objects.create_user(username='maker'))
+        # Sparse ids with a few drafts mixed in, like a catalog after mass deletes
+        for pk in (1, 2, 3, 50, 51, 400, 401, 402, 5000, 90000, 90001, 90002):
+            Product.objects.create(pk=pk, name=f'P{pk}', description='desc', seller=seller, price=10,
+                                   draft=pk % 50 == 1)
+        self.published = set(Product.objects.filter(draft=False).values_list('pk', flat=True))
+
+    def test_samples_are_distinct_published_products(self):
+        for k in (1, 4, 8, 9, 20):
+            with self.subTest(k=k):
+                for _ in range(20):
+                    ids = [p.pk for p in sample_products(k)]
+                    self.assertEqual(len(ids), min(k, len(self.published)))
+                    self.assertEqual(len(set(ids)), len(ids))
+                    self.assertLessEqual(set(ids), self.published)
+
+    def test_sparse_ids_cost_a_bounded_number_of_indexed_steps(self):
+        published = Product.objects.filter(draft=False)
+        sample_ids(published, 3)  # warms the cached id bounds
+        for _ in range(20):
+            with CaptureQueriesContext(connection) as queries:
+                ids = sample_ids(published, 3)
+            self.assertEqual(len(set(ids)), 3)
+            self.assertLessEqual(len(queries), MAX_ROUNDS + 2 * 3)
+            self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
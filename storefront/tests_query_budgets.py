@@ -0,0 +1,148 @@
+"""
+Query-count budgets for the hot views.
+
+Each view is requested against a small seeded marketplace, the fixture is
+grown, and the view is requested again. Both counts must stay within the
+view's budget in QUERY_BUDGETS, a flat maximum however much data the view
+shows: a count that grows with the fixture is an N+1 to fix, not a budget to
+raise. Lower a budget when a view gets cheaper. A budget above
+MAX_UNEXPLAINED_QUERIES must say why in ``reason``, which failures repeat.
+
+Counts are taken on a warm cache (the second request after seeding), which is
+the steady state in production. When a budget is exceeded the failure lists
+every statement that ran more than once.
+"""
+import unittest
+from collections import Counter
+from io import StringIO
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models_notification import Notification
+from messaging.models import Message, MessageThread
+from monitoring.sql import fingerprint
+from orders.models import LineItem, Order
+from products.models import Category, Media, Product
+from reviews.models import Rating
+from sellers.models import Seller
+from utils import process_cache
+
+
+class Budget(NamedTuple):
+    queries: int
+    reason: str = ''
+
+
+MAX_UNEXPLAINED_QUERIES = 10
+
+
+QUERY_BUDGETS = {
+    'storefront_home': Budget(7),
+    'product_list': Budget(6),
+    'product_detail': Budget(10),
+    'inbox': Budget(4),
+    'order_history': Budget(5),
+    'seller_dashboard': Budget(10),
+    'owner_dashboard': Budget(19, reason='Eight site-wide COUNT(*) summaries, two monthly charts and '
+                                         'the category lists, each one query by design.'),
+    'consumer_dashboard': Budget(7),
+}
+
+SMALL = 3
+LARGE = 8
+
+
+def _duplicates(queries):
+    counts = Counter(fingerprint(query['sql']) for query in queries)
+    return '\n'.join(f'  {n}x {sql}' for sql, n in counts.most_common() if n > 1) or '  (none)'
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        process_cache.clear()
+        User = get_user_model()
+        self.owner = User.objects.create_user(username='owner', password='pw', is_owner=True)
+        self.seller_user = User.objects.create_user(username='seller', password='pw', is_seller=True)
+        self.seller = Seller.objects.create(user=self.seller_user)
+        self.consumer = User.objects.create_user(username='consumer', password='pw')
+        parent = Category.objects.create(name='Figures', position=1)
+        self.category = Category.objects.create(name='Dragons', parent=parent, position=2)
+        self.rows = 0
+
+    def seed(self, rows):
+        """Grow the fixture to *rows* of everything the views list."""
+        for i in range(self.rows, rows):
+            product = Product.objects.create(
+                name=f'Product {i}', description='A printable model', seller=self.seller, price=10 + i,
+                category=self.category, is_physical=True, inventory=5, featured_manual=True,
+            )
+            product.media.add(Media.objects.create(file_type='stl'))
+            order = Order.objects.create(consumer=self.consumer, status='Paid')
+            LineItem.for_product(order, product, 2).save()
+            Rating.objects.create(product=product, user=self.consumer, score=5, comment='Great')
+            thread = MessageThread.objects.create()
+            thread.participants.add(self.consumer, self.seller_user)
+            Message.objects.create(thread=thread, sender=self.seller_user, body='Hello')
+            Notification.objects.create(user=self.consumer, message='Order shipped')
+        self.rows = rows
+
+    def count_queries(self, url, user):
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 200)  # warm the caches
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return ctx
+
+    def assertWithinBudget(self, name, url, user):
+        budget = QUERY_BUDGETS[name]
+        for rows in (SMALL, LARGE):
+            self.seed(rows)
+            ctx = self.count_queries(url() if callable(url) else url, user)
+            if len(ctx) > budget.queries:
+                self.fail(f'{name} ran {len(ctx)} queries with {rows} rows (budget {budget.queries}'
+                          f'{": " + budget.reason if budget.reason else ""}).\n'
+                          f'Repeated statements:\n{_duplicates(ctx.captured_queries)}')
+
+    def test_large_budgets_are_explained(self):
+        unexplained = [name for name, budget in QUERY_BUDGETS.items()
+                       if budget.queries > MAX_UNEXPLAINED_QUERIES and not budget.reason]
+        self.assertEqual(unexplained, [])
+
+    def test_storefront_home(self):
+        self.assertWithinBudget('storefront_home', reverse('storefront:storefront_home'), self.consumer)
+
+    def test_product_list(self):
+        self.assertWithinBudget('product_list', reverse('products:product_list'), self.consumer)
+
+    def test_product_detail(self):
+        url = lambda: reverse('products:product_detail', args=[Product.objects.order_by('id').first().pk])
+        self.assertWithinBudget('product_detail', url, self.consumer)
+
+    def test_inbox(self):
+        self.assertWithinBudget('inbox', reverse('messaging:inbox'), self.consumer)
+
+    def test_order_history(self):
+        self.assertWithinBudget('order_history', reverse('order_history'), self.consumer)
+
+    def test_seller_dashboard(self):
+        self.assertWithinBudget('seller_dashboard', reverse('sellers:dashboard'), self.seller_user)
+
+    def test_owner_dashboard(self):
+        self.assertWithinBudget('owner_dashboard', reverse('accounts:owner_dashboard'), self.owner)
+
+    def test_consumer_dashboard(self):
+        self.assertWithinBudget('consumer_dashboard', reverse('consumer_dashboard'), self.consumer)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'PostgreSQL rightly scans tables this small')
+    def test_hot_queries_use_indexes(self):
+        self.seed(SMALL)
+        call_command('verify_query_plans', stdout=StringIO())
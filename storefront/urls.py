@@ -1,6 +1,7 @@
 from django.urls import path
 app_name = 'storefront'
-from .views.views import home, checkout_view, order_confirmation_view
+from .views.views import home
+from .views.checkout import checkout_view, order_confirmation_view
 from .views.settings import storefront_settings_view
 from .cart_views import cart_view, add_to_cart, remove_from_cart, update_cart, empty_cart
 
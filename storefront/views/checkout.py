@@ -1,13 +1,13 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from products.models import Product
-from orders.models import Order, LineItem
+from orders.checkout import OutOfStock, place_order
+from orders.models import Order
 
 @login_required
 def checkout_view(request):
     cart = request.session.get('cart', {})
-    product_ids = cart.keys()
-    products = Product.objects.filter(id__in=product_ids)
+    products = Product.objects.filter(id__in=cart.keys())
     cart_items = []
     total = 0
     for product in products:
@@ -21,24 +21,19 @@ def checkout_view(request):
         total += subtotal
     error = None
     if request.method == 'POST':
-        # Stock validation
-        for item in cart_items:
-            product = item['product']
-            quantity = item['quantity']
-            # Only check stock for physical products
-            if getattr(product, 'is_physical', False):
-                if product.inventory is not None and quantity > product.inventory:
-                    error = f"Not enough stock for {product.name}. Only {product.inventory} left."
-                    break
-        if not error:
-            # Create order and line items
-            order = Order.objects.create(consumer=request.user, status='Pending')
-            for item in cart_items:
-                LineItem.objects.create(order=order, product=item['product'], quantity=item['quantity'])
-            request.session['cart'] = {}
-            return redirect('order_confirmation', order_id=order.id)
+        if not cart_items:
+            error = "Your cart is empty."
+        else:
+            try:
+                order = place_order(request.user, cart)
+            except OutOfStock as exc:
+                error = f"Not enough stock for {exc.product.name}. Only {exc.available} left."
+            else:
+                request.session['cart'] = {}
+                return redirect('storefront:order_confirmation', order_id=order.id)
     return render(request, 'storefront/checkout.html', {'cart_items': cart_items, 'total': total, 'error': error})
 
+@login_required
 def order_confirmation_view(request, order_id):
-    order = Order.objects.get(id=order_id)
+    order = get_object_or_404(Order, id=order_id, consumer=request.user)
     return render(request, 'storefront/order_confirmation.html', {'order': order})
@@ -1,55 +1,33 @@
-# Checkout and order confirmation views
 from products.models import Product, Category
-from ..models import StorefrontSettings
+from products.search import search_products
+from products.categories import filter_by_category, get_ancestors, get_category_list
+from products.facets import get_category_type_facets
+from products.pagination import KeysetPaginator
+from products.cards import get_cards
+from config.site_config import get_featured_collections, get_featured_creators, get_storefront_config
+from ..rails import get_rails
 from ..forms import AdvancedSearchForm
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
-from products.models import Product
-from orders.models import Order, LineItem
-
-@login_required
-def checkout_view(request):
-    cart = request.session.get('cart', {})
-    product_ids = cart.keys()
-    products = Product.objects.filter(id__in=product_ids)
-    cart_items = []
-    total = 0
-    for product in products:
-        # Use product.pk instead of product.id to ensure compatibility with custom primary keys
-        quantity = cart[str(product.pk)]
-        subtotal = float(product.price) * quantity
-        cart_items.append({
-            'product': product,
-            'quantity': quantity,
-            'subtotal': subtotal
-        })
-        total += subtotal
-    if request.method == 'POST':
-        # Create order and line items
-        order = Order.objects.create(consumer=request.user, status='Pending')
-        for item in cart_items:
-            LineItem.objects.create(order=order, product=item['product'], quantity=item['quantity'])
-        request.session['cart'] = {}
-        return redirect('order_confirmation', order_id=order.pk)
-    return render(request, 'storefront/checkout.html', {'cart_items': cart_items, 'total': total})
-
-def order_confirmation_view(request, order_id):
-    order = Order.objects.get(id=order_id)
-    return render(request, 'storefront/order_confirmation.html', {'order': order})
-# from django.shortcuts import render  # Already imported above with redirect
+from django.shortcuts import render
 
 def get_theme_mode():
-    settings_obj = StorefrontSettings.objects.first()
-    if settings_obj:
-        return settings_obj.theme_mode
-    return 'auto'
+    return get_storefront_config().theme_mode
+
+# Sort keys from the sort bar and AdvancedSearchForm; each ends with a unique tiebreaker
+HOME_ORDERINGS = {
+    'high_price': ['-price', '-id'],
+    'price_high': ['-price', '-id'],
+    'low_price': ['price', 'id'],
+    'price_low': ['price', 'id'],
+    'most_viewed': ['-view_count', '-id'],
+    'popular': ['-trending_score', '-id'],
+    'trending': ['-trending_score', '-id'],
+    'most_purchased': ['-purchase_count', '-id'],
+    'newest': ['-id'],
+}
 
 def home(request):
     # Get featured mode from StorefrontSettings (admin only)
-    mode = 'manual'
-    settings_obj = StorefrontSettings.objects.first()
-    if settings_obj:
-        mode = settings_obj.featured_products_mode
+    mode = get_storefront_config().featured_products_mode
 
     # Advanced search form
     form = AdvancedSearchForm(request.GET or None)
@@ -57,11 +35,14 @@ def home(request):
     sort = request.GET.get('sort', 'featured')
     category_id = request.GET.get('category')
     subcategory_id = request.GET.get('subcategory')
+    search_query = ''
     if form.is_valid():
         data = form.cleaned_data
         if data.get('q'):
-            products_qs = products_qs.filter(name__icontains=data['q'])
-        if data.get('category'):
+            search_query = data['q']
+            products_qs = search_products(products_qs, search_query)
+        # ?category=<id> comes from the category links; only free text is a name search
+        if data.get('category') and not data['category'].isdigit():
             products_qs = products_qs.filter(category__name__icontains=data['category'])
         if data.get('min_price') is not None:
             products_qs = products_qs.filter(price__gte=data['min_price'])
@@ -71,63 +52,49 @@ def home(request):
         if data.get('sort'):
             sort = data['sort']
 
+    # Selected category (or subcategory) plus all of its descendants
     if subcategory_id:
-        products_qs = products_qs.filter(category_id=subcategory_id)
+        products_qs = filter_by_category(products_qs, subcategory_id)
     elif category_id:
-        subcat_ids = list(Category.objects.filter(parent_id=category_id).values_list('id', flat=True))
-        products_qs = products_qs.filter(category_id__in=[category_id] + subcat_ids)
+        products_qs = filter_by_category(products_qs, category_id)
 
-    featured_material = products_qs.filter(featured_manual=True, is_physical=True)
-    featured_digital = products_qs.filter(featured_manual=True, is_digital=True)
+    featured_material = list(products_qs.filter(featured_manual=True, is_physical=True)[:8])
+    featured_digital = list(products_qs.filter(featured_manual=True, is_digital=True)[:8])
     products = products_qs.filter(draft=False)
 
-    # Trending, recommended, and new models
-    trending_products = Product.objects.filter(draft=False).order_by('-view_count')[:8]
-    new_products = Product.objects.filter(draft=False).order_by('-id')[:8]
-    recommended_products = Product.objects.filter(draft=False).order_by('-purchase_count')[:8]
+    # Trending, recommended, and new models (precomputed by storefront.tasks);
+    # only on the unfiltered landing page
+    show_rails = not (search_query or category_id or subcategory_id)
+    rails = get_rails() if show_rails else {'trending': [], 'new': [], 'recommended': []}
+    featured_creators = get_featured_creators() if show_rails else []
+    featured_collections = get_featured_collections() if show_rails else []
 
-    from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-    if sort == 'high_price':
-        products = products.order_by('-price')
-    elif sort == 'low_price':
-        products = products.order_by('price')
-    elif sort == 'most_viewed' or sort == 'popular':
-        products = products.order_by('-view_count')
-    elif sort == 'most_purchased':
-        products = products.order_by('-purchase_count')
-    elif sort == 'newest':
-        products = products.order_by('-id')
+    if sort in HOME_ORDERINGS:
+        ordering = HOME_ORDERINGS[sort]
+    elif search_query:  # relevance, paged by offset (see products/pagination.py)
+        ordering = ['-search_rank', '-id']
     else:  # featured/manual
         if mode == 'most_viewed':
-            products = products.order_by('-view_count')
+            ordering = HOME_ORDERINGS['most_viewed']
         elif mode == 'most_purchased':
-            products = products.order_by('-purchase_count')
+            ordering = HOME_ORDERINGS['most_purchased']
         else:
             products = products.filter(featured_manual=True)
+            ordering = HOME_ORDERINGS['newest']
 
-    paginator = Paginator(products, 12)
-    page = request.GET.get('page')
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        products = paginator.page(1)
-    except EmptyPage:
-        products = paginator.page(paginator.num_pages)
+    products = KeysetPaginator(products, ordering, 12, keyset='-search_rank' not in ordering).page(request)
+    cards = get_cards([*rails['trending'], *rails['new'], *rails['recommended'],
+                       *(product for coll in featured_collections for product in coll.products),
+                       *featured_material, *featured_digital, *products])
 
-    categories = Category.objects.all()
-    material_categories = Category.objects.filter(product__is_physical=True).distinct()
-    digital_categories = Category.objects.filter(product__is_digital=True).distinct()
-    breadcrumb = []
-    if category_id:
-        cat = Category.objects.filter(id=category_id).first()
-        if cat:
-            breadcrumb.append({'name': cat.name, 'id': cat.pk, 'type': 'category'})
-    if subcategory_id:
-        subcat = Category.objects.filter(id=subcategory_id).first()
-        if subcat:
-            if subcat.parent:
-                breadcrumb = [{'name': subcat.parent.name, 'id': subcat.parent.id, 'type': 'category'}]
-            breadcrumb.append({'name': subcat.name, 'id': subcat.pk, 'type': 'subcategory'})
+    categories = get_category_list()
+    category_types = get_category_type_facets()
+    material_categories = category_types['material']
+    digital_categories = category_types['digital']
+    breadcrumb = [
+        {'name': node['name'], 'id': node['id'], 'type': 'category' if node['depth'] == 0 else 'subcategory'}
+        for node in get_ancestors(subcategory_id or category_id)
+    ]
     unread_notifications_count = 0
     if request.user.is_authenticated:
         unread_notifications_count = request.user.notifications.filter(is_read=False).count()
@@ -145,7 +112,11 @@ def home(request):
         'form': form,
         'category_id': category_id,
         'subcategory_id': subcategory_id,
-        'trending_products': trending_products,
-        'new_products': new_products,
-        'recommended_products': recommended_products,
+        'show_rails': show_rails,
+        'featured_creators': featured_creators,
+        'featured_collections': featured_collections,
+        'trending_products': rails['trending'],
+        'new_products': rails['new'],
+        'recommended_products': rails['recommended'],
+        'cards': cards,
     })
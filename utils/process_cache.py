@@ -0,0 +1,63 @@
+"""
+Process-wide memoization with cross-process invalidation.
+
+A value is computed once per worker process and kept in memory. Each key has
+a version stamp in the shared Django cache; invalidate() replaces the stamp,
+and other processes notice on their next check (at most CHECK_INTERVAL
+seconds later) and recompute. The invalidating process drops its own copy
+immediately. ``max_age`` additionally bounds how long a value is kept when
+nothing invalidates it.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from monitoring.metrics import record_cache
+
+CHECK_INTERVAL = 5  # seconds between version checks against the shared cache
+VERSION_KEY = 'process_cache:version:%s'
+
+_values = {}  # key -> (version, value, checked_at, computed_at)
+_lock = threading.Lock()
+
+
+def _shared_version(key):
+    return cache.get(VERSION_KEY % key)
+
+
+def get(key, compute, check_interval=CHECK_INTERVAL, max_age=None):
+    """Return the cached value for *key*, calling ``compute()`` when it is missing or stale."""
+    now = time.monotonic()
+    entry = _values.get(key)
+    if entry is not None and (max_age is None or now - entry[3] < max_age):
+        version, value, checked_at, computed_at = entry
+        if now - checked_at < check_interval:
+            record_cache('process:' + key, 1, 0)
+            return value
+        if _shared_version(key) == version:
+            _values[key] = (version, value, now, computed_at)
+            record_cache('process:' + key, 1, 0)
+            return value
+
+    version = _shared_version(key)
+    value = compute()
+    record_cache('process:' + key, 0, 1)
+    with _lock:
+        _values[key] = (version, value, now, now)
+    return value
+
+
+def invalidate(key):
+    """Drop *key* in this process and tell every other process to recompute it."""
+    # A random stamp (rather than a counter) stays correct if the cache evicts it.
+    cache.set(VERSION_KEY % key, uuid.uuid4().hex, None)
+    with _lock:
+        _values.pop(key, None)
+
+
+def clear():
+    """Forget every value held by this process (used by tests)."""
+    with _lock:
+        _values.clear()